@@ -0,0 +1,15 @@
+"""
+Benchmarks for rune's hot paths.
+
+Each module runs on its own (`python benchmarks/<name>.py --json`) or as part of the
+whole suite (`python -m benchmarks --output results.json`), which records every result
+together with the rune version, commit and machine it was measured on, so runs from
+different versions can be compared with `python benchmarks/compare.py old.json new.json`.
+
+    startup.py           cold start of the CLI (and a guard on its imports)
+    storage.py           add/get/update/delete/ls latency per storage backend and vault size
+    kdf.py               key derivation and AES-GCM field cost
+    serialization.py     Secret.to_dict/from_dict and JSON encoding cost
+    parallel_decrypt.py  speedup of parallel key derivation
+    vaults.py            synthetic vault generator used by the above
+"""
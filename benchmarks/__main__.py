@@ -0,0 +1,64 @@
+"""
+Runs every benchmark suite and records the results as one JSON document.
+
+    python -m benchmarks [--quick] [--only storage,kdf] [--output results.json]
+"""
+import argparse
+import json
+import sys
+from typing import Callable, Dict, List
+
+from benchmarks import common  # noqa: F401  (sets up the import path)
+from benchmarks import kdf, serialization, startup, storage
+from benchmarks.vaults import BACKENDS
+
+# suite -> (full run, quick run)
+SUITES: Dict[str, tuple[Callable[[], List[Dict]], Callable[[], List[Dict]]]] = {
+    "startup": (
+        lambda: startup.measure_commands(runs=5),
+        lambda: startup.measure_commands(runs=1),
+    ),
+    "storage": (
+        lambda: storage.run(list(BACKENDS), [1, 100, 1000, 10000], fields=5, repeat=5),
+        lambda: storage.run(list(BACKENDS), [1, 100], fields=5, repeat=3),
+    ),
+    "kdf": (
+        lambda: kdf.run(repeat=3, field_counts=[1, 10, 50]),
+        lambda: kdf.run(repeat=1, field_counts=[1, 10]),
+    ),
+    "serialization": (
+        lambda: serialization.run([1, 10, 50], count=1000, repeat=5),
+        lambda: serialization.run([1, 10], count=100, repeat=3),
+    ),
+}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--quick", action="store_true", help="Smaller vaults and fewer runs, for a smoke check.")
+    parser.add_argument("--only", default=",".join(SUITES), help="Comma-separated suites to run.")
+    parser.add_argument("--output", "-o", help="Write the results here instead of to stdout.")
+    args = parser.parse_args()
+
+    selected = [name.strip() for name in args.only.split(",")]
+    unknown = [name for name in selected if name not in SUITES]
+    if unknown:
+        parser.error(f"unknown suite(s): {', '.join(unknown)}")
+
+    report = {"meta": {**common.metadata(), "quick": args.quick}, "results": {}}
+    for name in selected:
+        print(f"running {name}...", file=sys.stderr)
+        full, quick = SUITES[name]
+        report["results"][name] = quick() if args.quick else full()
+
+    text = json.dumps(report, indent=2) + "\n"
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+    else:
+        sys.stdout.write(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
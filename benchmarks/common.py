@@ -0,0 +1,82 @@
+"""
+Helpers shared by the benchmarks: import paths, timing and result metadata.
+"""
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from typing import Callable, Dict, List
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC_DIR = os.path.join(ROOT_DIR, "src")
+
+# Lets every benchmark import rune from the checkout, also when run as a plain script.
+for path in (SRC_DIR, ROOT_DIR):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+
+def measure(fn: Callable[[], object], repeat: int, setup: Callable[[], object] | None = None) -> Dict[str, float]:
+    """
+    Runs `fn` `repeat` times (after `setup`, untimed, before each run) and summarizes
+    the samples in milliseconds.
+    """
+    samples: List[float] = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return summarize(samples)
+
+
+def summarize(samples_ms: List[float]) -> Dict[str, float]:
+    ordered = sorted(samples_ms)
+    p95 = ordered[min(len(ordered) - 1, round(0.95 * (len(ordered) - 1)))]
+    return {
+        "median_ms": round(statistics.median(ordered), 4),
+        "p95_ms": round(p95, 4),
+        "min_ms": round(ordered[0], 4),
+        "runs": len(ordered),
+    }
+
+
+def metadata() -> Dict[str, object]:
+    """
+    Where and on what a run was measured, so results from different versions can be told apart.
+    """
+    try:
+        import tomllib
+        with open(os.path.join(ROOT_DIR, "pyproject.toml"), "rb") as f:
+            rune_version = tomllib.load(f)["project"]["version"]
+    except (ImportError, OSError, KeyError, ValueError):
+        rune_version = None
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "rune_version": rune_version,
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+    }
+
+
+def parse_counts(text: str) -> List[int]:
+    """
+    Parses comma-separated counts like `1,100,10k`.
+    """
+    counts = []
+    for part in text.split(","):
+        part = part.strip().lower()
+        multiplier = 1000 if part.endswith("k") else 1
+        counts.append(int(part.removesuffix("k")) * multiplier)
+    return counts
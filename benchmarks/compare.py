@@ -0,0 +1,65 @@
+"""
+Compares two `python -m benchmarks` result files and prints the change of every
+benchmark present in both.
+
+    python benchmarks/compare.py old.json new.json [--threshold 10]
+
+Exits with 1 if any benchmark got slower by more than the threshold (in percent).
+"""
+import argparse
+import json
+import sys
+from typing import Dict, Tuple
+
+# The timing compared for each suite; everything else in a result identifies the benchmark.
+METRICS = {"startup": "import_ms"}
+DEFAULT_METRIC = "median_ms"
+TIMING_KEYS = {"median_ms", "p95_ms", "min_ms", "runs", "per_secret_us", "wall_ms", "import_ms", "budget_ms", "forbidden_imports", "ok"}
+
+
+def index(report: Dict) -> Dict[Tuple[str, str], float]:
+    """
+    Maps (suite, benchmark description) to the compared timing of each result.
+    """
+    indexed = {}
+    for suite, results in report["results"].items():
+        metric = METRICS.get(suite, DEFAULT_METRIC)
+        for result in results:
+            label = " ".join(f"{k}={v}" for k, v in result.items() if k not in TIMING_KEYS)
+            indexed[(suite, label)] = result[metric]
+    return indexed
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("old")
+    parser.add_argument("new")
+    parser.add_argument("--threshold", type=float, default=10.0, help="Slowdown in percent reported as a regression.")
+    args = parser.parse_args()
+
+    with open(args.old) as f:
+        old = json.load(f)
+    with open(args.new) as f:
+        new = json.load(f)
+    print(f"old: {old['meta'].get('rune_version')} ({old['meta'].get('commit')})  "
+          f"new: {new['meta'].get('rune_version')} ({new['meta'].get('commit')})")
+
+    before, after = index(old), index(new)
+    regressions = 0
+    for key in sorted(before.keys() & after.keys()):
+        was, now = before[key], after[key]
+        change = (now - was) / was * 100 if was else 0.0
+        flag = ""
+        if change > args.threshold:
+            flag = "  REGRESSION"
+            regressions += 1
+        suite, label = key
+        print(f"{suite:<14} {label:<60} {was:>10.3f} -> {now:>10.3f} ms  {change:+7.1f}%{flag}")
+    for key in sorted(before.keys() ^ after.keys()):
+        print(f"{key[0]:<14} {key[1]:<60} only in {'old' if key in before else 'new'}")
+
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,84 @@
+"""
+Cost of unlocking secrets: one key derivation per KDF and cost setting, and the
+AES-GCM work per field once the key is derived.
+
+    python benchmarks/kdf.py [--repeat 3] [--fields 1,10,50] [--json]
+"""
+import argparse
+import json
+import os
+import sys
+from typing import Dict, List
+
+if __package__ in (None, ""):
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from benchmarks import common  # noqa: E402
+
+from rune.encryption.aesgcm import AESGCMEncrypter  # noqa: E402
+from rune.encryption.kdf import Argon2idKdf, KeyDerivation, Pbkdf2, ScryptKdf, available_kdfs  # noqa: E402
+
+KEY = "benchmark-key"
+SALT = bytes(16)
+
+
+def kdf_configurations() -> List[KeyDerivation]:
+    """
+    The default of every available KDF, plus the legacy PBKDF2 cost for comparison.
+    """
+    configurations: List[KeyDerivation] = [Pbkdf2(), ScryptKdf()]
+    if Argon2idKdf.name in available_kdfs():
+        configurations.append(Argon2idKdf())
+    return configurations
+
+
+def bench_kdfs(repeat: int) -> List[Dict]:
+    results = []
+    for kdf in kdf_configurations():
+        stats = common.measure(lambda: kdf.derive(KEY, SALT), repeat)
+        results.append({"benchmark": "derive", **kdf.params(), **stats})
+    return results
+
+
+def bench_fields(field_counts: List[int], repeat: int) -> List[Dict]:
+    """
+    Encrypting and decrypting whole secrets with the key derivation taken out
+    (a cheap PBKDF2), so only the per-field AES-GCM and encoding work remains.
+    """
+    encrypter = AESGCMEncrypter(kdf=Pbkdf2(iterations=1))
+    results = []
+    for count in field_counts:
+        values = {f"field{i}": "x" * 32 for i in range(count)}
+        sealed = encrypter.encrypt_fields(values, KEY)
+        encrypt = common.measure(lambda: encrypter.encrypt_fields(values, KEY), repeat * 10)
+        decrypt = common.measure(lambda: encrypter.decrypt_fields(sealed, KEY), repeat * 10)
+        results.append({"benchmark": "encrypt_fields", "fields": count, **encrypt})
+        results.append({"benchmark": "decrypt_fields", "fields": count, **decrypt})
+    return results
+
+
+def run(repeat: int, field_counts: List[int]) -> List[Dict]:
+    return bench_kdfs(repeat) + bench_fields(field_counts, repeat)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--fields", default="1,10,50", help="Comma-separated field counts.")
+    parser.add_argument("--json", action="store_true", help="Print machine-readable results.")
+    args = parser.parse_args()
+
+    results = run(args.repeat, common.parse_counts(args.fields))
+    if args.json:
+        print(json.dumps({"meta": common.metadata(), "results": results}, indent=2))
+    else:
+        for r in results:
+            if r["benchmark"] == "derive":
+                params = ", ".join(f"{k}={v}" for k, v in r.items() if k not in ("benchmark", "kdf", "length") and not k.endswith(("_ms", "runs")))
+                print(f"derive  {r['kdf']:<14} {params:<40} {r['median_ms']:>9.2f}ms")
+            else:
+                print(f"{r['benchmark']:<15} {r['fields']:>3} fields {'':<37} {r['median_ms']:>9.3f}ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
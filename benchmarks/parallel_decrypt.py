@@ -0,0 +1,77 @@
+"""
+Wall-clock speedup of parallel key derivation/decryption by field count.
+
+Secrets in the older layout (one salt per field, version 1) need one PBKDF2 run per
+field, which AESGCMEncrypter.decrypt_fields now spreads over a thread pool.
+Secrets in the per-secret envelope layout (version 2) need a single run regardless
+of field count and are shown for comparison.
+
+    python benchmarks/parallel_decrypt.py [--fields 1,2,4,8,16] [--workers 4] [--json]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Dict, List
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from rune.encryption.aesgcm import AESGCMEncrypter  # noqa: E402
+from rune.models.secret import SecretField  # noqa: E402
+
+KEY = "benchmark-key"
+
+
+def per_field_salt_secret(field_count: int) -> Dict[str, SecretField]:
+    encrypter = AESGCMEncrypter()
+    return {f"field{i}": encrypter.encrypt(f"value{i}", KEY) for i in range(field_count)}
+
+
+def envelope_secret(field_count: int) -> Dict[str, SecretField]:
+    return AESGCMEncrypter().encrypt_fields({f"field{i}": f"value{i}" for i in range(field_count)}, KEY)
+
+
+def time_decrypt(fields: Dict[str, SecretField], workers: int) -> float:
+    encrypter = AESGCMEncrypter(workers=workers)
+    started = time.perf_counter()
+    encrypter.decrypt_fields(fields, KEY)
+    return time.perf_counter() - started
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fields", default="1,2,4,8,16", help="Comma-separated field counts.")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--json", action="store_true", help="Print machine-readable results.")
+    args = parser.parse_args()
+
+    results: List[Dict] = []
+    for field_count in (int(n) for n in args.fields.split(",")):
+        v1 = per_field_salt_secret(field_count)
+        v2 = envelope_secret(field_count)
+        serial = time_decrypt(v1, workers=1)
+        parallel = time_decrypt(v1, workers=args.workers)
+        envelope = time_decrypt(v2, workers=1)
+        results.append({
+            "fields": field_count,
+            "workers": args.workers,
+            "per_field_salt_serial_s": round(serial, 4),
+            "per_field_salt_parallel_s": round(parallel, 4),
+            "speedup": round(serial / parallel, 2),
+            "envelope_s": round(envelope, 4),
+        })
+
+    if args.json:
+        print(json.dumps({"cpu_count": os.cpu_count(), "results": results}, indent=2))
+    else:
+        print(f"cpus: {os.cpu_count()}  workers: {args.workers}")
+        print(f"{'fields':>6} {'v1 serial':>10} {'v1 parallel':>12} {'speedup':>8} {'v2 envelope':>12}")
+        for r in results:
+            print(f"{r['fields']:>6} {r['per_field_salt_serial_s']:>9.3f}s {r['per_field_salt_parallel_s']:>11.3f}s "
+                  f"{r['speedup']:>7.2f}x {r['envelope_s']:>11.3f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
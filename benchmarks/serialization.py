@@ -0,0 +1,71 @@
+"""
+Cost of turning secrets into stored data and back: Secret.to_dict/from_dict,
+JSON encoding of the result, the binary encoding, and lazily decoded SecretHeaders.
+
+    python benchmarks/serialization.py [--fields 1,10,50] [--secrets 1000] [--json]
+"""
+import argparse
+import json
+import os
+import sys
+from typing import Dict, List
+
+if __package__ in (None, ""):
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from benchmarks import common  # noqa: E402
+from benchmarks.vaults import cheap_encrypter, synthetic_secrets  # noqa: E402
+
+from rune.models.secret import Secret, SecretHeader  # noqa: E402
+from rune.storage.binarycodec import decode_secret, encode_secret  # noqa: E402
+
+
+def bench_fields(fields: int, count: int, repeat: int) -> List[Dict]:
+    secrets = list(synthetic_secrets(count, fields, encrypter=cheap_encrypter()))
+    dicts = [s.to_dict() for s in secrets]
+    texts = [json.dumps(d) for d in dicts]
+    encoded = [encode_secret(s) for s in secrets]
+
+    cases = {
+        "to_dict": lambda: [s.to_dict() for s in secrets],
+        "from_dict": lambda: [Secret.from_dict(d) for d in dicts],
+        "json_dumps": lambda: [json.dumps(d) for d in dicts],
+        "json_dumps_indent": lambda: [json.dumps(d, indent=4) for d in dicts],
+        "json_loads": lambda: [json.loads(t) for t in texts],
+        "header_full_name": lambda: [SecretHeader(d).full_name for d in dicts],
+        "binary_encode": lambda: [encode_secret(s) for s in secrets],
+        "binary_decode": lambda: [decode_secret(b) for b in encoded],
+        "json_load_secret": lambda: [Secret.from_dict(json.loads(t)) for t in texts],
+        "binary_load_secret": lambda: [Secret.from_dict(decode_secret(b)) for b in encoded],
+    }
+    results = []
+    for name, fn in cases.items():
+        stats = common.measure(fn, repeat)
+        per_secret_us = stats["median_ms"] * 1000 / count
+        results.append({"benchmark": name, "fields": fields, "secrets": count, "per_secret_us": round(per_secret_us, 3), **stats})
+    return results
+
+
+def run(field_counts: List[int], count: int, repeat: int) -> List[Dict]:
+    return [r for fields in field_counts for r in bench_fields(fields, count, repeat)]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fields", default="1,10,50", help="Comma-separated field counts.")
+    parser.add_argument("--secrets", default="1000", help="Secrets per timed batch.")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", action="store_true", help="Print machine-readable results.")
+    args = parser.parse_args()
+
+    results = run(common.parse_counts(args.fields), common.parse_counts(args.secrets)[0], args.repeat)
+    if args.json:
+        print(json.dumps({"meta": common.metadata(), "results": results}, indent=2))
+    else:
+        print(f"{'benchmark':<18} {'fields':>6} {'per secret':>12}")
+        for r in results:
+            print(f"{r['benchmark']:<18} {r['fields']:>6} {r['per_secret_us']:>10.2f}us")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,124 @@
+"""
+Cold-start guard for the rune CLI.
+
+Runs `rune --help`, `rune ls` and a secret name completion in fresh interpreters with
+`python -X importtime` against a throwaway config directory, reports import and wall-clock
+time, and fails when a command imports modules it should not need or exceeds its import budget.
+
+    python benchmarks/startup.py [--runs 5] [--budget-scale 1.0] [--json]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Set, Tuple
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+
+RUNNER = "import sys; sys.argv = ['rune'] + sys.argv[1:]; from rune.__main__ import main; main()"
+
+# What `rune get -n db/<TAB>` runs under bash completion.
+COMPLETION_ENV = {"_RUNE_COMPLETE": "complete_bash", "COMP_WORDS": "rune get -n db/", "COMP_CWORD": "3"}
+
+# label -> (arguments, extra environment, import budget in ms, modules that must not be imported)
+# Budgets are sized for a typical developer machine; use --budget-scale on slower CI runners.
+COMMANDS: Dict[str, Tuple[List[str], Dict[str, str], float, Set[str]]] = {
+    "rune --help": (["--help"], {}, 350.0, {"cryptography", "pyperclip", "rune.commands.getcmd", "rune.storage.local"}),
+    "rune ls": (["ls"], {}, 200.0, {"cryptography", "pyperclip", "rune.commands.getcmd", "rich.console"}),
+    # Mostly interpreter startup; the index lookup itself is well under 1 ms.
+    "complete -n": ([], COMPLETION_ENV, 90.0, {"typer", "rich", "cryptography", "rune.cli", "rune.storage.jsonstream"}),
+}
+
+
+def parse_importtime(stderr: str) -> Tuple[float, Set[str]]:
+    """
+    Returns the total import time in ms and the set of imported module names.
+    """
+    total_us = 0
+    modules = set()
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, _, name = line.removeprefix("import time:").split("|")
+        total_us += int(self_us)
+        modules.add(name.strip())
+    return total_us / 1000, modules
+
+
+def run(arguments: List[str], config_dir: str, extra_env: Dict[str, str]) -> Tuple[float, float, Set[str]]:
+    env = {
+        **os.environ,
+        "PYTHONPATH": SRC_DIR + os.pathsep + os.environ.get("PYTHONPATH", ""),
+        "XDG_CONFIG_HOME": config_dir,
+        "RUNE_NO_AGENT": "1",
+        **extra_env,
+    }
+    started = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", RUNNER, *arguments],
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    wall_ms = (time.perf_counter() - started) * 1000
+    if completed.returncode != 0:
+        raise RuntimeError(f"`rune {' '.join(arguments)}` failed:\n{completed.stderr}")
+    import_ms, modules = parse_importtime(completed.stderr)
+    return wall_ms, import_ms, modules
+
+
+def measure_commands(runs: int, budget_scale: float = 1.0) -> List[Dict]:
+    """
+    Median cold-start timings of every command, each checked against its import budget.
+    """
+    results: List[Dict] = []
+    with tempfile.TemporaryDirectory() as config_dir:
+        # Warm-up: creates settings/vault, byte-compiles sources and builds the name index.
+        run(["ls"], config_dir, {})
+        run([], config_dir, COMPLETION_ENV)
+        for label, (arguments, extra_env, budget_ms, forbidden) in COMMANDS.items():
+            budget_ms *= budget_scale
+            samples = [run(arguments, config_dir, extra_env) for _ in range(runs)]
+            import_ms = statistics.median(s[1] for s in samples)
+            wall_ms = statistics.median(s[0] for s in samples)
+            leaked = sorted(forbidden & samples[0][2])
+            results.append({
+                "command": label,
+                "wall_ms": round(wall_ms, 2),
+                "import_ms": round(import_ms, 2),
+                "budget_ms": budget_ms,
+                "forbidden_imports": leaked,
+                "ok": import_ms <= budget_ms and not leaked,
+            })
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-scale", type=float, default=1.0, help="Multiply every import budget by this factor.")
+    parser.add_argument("--json", action="store_true", help="Print machine-readable results.")
+    args = parser.parse_args()
+
+    results = measure_commands(args.runs, args.budget_scale)
+    failed = not all(r["ok"] for r in results)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for r in results:
+            status = "ok" if r["ok"] else "FAIL"
+            print(f"{r['command']:<14} wall {r['wall_ms']:8.1f} ms  imports {r['import_ms']:8.1f} ms "
+                  f"(budget {r['budget_ms']:.0f} ms)  {status}")
+            if r["forbidden_imports"]:
+                print(f"  unexpected imports: {', '.join(r['forbidden_imports'])}")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,129 @@
+"""
+Latency of add/get/update/delete/ls per storage backend and vault size.
+
+Each operation goes through rune.internal exactly as a CLI command would (a fresh
+storage manager per call, so per-command costs like loading an index are included),
+against a synthetic vault without encryption so that key derivation does not drown
+out storage costs (see kdf.py for those).
+
+    python benchmarks/storage.py [--backends local,local-binary,sqlite,journal] [--secrets 1,100,1k,10k] [--fields 5] [--repeat 5] [--json]
+"""
+import argparse
+import itertools
+import json
+import os
+import random
+import sys
+import tempfile
+from typing import Dict, List
+
+if __package__ in (None, ""):
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from benchmarks import common  # noqa: E402
+from benchmarks.vaults import BACKENDS, build_vault, secret_name  # noqa: E402
+
+from rune.internal.add import add_secret  # noqa: E402
+from rune.internal.delete import delete_secret  # noqa: E402
+from rune.internal.get import get_secret  # noqa: E402
+from rune.internal.listsecrets import list_secret_names  # noqa: E402
+from rune.internal.update import update_secret  # noqa: E402
+from rune.utils.settings import invalidate_settings  # noqa: E402
+
+OPERATIONS = ("add", "get", "update", "delete", "ls")
+EXTENSIONS = {"local": ".json", "local-binary": ".vault", "sqlite": ".db", "journal": ".journal"}
+
+
+def configure(backend: str, path: str, config_dir: str) -> None:
+    os.environ.update({
+        "RUNE_STORAGE_MODE": backend.removesuffix("-binary"),
+        "RUNE_STORAGE_ENCODING": "binary" if backend.endswith("-binary") else "json",
+        "RUNE_ENCRYPTION": "no-encryption",
+        "RUNE_SECRETS_FILE": path,
+        "RUNE_CONFIG_DIR": config_dir,
+        "RUNE_NO_AGENT": "1",
+    })
+    invalidate_settings()
+
+
+def split(full_name: str):
+    namespace, _, name = full_name.rpartition("/")
+    return name, namespace
+
+
+def expect(result) -> None:
+    if result.is_failure():
+        raise RuntimeError(result.failure_reason())
+
+
+def bench_backend(backend: str, count: int, fields: int, repeat: int, seed: int = 0) -> List[Dict]:
+    """
+    Builds a vault of `count` secrets for `backend` and times each operation `repeat` times.
+    """
+    rng = random.Random(seed)
+    values = {f"field{f}": "x" * 32 for f in range(fields)}
+    added = (f"bench/added/secret-{i}" for i in itertools.count())
+    to_delete: List[str] = []
+
+    def existing():
+        return split(secret_name(rng.randrange(count)))
+
+    def add():
+        full_name = next(added)
+        name, namespace = split(full_name)
+        expect(add_secret(name, values, "", namespace))
+        to_delete.append(full_name)
+
+    def get():
+        name, namespace = existing()
+        expect(get_secret(name, "", namespace))
+
+    def update():
+        name, namespace = existing()
+        expect(update_secret(name, {"field0": "y"}, "", namespace))
+
+    def delete():
+        name, namespace = split(to_delete.pop())
+        expect(delete_secret(name, namespace))
+
+    def ls():
+        expect(list_secret_names())
+
+    operations = {"add": add, "get": get, "update": update, "delete": delete, "ls": ls}
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "vault" + EXTENSIONS[backend])
+        build_vault(backend, path, count, fields, seed=seed)
+        configure(backend, path, directory)
+        # Builds the indexes the commands rely on, like the first command after a write would.
+        ls()
+        for operation in OPERATIONS:
+            stats = common.measure(operations[operation], repeat)
+            results.append({"backend": backend, "secrets": count, "fields": fields, "operation": operation, **stats})
+    return results
+
+
+def run(backends: List[str], counts: List[int], fields: int, repeat: int) -> List[Dict]:
+    return [r for backend in backends for count in counts for r in bench_backend(backend, count, fields, repeat)]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", default=",".join(BACKENDS))
+    parser.add_argument("--secrets", default="1,100,1k,10k", help="Comma-separated vault sizes, up to 100k.")
+    parser.add_argument("--fields", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", action="store_true", help="Print machine-readable results.")
+    args = parser.parse_args()
+
+    results = run(args.backends.split(","), common.parse_counts(args.secrets), args.fields, args.repeat)
+    if args.json:
+        print(json.dumps({"meta": common.metadata(), "results": results}, indent=2))
+    else:
+        print(f"{'backend':<12} {'secrets':>8} {'operation':<9} {'median':>10} {'p95':>10}")
+        for r in results:
+            print(f"{r['backend']:<12} {r['secrets']:>8} {r['operation']:<9} {r['median_ms']:>8.2f}ms {r['p95_ms']:>8.2f}ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,122 @@
+"""
+Synthetic vaults for benchmarking.
+
+Secrets get realistic names (`team3/prod/service-17`), tags and metadata, and
+`fields` fields each. Without `--encrypted` field values are stored in the clear
+(no-encryption), so storage benchmarks measure storage alone; with it they are
+sealed with AES-GCM under a deliberately cheap KDF, giving the real on-disk layout
+without paying a full key derivation per secret.
+
+    python benchmarks/vaults.py PATH [--backend local|local-binary|sqlite|journal] [--secrets 10k] [--fields 5] [--encrypted]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from typing import Iterator, List
+
+if __package__ in (None, ""):
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from benchmarks import common  # noqa: E402
+
+from rune.encryption.base import Encrypter  # noqa: E402
+from rune.encryption.noencryption import NoEncryption  # noqa: E402
+from rune.models.secret import Secret  # noqa: E402
+from rune.storage.base import StorageManager  # noqa: E402
+
+BACKENDS = ("local", "local-binary", "sqlite", "journal")
+KEY = "benchmark-key"
+ENVIRONMENTS = ("prod", "staging", "dev")
+TAGS = ("database", "api", "payments", "internal", "legacy", "critical")
+# Secrets stored per batched write while building a vault.
+BUILD_BATCH = 5000
+
+
+def cheap_encrypter() -> Encrypter:
+    from rune.encryption.aesgcm import AESGCMEncrypter
+    from rune.encryption.kdf import Pbkdf2
+    return AESGCMEncrypter(kdf=Pbkdf2(iterations=1000))
+
+
+def secret_name(index: int) -> str:
+    return f"team{index % 50}/{ENVIRONMENTS[index % 3]}/service-{index}"
+
+
+def synthetic_secrets(count: int, fields: int, seed: int = 0, encrypter: Encrypter | None = None) -> Iterator[Secret]:
+    """
+    Yields `count` distinct secrets with `fields` fields each, reproducibly for a given seed.
+    """
+    encrypter = encrypter or NoEncryption()
+    rng = random.Random(seed)
+    for index in range(count):
+        namespace, _, name = secret_name(index).rpartition("/")
+        values = {f"field{f}": f"{rng.getrandbits(128):032x}" for f in range(fields)}
+        yield Secret(
+            name=name,
+            namespace=namespace,
+            algorithm=encrypter._encryption_algorithm,
+            fields=encrypter.encrypt_fields(values, KEY),
+            tags=rng.sample(TAGS, 2),
+            metadata={"owner": f"team{index % 50}", "env": ENVIRONMENTS[index % 3]},
+            version=encrypter.envelope_version,
+        )
+
+
+def open_storage(backend: str, path: str) -> StorageManager:
+    match backend:
+        case "local":
+            from rune.storage.local import LocalJsonStorageManager
+            return LocalJsonStorageManager(path)
+        case "local-binary":
+            from rune.storage.localbinary import LocalBinaryStorageManager
+            return LocalBinaryStorageManager(path)
+        case "sqlite":
+            from rune.storage.sqlite import SqliteStorageManager
+            return SqliteStorageManager(path)
+        case "journal":
+            from rune.storage.journal import JournalStorageManager
+            return JournalStorageManager(path)
+        case _:
+            raise ValueError(f"Backend '{backend}' is not supported. Use one of: {', '.join(BACKENDS)}.")
+
+
+def build_vault(backend: str, path: str, count: int, fields: int, encrypted: bool = False, seed: int = 0) -> StorageManager:
+    """
+    Creates a vault at `path` holding `count` synthetic secrets and returns its storage manager.
+    """
+    if backend == "local":
+        with open(path, "w") as f:
+            f.write("{}")
+    storage = open_storage(backend, path)
+    batch: List[Secret] = []
+    for secret in synthetic_secrets(count, fields, seed, cheap_encrypter() if encrypted else None):
+        batch.append(secret)
+        if len(batch) == BUILD_BATCH:
+            storage.store_secrets(batch)
+            batch = []
+    if batch:
+        storage.store_secrets(batch)
+    return storage
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path")
+    parser.add_argument("--backend", default="local", choices=BACKENDS)
+    parser.add_argument("--secrets", default="10k", help="Number of secrets, e.g. 100 or 100k.")
+    parser.add_argument("--fields", type=int, default=5)
+    parser.add_argument("--encrypted", action="store_true", help="Encrypt fields with AES-GCM (cheap KDF).")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    count = common.parse_counts(args.secrets)[0]
+    started = time.perf_counter()
+    build_vault(args.backend, args.path, count, args.fields, args.encrypted, args.seed)
+    print(f"{count} secrets with {args.fields} fields written to {args.path} "
+          f"({os.path.getsize(args.path) / 1e6:.1f} MB) in {time.perf_counter() - started:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
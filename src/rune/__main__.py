@@ -0,0 +1,22 @@
+def main():
+    """
+    Entry point of the `rune` script.
+
+    Shell completion of secret names is answered from the name index before the CLI
+    (typer, rich, the commands) is imported; everything else goes to the typer app.
+    """
+    from rune.utils import profiling
+    from rune.utils.completion import complete_from_cache
+    if complete_from_cache():
+        return
+
+    profiling.enable_from_environment()
+    try:
+        with profiling.span("import rune.cli"):
+            from rune.cli import main as cli_main
+        cli_main()
+    finally:
+        profiling.finish()
+
+if __name__ == "__main__":
+    main()
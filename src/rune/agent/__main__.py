@@ -0,0 +1,18 @@
+import argparse
+
+from rune.agent.server import AgentServer
+from rune.utils.settings import get_agent_socket_path, get_settings
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m rune.agent")
+    parser.add_argument("--socket", default=None)
+    parser.add_argument("--idle-timeout", type=float, default=None)
+    args = parser.parse_args()
+
+    AgentServer(
+        socket_path=args.socket or get_agent_socket_path(),
+        idle_timeout=args.idle_timeout or get_settings().agent.idle_timeout
+    ).serve()
+
+if __name__ == "__main__":
+    main()
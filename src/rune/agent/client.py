@@ -0,0 +1,91 @@
+import os
+import socket
+from typing import Any, Dict, List, Optional
+
+from rune.agent.protocol import VAULT_MISMATCH, decode_result, read_message, write_message
+from rune.exception.agenterror import AgentProtocolError
+from rune.models.result import Failure, Result
+from rune.utils.settings import get_agent_socket_path, get_settings
+from rune.utils.profiling import timed
+
+CONNECT_TIMEOUT_SECONDS = 0.5
+REQUEST_TIMEOUT_SECONDS = 120.0
+
+# Operations on the vault, which the agent only serves for the vault it was started with.
+VAULT_OPS = ("get", "get_many", "add", "unlock")
+
+_enabled = True
+
+def disable() -> None:
+    """
+    Stops this process from delegating to the agent.
+    The agent itself calls this so its own operations run locally.
+    """
+    global _enabled
+    _enabled = False
+
+def is_enabled() -> bool:
+    return _enabled and os.environ.get("RUNE_NO_AGENT", "") in ("", "0")
+
+def vault_identity() -> Dict[str, str]:
+    """
+    The effective settings that decide which vault a request reads or writes, and how.
+    """
+    settings = get_settings()
+    return {
+        "mode": settings.storage.mode,
+        "file": os.path.realpath(settings.storage.file),
+        "encoding": settings.storage.encoding,
+        "encryption": settings.encryption,
+    }
+
+@timed
+def request(op: str, **params: Any) -> Optional[Result[Any]]:
+    """
+    Sends a single request to the running agent.
+
+    Returns None if no agent is reachable, or if it serves another vault than this process
+    is configured for (see `vault_identity`), so callers can fall back to doing the work locally.
+    Once connected, any other failure is reported as a Failure instead.
+    """
+    if not is_enabled():
+        return None
+
+    socket_path = get_agent_socket_path()
+    if not os.path.exists(socket_path):
+        return None
+
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.settimeout(CONNECT_TIMEOUT_SECONDS)
+        try:
+            sock.connect(socket_path)
+        except OSError:
+            return None
+
+        sock.settimeout(REQUEST_TIMEOUT_SECONDS)
+        try:
+            with sock.makefile("rwb") as stream:
+                message = {"op": op, **params}
+                if op in VAULT_OPS:
+                    message["vault"] = vault_identity()
+                write_message(stream, message)
+                response = read_message(stream)
+                if response.get("code") == VAULT_MISMATCH:
+                    return None
+                return decode_result(response)
+        except AgentProtocolError as err:
+            return Failure(f"Agent error: {err.message}")
+        except OSError as err:
+            return Failure(f"Agent error: {err}")
+    finally:
+        sock.close()
+
+def get_secret(name: str, key: str, namespace: str = "") -> Optional[Result[Dict[str, str]]]:
+    return request("get", name=name, key=key, namespace=namespace)
+
+def get_secrets(names: List[str], key: str, prefix: str | None = None) -> Optional[Result[Dict[str, Dict[str, str]]]]:
+    return request("get_many", names=names, key=key, prefix=prefix)
+
+def add_secret(name: str, fields: Dict[str, str], key: str, namespace: str = "") -> Optional[Result[None]]:
+    return request("add", name=name, fields=fields, key=key, namespace=namespace)
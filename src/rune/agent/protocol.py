@@ -0,0 +1,46 @@
+import json
+from typing import Any, BinaryIO, Dict, Optional
+
+from rune.exception.agenterror import AgentProtocolError
+from rune.models.result import Failure, Result, Success
+
+MAX_MESSAGE_SIZE = 16 * 1024 * 1024
+
+# Response code of an agent asked about a vault other than the one it serves.
+VAULT_MISMATCH = "vault_mismatch"
+
+
+def write_message(stream: BinaryIO, message: Dict[str, Any]) -> None:
+    """
+    Writes one newline-delimited JSON message.
+    """
+    stream.write(json.dumps(message, separators=(",", ":")).encode() + b"\n")
+    stream.flush()
+
+def read_message(stream: BinaryIO) -> Dict[str, Any]:
+    """
+    Reads one newline-delimited JSON message.
+
+    Raises AgentProtocolError if the peer hung up or sent something that is not a JSON object.
+    """
+    line = stream.readline(MAX_MESSAGE_SIZE + 1)
+    if not line.endswith(b"\n"):
+        raise AgentProtocolError("Agent message truncated or too large")
+    try:
+        message = json.loads(line)
+    except ValueError:
+        raise AgentProtocolError()
+    if not isinstance(message, dict):
+        raise AgentProtocolError()
+    return message
+
+def encode_result(result: Result[Any]) -> Dict[str, Any]:
+    if result.is_success():
+        return {"ok": True, "value": result.value()}
+    return {"ok": False, "reason": result.failure_reason()}
+
+def decode_result(message: Dict[str, Any]) -> Result[Any]:
+    if message.get("ok"):
+        return Success(message.get("value"))
+    reason: Optional[str] = message.get("reason")
+    return Failure(reason or "Agent request failed")
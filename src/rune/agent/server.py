@@ -0,0 +1,178 @@
+import os
+import socket
+import socketserver
+import struct
+import threading
+import time
+from typing import Any, Dict
+
+from rune.agent import client as AgentClient
+from rune.agent.protocol import VAULT_MISMATCH, encode_result, read_message, write_message
+from rune.encryption.keycache import DerivedKeyCache, install_key_cache, key_cache_stats
+from rune.exception.agenterror import AgentProtocolError
+from rune.internal.add import add_secret
+from rune.internal.get import get_secret
+from rune.internal.getmany import get_secrets
+from rune.internal.listsecrets import list_secrets
+from rune.models.result import Failure, Result, Success
+
+KEY_CACHE_MAX_ENTRIES = 4096
+
+
+class AgentServer:
+    """
+    Serves get/get_many/add requests over a Unix domain socket that only the owning user can reach.
+
+    Derived keys are kept in a process-wide key cache until unused for `idle_timeout` seconds.
+    The agent exits (and zeroes its keys) after `idle_timeout` seconds without requests.
+    """
+
+    def __init__(self, socket_path: str, idle_timeout: float) -> None:
+        self._socket_path = socket_path
+        self._idle_timeout = idle_timeout
+        self._started_at = time.time()
+        self._last_activity = time.monotonic()
+        self._write_lock = threading.Lock()
+        self._server: socketserver.UnixStreamServer | None = None
+
+    def serve(self) -> None:
+        AgentClient.disable()
+        install_key_cache(DerivedKeyCache(max_entries=KEY_CACHE_MAX_ENTRIES, ttl_seconds=self._idle_timeout))
+
+        self._server = self._bind()
+        watchdog = threading.Thread(target=self._shutdown_when_idle, daemon=True)
+        watchdog.start()
+        try:
+            self._server.serve_forever(poll_interval=0.5)
+        finally:
+            self._server.server_close()
+            if os.path.exists(self._socket_path):
+                os.unlink(self._socket_path)
+            install_key_cache(None)
+
+    def stop(self) -> None:
+        if self._server is not None:
+            threading.Thread(target=self._server.shutdown, daemon=True).start()
+
+    def respond(self, message: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Answers a request, refusing vault operations sent for a different vault than the one
+        this agent is configured for (clients then do the work themselves).
+        """
+        if message.get("op") in AgentClient.VAULT_OPS and message.get("vault") != AgentClient.vault_identity():
+            return {"ok": False, "code": VAULT_MISMATCH, "reason": "The agent serves another vault."}
+        return encode_result(self.dispatch(message))
+
+    def dispatch(self, message: Dict[str, Any]) -> Result[Any]:
+        self._last_activity = time.monotonic()
+        try:
+            match message.get("op"):
+                case "get":
+                    return get_secret(message["name"], message["key"], message.get("namespace", ""))
+                case "get_many":
+                    return get_secrets(message["names"], message["key"], message.get("prefix"))
+                case "add":
+                    with self._write_lock:
+                        return add_secret(message["name"], message["fields"], message["key"], message.get("namespace", ""))
+                case "unlock":
+                    return self._unlock(message["key"])
+                case "status":
+                    return Success(self._status())
+                case "stop":
+                    self.stop()
+                    return Success()
+                case op:
+                    return Failure(f"Unsupported agent operation '{op}'.")
+        except KeyError as err:
+            return Failure(f"Malformed agent request: missing {err}.")
+
+    def _unlock(self, key: str) -> Result[int]:
+        """
+        Derives (and caches) the keys of every secret that opens with the provided key.
+        """
+        result = list_secrets()
+        if result.is_failure():
+            return Failure(result.failure_reason() or "Unable to list secrets.")
+
+        unlocked = 0
+        for secret in result.value() or []:
+            if get_secret(secret.name, key, secret.namespace).is_success():
+                unlocked += 1
+        return Success(unlocked)
+
+    def _status(self) -> Dict[str, Any]:
+        stats = key_cache_stats()
+        return {
+            "pid": os.getpid(),
+            "socket": self._socket_path,
+            "started_at": self._started_at,
+            "idle_timeout": self._idle_timeout,
+            "idle_seconds": time.monotonic() - self._last_activity,
+            "key_cache_hits": stats.hits if stats else 0,
+            "key_cache_misses": stats.misses if stats else 0,
+            "kdf_seconds_saved": stats.saved_seconds if stats else 0.0,
+        }
+
+    def _shutdown_when_idle(self) -> None:
+        while True:
+            time.sleep(min(1.0, self._idle_timeout))
+            if time.monotonic() - self._last_activity >= self._idle_timeout:
+                self.stop()
+                return
+
+    def _bind(self) -> socketserver.UnixStreamServer:
+        socket_dir = os.path.dirname(self._socket_path)
+        os.makedirs(socket_dir, mode=0o700, exist_ok=True)
+        if os.stat(socket_dir).st_uid != os.getuid():
+            raise PermissionError(f"Agent socket directory {socket_dir} is not owned by the current user")
+        os.chmod(socket_dir, 0o700)
+
+        if os.path.exists(self._socket_path):
+            if _is_listening(self._socket_path):
+                raise RuntimeError(f"An agent is already listening on {self._socket_path}")
+            os.unlink(self._socket_path)
+
+        agent = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self) -> None:
+                if not _peer_is_owner(self.connection):
+                    return
+                try:
+                    message = read_message(self.rfile)
+                except AgentProtocolError as err:
+                    write_message(self.wfile, encode_result(Failure(err.message)))
+                    return
+                write_message(self.wfile, agent.respond(message))
+
+        old_umask = os.umask(0o177)
+        try:
+            server = socketserver.ThreadingUnixStreamServer(self._socket_path, Handler)
+        finally:
+            os.umask(old_umask)
+        server.daemon_threads = True
+        os.chmod(self._socket_path, 0o600)
+        return server
+
+
+def _peer_is_owner(connection: socket.socket) -> bool:
+    """
+    Rejects connections from other users where the platform exposes peer credentials.
+    Elsewhere the 0600 socket inside a 0700 directory is the only gate.
+    """
+    if not hasattr(socket, "SO_PEERCRED"):
+        return True
+    credentials = connection.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize("3i"))
+    _, uid, _ = struct.unpack("3i", credentials)
+    return uid == os.getuid()
+
+def _is_listening(socket_path: str) -> bool:
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.settimeout(AgentClient.CONNECT_TIMEOUT_SECONDS)
+        probe.connect(socket_path)
+        return True
+    except OSError:
+        return False
+    finally:
+        probe.close()
@@ -1,13 +1,8 @@
-from typing import Annotated, Optional
+from typing import Annotated, List, Optional
 import typer
 
-from rune.commands.addcmd import handle_add_cmd
-from rune.commands.getcmd import handle_get_command
-from rune.commands.updatecmd import handle_update_command
-from rune.commands.deletecmd import handle_delete_command
-from rune.commands.listcmd import handle_ls_command
-
-from rune.utils.settings import ensure_secrets_exist, ensure_settings_exist
+# Command handlers are imported inside each command so that a command (or --help)
+# only pays for the modules it actually uses (rich, pyperclip, cryptography, ...).
 
 app = typer.Typer(context_settings={"help_option_names": ["-h", "--help"]})
 
@@ -23,6 +18,47 @@ FIELDS_HELP = (
 
 KEY_HELP = "Encryption key (if omitted, will be securely prompted)."
 
+MANY_HELP = "Secrets to print at once, comma-separated full names (e.g. `db/prod/mydb,github/personal`)."
+
+PREFIX_HELP = "Print every secret under this namespace (e.g. `db/prod`)."
+
+FORMAT_HELP = "Output format for --many/--prefix: `dotenv`, `json` or `export`."
+
+def complete_name(incomplete: str):
+    from rune.commands.searchcmd import complete_secret_name
+    return complete_secret_name(incomplete)
+
+agent_app = typer.Typer(help="Run a background agent that caches derived keys in memory.")
+app.add_typer(agent_app, name="agent")
+
+bench_app = typer.Typer(help="Measure rune on this machine.")
+app.add_typer(bench_app, name="bench")
+
+PROFILE_HELP = "Print how long each phase of the command took (also RUNE_PROFILE=1)."
+
+@app.callback()
+def prepare(
+    ctx: typer.Context,
+    profile: Annotated[bool, typer.Option("--profile", help=PROFILE_HELP)] = False,
+    profile_json: Annotated[Optional[str], typer.Option("--profile-json", help="Write the phase breakdown to this file as JSON instead.", metavar="FILE")] = None,
+    cprofile: Annotated[Optional[str], typer.Option("--cprofile", help="Also dump cProfile stats of the command to this file.", metavar="FILE")] = None,
+):
+    """
+    Rune is a cli credential manager for developers.
+    """
+    # Runs before any command, but not for --help.
+    from rune.utils import profiling
+    if profile or profile_json or cprofile:
+        profiling.enable(profile_json, cprofile)
+    if profiling.enabled():
+        command = profiling.span(f"command {ctx.invoked_subcommand}")
+        command.__enter__()
+        ctx.call_on_close(lambda: (command.__exit__(None, None, None), profiling.finish()))
+
+    from rune.utils.settings import ensure_secrets_exist, ensure_settings_exist
+    ensure_settings_exist()
+    ensure_secrets_exist()
+
 @app.command()
 def add(
     _fields: Annotated[str, typer.Option("--fields", "-f", help=FIELDS_HELP)],
@@ -32,40 +68,55 @@ def add(
     """
     Add a secret to the rune vault.
     """
+    from rune.commands.addcmd import handle_add_cmd
     handle_add_cmd(_fields, _name, _key)
     
 @app.command()
 def delete(
-    _name: Annotated[Optional[str], typer.Option("--name", "-n", help=NAME_HELP)] = None
+    _name: Annotated[Optional[str], typer.Option("--name", "-n", help=NAME_HELP, autocompletion=complete_name)] = None
 ):
     """
     Removes a secret from the rune vault.
     """
+    from rune.commands.deletecmd import handle_delete_command
     handle_delete_command(_name)
     
 @app.command()
 def update(
     _fields: Annotated[str, typer.Option("--fields", "-f", help=FIELDS_HELP)],
-    _name: Annotated[Optional[str], typer.Option("--name", "-n", help=NAME_HELP)] = None,
+    _name: Annotated[Optional[str], typer.Option("--name", "-n", help=NAME_HELP, autocompletion=complete_name)] = None,
     _key: Annotated[Optional[str], typer.Option("--key", "-k", help=KEY_HELP)] = None,
 ):
     """
     Update an existing secret in the rune vault.
     """
+    from rune.commands.updatecmd import handle_update_command
     handle_update_command(_fields, _name, _key)
 
 @app.command()
 def get(
-    _name: Annotated[Optional[str], typer.Option("--name", "-n", help=NAME_HELP)] = None,
+    _name: Annotated[Optional[str], typer.Option("--name", "-n", help=NAME_HELP, autocompletion=complete_name)] = None,
     _key: Annotated[Optional[str], typer.Option("--key", "-k", help=KEY_HELP)] = None,
     show: Annotated[bool, typer.Option("--show","-s",help="Show the secret values instead of hiding them.")] = False,
+    many: Annotated[Optional[str], typer.Option("--many", "-m", help=MANY_HELP)] = None,
+    prefix: Annotated[Optional[str], typer.Option("--prefix", "-p", help=PREFIX_HELP)] = None,
+    output_format: Annotated[str, typer.Option("--format", "-o", help=FORMAT_HELP)] = "dotenv",
 ):
     """
     Retrieve a secret from the rune vault.
 
     Copies the selected field to clipboard.
     Use --show to display field values in the terminal.
+
+    With --many and/or --prefix, prints every field of the selected secrets
+    to stdout instead (as dotenv, json or export lines), e.g. for CI jobs.
     """
+    if many is not None or prefix is not None:
+        from rune.commands.getmanycmd import handle_get_many_command
+        handle_get_many_command(many, prefix, _key, output_format)
+        return
+
+    from rune.commands.getcmd import handle_get_command
     handle_get_command(_name, _key, show)
 
 @app.command(name="ls")
@@ -77,16 +128,164 @@ def list_entries(
         "-i",
         help="Interactively select and retrieve secrets from the list.",
     ),
-] = False
+] = False,
+    prefix: Annotated[str, typer.Argument(help="Only list secrets under this namespace (e.g. `db/prod`).")] = "",
+    limit: Annotated[Optional[int], typer.Option("--limit", "-l", help="Show at most this many secrets.")] = None,
+    offset: Annotated[int, typer.Option("--offset", help="Skip this many secrets (for paging with --limit).")] = 0,
+    long: Annotated[bool, typer.Option("--long", "-L", help="Also show tags and last update of each secret.")] = False,
 ):
     """
     Lists all secrets in the rune vault, organized by namespace.
     Collapses single-child namespaces for cleaner display.
     """
-    handle_ls_command(interactive)
+    from rune.commands.listcmd import handle_ls_command
+    handle_ls_command(interactive, prefix, offset, limit, long)
+
+@app.command()
+def search(
+    query: Annotated[str, typer.Argument(help="Part of a secret name, typos allowed (e.g. `prodmydb`).")],
+    limit: Annotated[int, typer.Option("--limit", "-l", help="Show at most this many matches.")] = 10,
+    interactive: Annotated[bool, typer.Option("--interactive", "-i", help="Select a match and retrieve it.")] = False,
+):
+    """
+    Fuzzy search secret names, best matches first.
+    """
+    from rune.commands.searchcmd import handle_search_command
+    handle_search_command(query, limit, interactive)
+
+@app.command()
+def find(
+    tags: Annotated[Optional[List[str]], typer.Option("--tag", "-t", help="Only secrets with this tag. Repeat to require several.")] = None,
+    meta: Annotated[Optional[List[str]], typer.Option("--meta", "-m", help="Only secrets with this metadata, as key=value. Repeatable.")] = None,
+):
+    """
+    Find secrets by tag and metadata.
+
+    Lists the secrets matching every filter, e.g. `rune find --tag prod --meta owner=payments`.
+    """
+    from rune.commands.findcmd import handle_find_command
+    handle_find_command(tags or [], meta or [])
+
+@app.command(name="import")
+def import_entries(
+    path: Annotated[str, typer.Argument(help="File to import, or `-` for stdin.")],
+    input_format: Annotated[Optional[str], typer.Option("--format", "-o", help="`json`, `csv` or `dotenv`. Guessed from the file extension if omitted.")] = None,
+    _name: Annotated[Optional[str], typer.Option("--name", "-n", help="For dotenv files: the secret to store the variables in, as its fields.")] = None,
+    overwrite: Annotated[bool, typer.Option("--overwrite", help="Replace the fields of secrets that already exist.")] = False,
+    _key: Annotated[Optional[str], typer.Option("--key", "-k", help=KEY_HELP)] = None,
+):
+    """
+    Import secrets from a JSON, CSV or dotenv file.
+
+    JSON maps full names to fields (`{"db/prod/mydb": {"host": "..."}}`), CSV has
+    `name,field,value` rows. Every secret is stored in one write.
+    """
+    from rune.commands.transfercmd import handle_import_command
+    handle_import_command(path, input_format, _name, overwrite, _key)
+
+@app.command()
+def export(
+    path: Annotated[Optional[str], typer.Argument(help="File to write. Prints to stdout if omitted.")] = None,
+    output_format: Annotated[Optional[str], typer.Option("--format", "-o", help="`json`, `csv` or `dotenv`. Guessed from the file extension if omitted.")] = None,
+    prefix: Annotated[str, typer.Option("--prefix", "-p", help="Only export secrets under this namespace (e.g. `db/prod`).")] = "",
+    _key: Annotated[Optional[str], typer.Option("--key", "-k", help=KEY_HELP)] = None,
+):
+    """
+    Export decrypted secrets as JSON, CSV or dotenv.
+
+    JSON and CSV exports can be imported back with `rune import`.
+    """
+    from rune.commands.transfercmd import handle_export_command
+    handle_export_command(path, output_format, prefix, _key)
+
+@app.command()
+def rekey(
+    _old_key: Annotated[Optional[str], typer.Option("--old-key", help="Current encryption key (if omitted, will be securely prompted).")] = None,
+    _new_key: Annotated[Optional[str], typer.Option("--new-key", help="New encryption key (if omitted, will be securely prompted).")] = None,
+):
+    """
+    Re-encrypt every secret with a new key.
+
+    All secrets are re-encrypted in one atomic write: if anything fails
+    or the command is interrupted, the vault is left unchanged.
+    """
+    from rune.commands.rekeycmd import handle_rekey_command
+    handle_rekey_command(_old_key, _new_key)
+
+@app.command()
+def migrate(
+    to: Annotated[str, typer.Option("--to", help="Encryption to move every secret to: `aesgcm` or `no-encryption`.")],
+    _key: Annotated[Optional[str], typer.Option("--key", "-k", help=KEY_HELP)] = None,
+):
+    """
+    Re-encrypt every secret with another encryption mode, and use it for new secrets.
+
+    Secrets already using it are kept as they are. All secrets are rewritten
+    in one atomic write, so an interrupted migration leaves the vault unchanged.
+    """
+    from rune.commands.rekeycmd import handle_migrate_command
+    handle_migrate_command(to, _key)
+
+@app.command()
+def convert(
+    to: Annotated[str, typer.Option("--to", help="Encoding to store the vault in: `json` or `binary`.")],
+    _file: Annotated[Optional[str], typer.Option("--file", "-f", help="Where to write a converted local vault (default: next to it, as .json or .vault).")] = None,
+):
+    """
+    Convert the vault to another storage encoding, and use it from now on.
+
+    A local vault is copied into a new file, leaving the original untouched;
+    SQLite and journal vaults are rewritten in place in one atomic write.
+    """
+    from rune.commands.convertcmd import handle_convert_command
+    handle_convert_command(to, _file)
+
+@agent_app.command("start")
+def agent_start(
+    idle_timeout: Annotated[Optional[float], typer.Option("--idle-timeout", "-t", help="Seconds without requests before the agent exits.")] = None,
+    _key: Annotated[Optional[str], typer.Option("--key", "-k", help="Derive the keys of every secret that opens with this key right away.")] = None,
+    foreground: Annotated[bool, typer.Option("--foreground", help="Run the agent in this terminal instead of in the background.")] = False,
+):
+    """
+    Start the rune agent.
+
+    While it runs, get and add are served by the agent. They still send it your key
+    with every request; the agent keeps only the keys derived from it, so each is derived once.
+    """
+    from rune.commands.agentcmd import handle_agent_start
+    handle_agent_start(idle_timeout, _key, foreground)
+
+@agent_app.command("stop")
+def agent_stop():
+    """
+    Stop the rune agent and wipe its keys.
+    """
+    from rune.commands.agentcmd import handle_agent_stop
+    handle_agent_stop()
+
+@agent_app.command("status")
+def agent_status():
+    """
+    Show whether the rune agent is running.
+    """
+    from rune.commands.agentcmd import handle_agent_status
+    handle_agent_status()
+
+@bench_app.command("kdf")
+def bench_kdf(
+    kdf: Annotated[Optional[str], typer.Option("--kdf", help="Key derivation function to calibrate: `pbkdf2-sha256`, `scrypt` or `argon2id`. Defaults to the configured one.")] = None,
+    target_ms: Annotated[float, typer.Option("--target-ms", "-t", help="How long unlocking a secret should take, in milliseconds.")] = 500,
+    save: Annotated[bool, typer.Option("--save", help="Use the calibrated parameters for new secrets.")] = False,
+):
+    """
+    Calibrate key derivation cost to a target unlock time.
+
+    Measures the key derivation function on this machine and scales its
+    work factor until deriving one key takes about --target-ms.
+    """
+    from rune.commands.benchcmd import handle_bench_kdf_command
+    handle_bench_kdf_command(kdf, target_ms, save)
 
 def main():
-    ensure_settings_exist()
-    ensure_secrets_exist()
     app()
 
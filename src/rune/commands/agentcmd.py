@@ -0,0 +1,81 @@
+import subprocess
+import sys
+import time
+
+from rich.console import Console
+from rich.panel import Panel
+
+from rune.agent import client as AgentClient
+from rune.utils.settings import get_agent_socket_path, get_settings
+from rune.utils.profiling import timed
+
+console = Console()
+
+START_WAIT_SECONDS = 5.0
+
+@timed
+def handle_agent_start(idle_timeout: float | None = None, _key: str | None = None, foreground: bool = False):
+    socket_path = get_agent_socket_path()
+    timeout = idle_timeout or get_settings().agent.idle_timeout
+
+    if AgentClient.request("status") is not None:
+        console.print(Panel.fit(f"Agent already running on [cyan]{socket_path}[/]", title="[yellow]Running[/]"))
+        return
+
+    if foreground:
+        from rune.agent.server import AgentServer
+        console.print(f"rune agent listening on {socket_path} (idle timeout {timeout:g}s)")
+        AgentServer(socket_path, timeout).serve()
+        return
+
+    subprocess.Popen(
+        [sys.executable, "-m", "rune.agent", "--socket", socket_path, "--idle-timeout", str(timeout)],
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+
+    deadline = time.monotonic() + START_WAIT_SECONDS
+    while AgentClient.request("status") is None:
+        if time.monotonic() > deadline:
+            console.print(Panel.fit("[bold red]Error:[/] Agent did not start in time", title="[red]Failed[/]"))
+            return
+        time.sleep(0.05)
+
+    message = f"[bold green]✓ Agent started[/] on [cyan]{socket_path}[/]"
+    if _key is not None:
+        result = AgentClient.request("unlock", key=_key)
+        if result is not None and result.is_success():
+            message += f"\nUnlocked {result.value()} secret(s)"
+
+    console.print(Panel.fit(message, title="[green]Success[/]"))
+
+@timed
+def handle_agent_stop():
+    result = AgentClient.request("stop")
+    if result is None:
+        console.print(Panel.fit("No agent is running.", title="[yellow]Stopped[/]"))
+    elif result.is_success():
+        console.print(Panel.fit("[bold green]✓ Agent stopped[/]", title="[green]Success[/]"))
+    else:
+        console.print(Panel.fit(f"[bold red]Error:[/] {result.failure_reason()}", title="[red]Failed[/]"))
+
+@timed
+def handle_agent_status():
+    result = AgentClient.request("status")
+    v = result.value() if result is not None else None
+    if v is None:
+        console.print(Panel.fit("No agent is running.", title="[yellow]Stopped[/]"))
+        return
+
+    console.print(
+        Panel.fit(
+            f"pid: {v['pid']}\n"
+            f"socket: {v['socket']}\n"
+            f"idle: {v['idle_seconds']:.0f}s of {v['idle_timeout']:g}s\n"
+            f"key cache: {v['key_cache_hits']} hits, {v['key_cache_misses']} misses, "
+            f"~{v['kdf_seconds_saved']:.1f}s of key derivation saved",
+            title="[green]Running[/]",
+        )
+    )
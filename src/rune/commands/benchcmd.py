@@ -0,0 +1,33 @@
+import json
+from typing import Optional
+import typer
+from rich.console import Console
+from rich.panel import Panel
+
+from rune.internal.bench import calibrate_kdf
+from rune.utils.settings import update_settings
+from rune.utils.profiling import timed
+
+console = Console()
+
+@timed
+def handle_bench_kdf_command(name: Optional[str], target_ms: float, save: bool = False):
+    result = calibrate_kdf(name, target_ms)
+    calibrated = result.value()
+    if result.is_failure() or calibrated is None:
+        console.print(Panel.fit(f"[bold red]Error:[/] {result.failure_reason()}", title="[red]Failed[/]"))
+        raise typer.Exit(1)
+
+    kdf, elapsed_ms = calibrated
+    snippet = json.dumps({"kdf": kdf.to_dict()}, indent=4)
+    console.print(Panel.fit(
+        f"[cyan]{kdf.name}[/] takes [bold]{elapsed_ms:.0f} ms[/] per unlock (target {target_ms:g} ms)\n\n{snippet}",
+        title="[green]Calibrated[/]"
+    ))
+
+    if save:
+        saved = update_settings(kdf=kdf.to_dict())
+        console.print(saved.value() if saved.is_success() else saved.failure_reason())
+        console.print("New secrets use these parameters; existing secrets keep the ones they were encrypted with.")
+    else:
+        console.print("Add this to settings.json (or pass --save) to use it for new secrets.")
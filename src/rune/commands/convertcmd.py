@@ -0,0 +1,26 @@
+from typing import Optional
+import typer
+from rich.console import Console
+from rich.panel import Panel
+
+from rune.internal.convert import convert_vault
+from rune.utils.settings import get_configured_storage_manager_identifier, update_settings
+from rune.utils.profiling import timed
+
+console = Console()
+
+@timed
+def handle_convert_command(encoding: str, _file: Optional[str] = None):
+    result = convert_vault(encoding, _file)
+    path = result.value()
+    if result.is_failure() or path is None:
+        console.print(Panel.fit(f"[bold red]Error:[/] {result.failure_reason()}", title="[red]Failed[/]"))
+        raise typer.Exit(1)
+
+    if get_configured_storage_manager_identifier() == "local":
+        update_settings(storage_file=path, storage_encoding=encoding)
+        console.print(Panel.fit(f"[bold green]✓ Converted[/] the vault to {encoding} at [cyan]{path}[/]", title="[green]Success[/]"))
+        console.print("The previous vault was left as it is; delete it once you no longer need it.")
+    else:
+        update_settings(storage_encoding=encoding)
+        console.print(Panel.fit(f"[bold green]✓ Rewrote[/] every secret in [cyan]{path}[/] as {encoding}", title="[green]Success[/]"))
@@ -3,9 +3,11 @@ from rich.panel import Panel
 
 from rune.internal.delete import delete_secret
 from rune.utils.input import input_name, split_name_and_ns
+from rune.utils.profiling import timed
 
 console = Console()
 
+@timed
 def handle_delete_command(_name: str | None = None) -> None:
     name, namespace = split_name_and_ns(_name or input_name())
     result = delete_secret(name, namespace)
@@ -0,0 +1,26 @@
+from typing import Dict, List
+import typer
+
+from rune.internal.find import find_secret_names
+from rune.utils.profiling import timed
+
+@timed
+def handle_find_command(tags: List[str], meta: List[str]):
+    metadata: Dict[str, str] = {}
+    for pair in meta:
+        key, sep, value = pair.partition("=")
+        if not sep or not key:
+            print(f"Invalid metadata filter '{pair}', expected key=value.")
+            raise typer.Exit(1)
+        metadata[key] = value
+
+    result = find_secret_names(tags, metadata)
+    names = result.value()
+    if result.is_failure() or names is None:
+        print(f"Unable to retreive secrets. Cause: {result.failure_reason()}")
+        raise typer.Exit(1)
+
+    if len(names) == 0:
+        print("No matching secrets.")
+    for i, name in enumerate(names, 1):
+        print(f"[{i}] {name}")
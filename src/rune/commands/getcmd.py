@@ -6,9 +6,11 @@ import pyperclip
 
 from rune.internal.get import get_secret
 from rune.utils.input import input_key, input_name, split_name_and_ns
+from rune.utils.profiling import span, timed
 
 console = Console()
 
+@timed
 def handle_get_command(_name: str | None = None, _key: str | None = None, show: bool = False):
     name, namespace = split_name_and_ns(_name or input_name())
     key = (_key or input_key())
@@ -41,16 +43,18 @@ def handle_get_command(_name: str | None = None, _key: str | None = None, show:
     keys = list(v.keys())
 
     while True:
-        choice = Prompt.ask(
-            "[cyan]Select field to copy[/] (q to cancel)",
-        )
+        with span("prompt field choice"):
+            choice = Prompt.ask(
+                "[cyan]Select field to copy[/] (q to cancel)",
+            )
         if choice.lower() == "q":
             break
         try:
             index = int(choice) - 1
             if 0 <= index < len(keys):
                 selected_key = keys[index]
-                pyperclip.copy(v[selected_key])
+                with span("clipboard copy"):
+                    pyperclip.copy(v[selected_key])
                 console.print(
                     Panel.fit(
                         f"[bold green]✓ Copied[/] [yellow]{selected_key}[/] to clipboard",
@@ -0,0 +1,36 @@
+import typer
+from rich.console import Console
+from rich.panel import Panel
+
+from rune.internal.getmany import get_secrets
+from rune.utils.envformat import format_secrets
+from rune.utils.input import input_key
+from rune.utils.profiling import timed
+
+console = Console(stderr=True)
+
+@timed
+def handle_get_many_command(_names: str | None, prefix: str | None, _key: str | None, output_format: str):
+    names = [n.strip() for n in (_names or "").split(",") if n.strip()]
+    key = (_key or input_key())
+
+    result = get_secrets(names, key, prefix)
+
+    v = result.value()
+    if not (result.is_success() and v is not None):
+        console.print(
+            Panel.fit(
+                f"[bold red]Error:[/] {result.failure_reason()}",
+                title="[red]Failed[/]",
+            )
+        )
+        raise typer.Exit(1)
+
+    try:
+        output = format_secrets(v, output_format)
+    except ValueError as err:
+        console.print(Panel.fit(f"[bold red]Error:[/] {err}", title="[red]Failed[/]"))
+        raise typer.Exit(1)
+
+    if output:
+        print(output)
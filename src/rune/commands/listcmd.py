@@ -1,34 +1,45 @@
+from typing import List, Tuple
 import typer
 
-from rune.commands.getcmd import handle_get_command
-from rune.internal.listsecrets import list_secrets
-from rune.utils.input import split_name_and_ns
+from rune.internal.listsecrets import list_secret_headers, list_secret_names
+from rune.models.result import Result, Success
+from rune.utils.profiling import timed
 
-def handle_ls_command(interactive: bool):
-    result = list_secrets()
+@timed
+def handle_ls_command(interactive: bool, prefix: str = "", offset: int = 0, limit: int | None = None, long: bool = False):
+    # Fetch one extra entry to know whether there is another page.
+    page_size = None if limit is None else limit + 1
+    if long:
+        result = list_long_entries(prefix, offset, page_size)
+    else:
+        result = list_short_entries(prefix, offset, page_size)
 
     v = result.value()
     if v is not None:
-        names = [secret.full_name for secret in v]
+        entries = v if limit is None else v[:limit]
     else:
-        names = []
+        entries = []
+    names = [name for name, _ in entries]
     if result.is_success() and v is not None:
         if len(names) == 0:
-            print("No secrets yet.")
-        for i, name in enumerate(names, 1):
-            print(f"[{i}] {name}")
+            print("No secrets yet." if prefix == "" and offset == 0 else "No matching secrets.")
+        for i, (name, details) in enumerate(entries, offset + 1):
+            print(f"[{i}] {name}{details}")
+        if limit is not None and len(v) > limit:
+            print(f"... more secrets available, use --offset {offset + limit} to see the next page.")
 
     else:
         print(f"Unable to retreive secrets. Cause: {result.failure_reason()}")
 
 
     if interactive:
+        from rune.commands.getcmd import handle_get_command
         while True:
             try:
                 choice = typer.prompt("Select field to get (q to quit)")
                 if choice == "q" or choice == "Q":
                     break
-                choice = int(choice) - 1
+                choice = int(choice) - 1 - offset
                 if 0 <= choice < len(names):
                     selected = names[choice]
                     handle_get_command(_name=selected)
@@ -36,4 +47,28 @@ def handle_ls_command(interactive: bool):
             except:
                 pass
 
+def list_short_entries(prefix: str, offset: int, limit: int | None) -> Result[List[Tuple[str, str]]]:
+    result = list_secret_names(prefix, offset, limit)
+    names = result.value()
+    if result.is_failure() or names is None:
+        return result
+    return Success([(name, "") for name in names])
+
+def list_long_entries(prefix: str, offset: int, limit: int | None) -> Result[List[Tuple[str, str]]]:
+    """
+    Lists names along with the tags and last update of each secret,
+    read from headers without decoding any fields.
+    """
+    result = list_secret_headers(prefix)
+    headers = result.value()
+    if result.is_failure() or headers is None:
+        return result
 
+    headers = sorted(headers, key=lambda h: h.full_name)
+    page = headers[offset:] if limit is None else headers[offset:offset + limit]
+    entries = []
+    for header in page:
+        updated = header.updated_at.strftime("%Y-%m-%d %H:%M") if header.updated_at else "-"
+        tags = f"  tags: {', '.join(header.tags)}" if header.tags else ""
+        entries.append((header.full_name, f"  (updated {updated}){tags}"))
+    return Success(entries)
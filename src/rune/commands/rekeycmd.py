@@ -0,0 +1,69 @@
+import time
+from typing import Optional
+import typer
+from rich.console import Console
+from rich.panel import Panel
+from rich.progress import BarColumn, MofNCompleteColumn, Progress, TextColumn, TimeElapsedColumn
+from rich.prompt import Prompt
+
+from rune.internal.rekey import reencrypt_secrets
+from rune.storage import factory as StorageManagerFactory
+from rune.utils.input import input_key
+from rune.utils.settings import update_settings
+from rune.utils.profiling import timed
+
+console = Console()
+
+@timed
+def handle_rekey_command(_old_key: Optional[str] = None, _new_key: Optional[str] = None):
+    old_key = _old_key or input_key()
+    new_key = _new_key or input_new_key()
+    run_reencryption(old_key, new_key, None, "Re-keyed")
+
+@timed
+def handle_migrate_command(algorithm: str, _key: Optional[str] = None):
+    key = _key or input_key()
+    if run_reencryption(key, key, algorithm, f"Migrated to {algorithm}"):
+        update_settings(encryption=algorithm)
+        console.print(f"New secrets are now encrypted with [cyan]{algorithm}[/].")
+
+def input_new_key() -> str:
+    new_key = Prompt.ask("New encryption key", password=True)
+    if Prompt.ask("Repeat new encryption key", password=True) != new_key:
+        console.print(Panel.fit("[bold red]Error:[/] The keys do not match.", title="[red]Failed[/]"))
+        raise typer.Exit(1)
+    return new_key
+
+def run_reencryption(old_key: str, new_key: str, algorithm: Optional[str], done_message: str) -> bool:
+    total = len(StorageManagerFactory.get_configured_storage_manager().list_names())
+    started = time.perf_counter()
+    with Progress(
+        TextColumn("Re-encrypting"),
+        BarColumn(),
+        MofNCompleteColumn(),
+        TextColumn("{task.fields[rate]}"),
+        TimeElapsedColumn(),
+        console=console,
+        transient=True,
+    ) as bar:
+        task = bar.add_task("rekey", total=total, rate="")
+
+        def progress(done: int):
+            rate = done / max(time.perf_counter() - started, 1e-6)
+            bar.update(task, completed=done, rate=f"{rate:.1f} secrets/s")
+
+        result = reencrypt_secrets(old_key, new_key, algorithm, progress)
+    elapsed = time.perf_counter() - started
+
+    if result.is_failure():
+        console.print(Panel.fit(f"[bold red]Error:[/] {result.failure_reason()}", title="[red]Failed[/]"))
+        raise typer.Exit(1)
+
+    console.print(
+        Panel.fit(
+            f"[bold green]✓ {done_message}[/] {result.value()} of {total} secret(s) "
+            f"in {elapsed:.1f}s ({total / max(elapsed, 1e-6):.1f} secrets/s)",
+            title="[green]Success[/]",
+        )
+    )
+    return True
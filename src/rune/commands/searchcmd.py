@@ -0,0 +1,38 @@
+from typing import List
+import typer
+
+from rune.internal.search import search_secret_names
+from rune.utils.profiling import timed
+
+@timed
+def handle_search_command(query: str, limit: int, interactive: bool = False):
+    result = search_secret_names(query, limit)
+    names = result.value()
+    if result.is_failure() or names is None:
+        print(f"Unable to retreive secrets. Cause: {result.failure_reason()}")
+        raise typer.Exit(1)
+
+    if len(names) == 0:
+        print("No matching secrets.")
+    for i, name in enumerate(names, 1):
+        print(f"[{i}] {name}")
+
+    if interactive and names:
+        from rune.commands.getcmd import handle_get_command
+        while True:
+            try:
+                choice = typer.prompt("Select secret to get (q to quit)")
+                if choice == "q" or choice == "Q":
+                    break
+                choice = int(choice) - 1
+                if 0 <= choice < len(names):
+                    handle_get_command(_name=names[choice])
+                    break
+            except:
+                pass
+
+def complete_secret_name(incomplete: str) -> List[str]:
+    """
+    Shell completion for secret names: the best fuzzy matches for what was typed so far.
+    """
+    return search_secret_names(incomplete, 20).value() or []
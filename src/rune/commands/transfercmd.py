@@ -0,0 +1,64 @@
+import os
+import sys
+from typing import Optional
+import typer
+from rich.console import Console
+from rich.panel import Panel
+
+from rune.internal.transfer import export_secrets, import_secrets
+from rune.storage.fileio import AtomicFile
+from rune.utils.input import input_key
+from rune.utils.transfer import read_secrets
+from rune.utils.profiling import timed
+
+# Status goes to stderr, so exports can be piped.
+console = Console(stderr=True)
+
+EXTENSION_FORMATS = {".json": "json", ".csv": "csv", ".env": "dotenv"}
+
+@timed
+def handle_import_command(path: str, input_format: Optional[str], name: Optional[str], overwrite: bool, _key: Optional[str] = None):
+    input_format = input_format or guess_format(path)
+    key = (_key or input_key())
+
+    try:
+        f = sys.stdin if path == "-" else open(path, "r", newline="")
+    except OSError as err:
+        fail(f"Could not open '{path}': {err.strerror}")
+    with f:
+        try:
+            entries = read_secrets(f, input_format, name)
+        except ValueError as err:
+            fail(str(err))
+        result = import_secrets(entries, key, overwrite)
+
+    if result.is_failure():
+        fail(result.failure_reason())
+    console.print(Panel.fit(f"[bold green]✓ Imported[/] {result.value()} secret(s)", title="[green]Success[/]"))
+
+@timed
+def handle_export_command(path: Optional[str], output_format: Optional[str], prefix: str, _key: Optional[str] = None):
+    output_format = output_format or (guess_format(path) if path else "json")
+    key = (_key or input_key())
+
+    if path is None or path == "-":
+        result = export_secrets(sys.stdout, output_format, key, prefix)
+    else:
+        # The temp file is only readable by the owner, and is only swapped in once every secret was written.
+        with AtomicFile(path, "w") as out:
+            result = export_secrets(out.file, output_format, key, prefix)
+            if result.is_success():
+                out.commit()
+
+    if result.is_failure():
+        fail(result.failure_reason())
+    if path is not None and path != "-":
+        console.print(Panel.fit(f"[bold green]✓ Exported[/] {result.value()} secret(s) to [cyan]{path}[/]", title="[green]Success[/]"))
+
+def guess_format(path: str) -> str:
+    _, extension = os.path.splitext(path)
+    return EXTENSION_FORMATS.get(extension.lower(), "json")
+
+def fail(reason: Optional[str]):
+    console.print(Panel.fit(f"[bold red]Error:[/] {reason}", title="[red]Failed[/]"))
+    raise typer.Exit(1)
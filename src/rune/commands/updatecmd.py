@@ -3,9 +3,11 @@ from rich.console import Console
 from rich.panel import Panel
 from rune.internal.update import update_secret
 from rune.utils.input import input_key, input_name, split_name_and_ns, get_fields_dict
+from rune.utils.profiling import timed
 
 console = Console()
 
+@timed
 def handle_update_command(_fields: str, _name: str | None = None, _key: str | None = None):
 
     name, namespace = split_name_and_ns(_name or input_name())
@@ -1,70 +1,127 @@
 import os
 import base64
-from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
-from cryptography.hazmat.primitives import hashes
+from typing import Any, Dict, Optional, Tuple
 from cryptography.hazmat.primitives.ciphers.aead import AESGCM
 
 from rune.encryption.base import Encrypter
+from rune.encryption.kdf import KeyDerivation, Pbkdf2, kdf_from_params
+from rune.encryption.keycache import DerivedKeyCache
 from rune.exception.wrongencryption import WrongEncryptionMode
 from rune.exception.wrongkey import WrongKeyUsed
-from rune.models.secret import SecretField
+from rune.models.secret import SecretField, as_bytes
+from rune.utils.concurrency import parallel_map
+from rune.utils.profiling import timed
+
+# Version 1: every field carries its own salt, so every field costs one key derivation.
+# Version 2: all fields of a secret share one salt (and one derived key), only nonces differ.
+PER_FIELD_SALT_VERSION = 1
+ENVELOPE_VERSION = 2
 
 class AESGCMEncrypter(Encrypter):
+    envelope_version = ENVELOPE_VERSION
 
     @classmethod
     def encryption_algorithm(cls) -> str:
         return "aesgcm"
 
-    def __init__(self) -> None:
+    def __init__(self, key_cache: Optional[DerivedKeyCache] = None, workers: int = 1, kdf: Optional[KeyDerivation] = None) -> None:
         self._encryption_algorithm = self.encryption_algorithm()
+        self._key_cache = key_cache
+        self._workers = workers
+        # Used for new secrets only; decryption uses the KDF recorded in each field's params.
+        self._kdf = kdf or Pbkdf2()
 
-    def derive_key(self, password: str, salt: bytes) -> bytes:
-        kdf = PBKDF2HMAC(
-            algorithm=hashes.SHA256(),
-            length=32,
-            salt=salt,
-            iterations=600000
-        )
-        return kdf.derive(password.encode())
-
+    def derive_key(self, password: str, salt: bytes, kdf: Optional[KeyDerivation] = None) -> bytes:
+        kdf = kdf or self._kdf
+        if self._key_cache is None:
+            return kdf.derive(password, salt)
+        return self._key_cache.get_or_derive(password, salt, kdf.params(), lambda: kdf.derive(password, salt))
 
+    @timed
     def encrypt(self, secret: str, key: str, **kwargs) -> SecretField:
         """
         Encrypt a secret using a password-based key.
         Returns a dictionary suitable for JSON storage.
         """
         salt = os.urandom(16)
-        nonce = os.urandom(12)
+        aesgcm = AESGCM(self.derive_key(key, salt))
 
-        aes_key = self.derive_key(key, salt)
-        aesgcm = AESGCM(aes_key)
+        return self._seal(aesgcm, secret, salt, PER_FIELD_SALT_VERSION)
 
-        ciphertext = aesgcm.encrypt(nonce, secret.encode(), None)
+    @timed
+    def encrypt_fields(self, fields: Dict[str, str], key: str, **kwargs) -> Dict[str, SecretField]:
+        """
+        Encrypt all fields of a secret under a single derived key.
+        One salt is generated per secret; each field only gets its own nonce.
+        """
+        salt = os.urandom(16)
+        aesgcm = AESGCM(self.derive_key(key, salt))
 
-        return SecretField(
-            ciphertext=base64.b64encode(ciphertext).decode("utf-8"),
-            salt=base64.b64encode(salt).decode("utf-8"),
-            nonce=base64.b64encode(nonce).decode("utf-8"),
-            algorithm=self._encryption_algorithm
-        )
+        return {name: self._seal(aesgcm, value, salt, ENVELOPE_VERSION) for name, value in fields.items()}
 
+    @timed
     def decrypt(self, secret: SecretField, key: str, **kwargs) -> str:
         """
         Decrypt a secret previously encrypted by encrypt().
         """
+        self._check_algorithm(secret)
+
+        salt = as_bytes(secret.salt)
+        return self._open(AESGCM(self.derive_key(key, salt, self._recorded_kdf(secret.params))), secret)
+
+    @timed
+    def decrypt_fields(self, fields: Dict[str, SecretField], key: str, **kwargs) -> Dict[str, str]:
+        """
+        Decrypt all fields of a secret, deriving the key once per distinct salt and KDF.
+        Handles both per-secret envelopes and older per-field-salt records;
+        for the latter, the keys of the distinct salts are derived in parallel.
+        """
+        for field in fields.values():
+            self._check_algorithm(field)
+
+        derivations = list(dict.fromkeys(self._derivation(field) for field in fields.values()))
+        derived = parallel_map(
+            lambda derivation: self.derive_key(key, derivation[0], self._recorded_kdf(dict(derivation[1]))),
+            derivations,
+            self._workers
+        )
+        ciphers = {derivation: AESGCM(aes_key) for derivation, aes_key in zip(derivations, derived)}
+
+        return {name: self._open(ciphers[self._derivation(field)], field) for name, field in fields.items()}
+
+    def _derivation(self, field: SecretField) -> Tuple[bytes, Tuple]:
+        # Fields share a derived key only if both their salt and their KDF params match.
+        return bytes(as_bytes(field.salt)), tuple(sorted(field.params.items()))
+
+    def _recorded_kdf(self, params: Dict[str, Any]) -> KeyDerivation:
+        try:
+            return kdf_from_params(params)
+        except ValueError as err:
+            raise WrongEncryptionMode(f"Secret was encrypted with key derivation this version of rune cannot use: {err}")
+
+    def _check_algorithm(self, secret: SecretField) -> None:
         if self._encryption_algorithm != secret.algorithm:
             raise WrongEncryptionMode(f"Secret was encrypted with mode {secret.algorithm}. Please use it to decrypt.")
 
-        salt = base64.b64decode(secret.salt or "")
-        nonce = base64.b64decode(secret.nonce or "")
-        ciphertext = base64.b64decode(secret.ciphertext)
+    def _seal(self, aesgcm: AESGCM, secret: str, salt: bytes, version: int) -> SecretField:
+        nonce = os.urandom(12)
+        ciphertext = aesgcm.encrypt(nonce, secret.encode(), None)
+
+        return SecretField(
+            ciphertext=base64.b64encode(ciphertext).decode("utf-8"),
+            salt=base64.b64encode(salt).decode("utf-8"),
+            nonce=base64.b64encode(nonce).decode("utf-8"),
+            algorithm=self._encryption_algorithm,
+            version=version,
+            params=self._kdf.params()
+        )
 
-        aes_key = self.derive_key(key, salt)
-        aesgcm = AESGCM(aes_key)
+    def _open(self, aesgcm: AESGCM, secret: SecretField) -> str:
+        nonce = as_bytes(secret.nonce)
+        ciphertext = as_bytes(secret.ciphertext)
 
         try:
             plaintext = aesgcm.decrypt(nonce, ciphertext, None)
             return plaintext.decode()
         except:
             raise WrongKeyUsed("Invalid key or corrupted secret")
-
@@ -1,10 +1,12 @@
 from abc import ABC, abstractmethod
-from typing import Self
+from typing import Dict, Self
 
 from rune.models.secret import SecretField
 
 
 class Encrypter(ABC):
+    envelope_version: int = 1
+
     def __init__(self) -> None:
         self._encryption_algorithm: str
 
@@ -21,3 +23,15 @@ class Encrypter(ABC):
         Decrypts the provided secret with the provided key
         """
         raise NotImplementedError()
+
+    def encrypt_fields(self, fields: Dict[str, str], key: str, **kwargs) -> Dict[str, SecretField]:
+        """
+        Encrypts every field of a secret with the provided key.
+        """
+        return {name: self.encrypt(value, key, **kwargs) for name, value in fields.items()}
+
+    def decrypt_fields(self, fields: Dict[str, SecretField], key: str, **kwargs) -> Dict[str, str]:
+        """
+        Decrypts every field of a secret with the provided key.
+        """
+        return {name: self.decrypt(field, key, **kwargs) for name, field in fields.items()}
@@ -1,16 +1,56 @@
+from typing import Dict
+
 from rune.encryption.base import Encrypter
-from rune.utils.settings import get_configured_encryption_identifier
-from rune.encryption.aesgcm import AESGCMEncrypter
+from rune.utils.settings import get_configured_encryption_identifier, get_settings
 from rune.encryption.noencryption import NoEncryption
+from rune.encryption.keycache import DerivedKeyCache, get_configured_key_cache
+from rune.exception.wrongencryption import WrongEncryptionMode
+from rune.models.secret import SecretField
 
 def get_configured_encrypter() -> Encrypter:
     return get_encrypter(algorithm=get_configured_encryption_identifier())
 
-def get_encrypter(algorithm: str | None) -> Encrypter:
+def get_encrypter(algorithm: str | None, key_cache: DerivedKeyCache | None = None) -> Encrypter:
+    """
+    Raises ValueError for an unsupported algorithm or invalid configured KDF settings.
+    """
     if algorithm == NoEncryption.encryption_algorithm():
         return NoEncryption()
-    if algorithm == AESGCMEncrypter.encryption_algorithm():
-        return AESGCMEncrypter()
+    if algorithm == "aesgcm":
+        # Imported lazily: cryptography is only needed once something is actually encrypted.
+        from rune.encryption.aesgcm import AESGCMEncrypter
+        from rune.encryption.kdf import kdf_from_params
+        settings = get_settings()
+        try:
+            kdf = kdf_from_params({**settings.kdf.params, "kdf": settings.kdf.name})
+        except ValueError as err:
+            raise ValueError(f"{err} Check the \"kdf\" section of settings.json.")
+        return AESGCMEncrypter(
+            key_cache=key_cache or get_configured_key_cache(),
+            workers=settings.workers,
+            kdf=kdf
+        )
 
     raise ValueError(f"Algorithm '{algorithm}' is not supported.")
 
+def decrypt_fields(fields: Dict[str, SecretField], key: str, key_cache: DerivedKeyCache | None = None) -> Dict[str, str]:
+    """
+    Decrypts the fields of a secret, handing each encrypter all of its fields
+    at once so per-secret work (like key derivation) is only done once.
+    A `key_cache` shares derived keys across calls (e.g. for a batch of secrets).
+
+    Raises WrongEncryptionMode if a field's algorithm or KDF cannot be used, WrongKeyUsed for a wrong key.
+    """
+    by_algorithm: Dict[str | None, Dict[str, SecretField]] = {}
+    for name, field in fields.items():
+        by_algorithm.setdefault(field.algorithm, {})[name] = field
+
+    decrypted = {}
+    for algorithm, algorithm_fields in by_algorithm.items():
+        try:
+            encrypter = get_encrypter(algorithm, key_cache)
+        except ValueError as err:
+            raise WrongEncryptionMode(str(err))
+        decrypted.update(encrypter.decrypt_fields(algorithm_fields, key))
+
+    return {name: decrypted[name] for name in fields}
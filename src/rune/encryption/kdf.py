@@ -0,0 +1,225 @@
+import math
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, List, Self, Tuple
+
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+from cryptography.hazmat.primitives.kdf.scrypt import Scrypt
+
+from rune.utils.profiling import timed
+
+try:
+    # Available from cryptography 44 (and only with a recent enough OpenSSL).
+    from cryptography.hazmat.primitives.kdf.argon2 import Argon2id
+except ImportError:
+    Argon2id = None
+
+KEY_LENGTH = 32
+# Derived keys are AES keys, so only AES-128, AES-192 and AES-256 key lengths are valid.
+KEY_LENGTHS = (16, 24, 32)
+
+# Parameters of fields written before the KDF was recorded (their params are empty).
+LEGACY_PBKDF2_ITERATIONS = 600000
+
+
+class KeyDerivation(ABC):
+    """
+    A password-based key derivation function with fixed cost parameters.
+
+    `params()` is what gets recorded in `SecretField.params`, so every field can be
+    decrypted with the exact KDF and cost it was encrypted with, whatever is configured now.
+    """
+    name: str
+
+    @abstractmethod
+    def derive(self, password: str, salt: bytes) -> bytes:
+        raise NotImplementedError()
+
+    @abstractmethod
+    def params(self) -> Dict[str, Any]:
+        raise NotImplementedError()
+
+    @classmethod
+    @abstractmethod
+    def from_params(cls, params: Dict[str, Any]) -> Self:
+        raise NotImplementedError()
+
+    @abstractmethod
+    def scaled(self, factor: float) -> Self:
+        """
+        The same KDF with its work factor multiplied by roughly `factor`.
+        """
+        raise NotImplementedError()
+
+
+class Pbkdf2(KeyDerivation):
+    name = "pbkdf2-sha256"
+    min_iterations = 10000
+
+    def __init__(self, iterations: int = LEGACY_PBKDF2_ITERATIONS, length: int = KEY_LENGTH) -> None:
+        check_positive(self.name, iterations=iterations)
+        check_length(self.name, length)
+        self.iterations = iterations
+        self.length = length
+
+    @timed
+    def derive(self, password: str, salt: bytes) -> bytes:
+        kdf = PBKDF2HMAC(algorithm=hashes.SHA256(), length=self.length, salt=salt, iterations=self.iterations)
+        return kdf.derive(password.encode())
+
+    def params(self) -> Dict[str, Any]:
+        return {"kdf": self.name, "iterations": self.iterations, "length": self.length}
+
+    @classmethod
+    def from_params(cls, params: Dict[str, Any]) -> Self:
+        return cls(
+            iterations=int(params.get("iterations", LEGACY_PBKDF2_ITERATIONS)),
+            length=int(params.get("length", KEY_LENGTH))
+        )
+
+    def scaled(self, factor: float) -> Self:
+        return type(self)(max(self.min_iterations, round(self.iterations * factor)), self.length)
+
+
+class ScryptKdf(KeyDerivation):
+    """
+    scrypt; `n` (a power of two) sets both the time and the memory cost (128 * n * r bytes).
+    """
+    name = "scrypt"
+    min_log_n = 10
+    max_log_n = 20
+
+    def __init__(self, n: int = 2 ** 15, r: int = 8, p: int = 1, length: int = KEY_LENGTH) -> None:
+        check_positive(self.name, n=n, r=r, p=p)
+        if n < 2 or n & (n - 1):
+            raise ValueError(f"Invalid {self.name} settings: n must be a power of two, got {n}.")
+        check_length(self.name, length)
+        self.n = n
+        self.r = r
+        self.p = p
+        self.length = length
+
+    @timed
+    def derive(self, password: str, salt: bytes) -> bytes:
+        kdf = Scrypt(salt=salt, length=self.length, n=self.n, r=self.r, p=self.p)
+        return kdf.derive(password.encode())
+
+    def params(self) -> Dict[str, Any]:
+        return {"kdf": self.name, "n": self.n, "r": self.r, "p": self.p, "length": self.length}
+
+    @classmethod
+    def from_params(cls, params: Dict[str, Any]) -> Self:
+        return cls(
+            n=int(params.get("n", 2 ** 15)),
+            r=int(params.get("r", 8)),
+            p=int(params.get("p", 1)),
+            length=int(params.get("length", KEY_LENGTH))
+        )
+
+    def scaled(self, factor: float) -> Self:
+        log_n = round(math.log2(self.n * factor))
+        log_n = min(self.max_log_n, max(self.min_log_n, log_n))
+        return type(self)(2 ** log_n, self.r, self.p, self.length)
+
+
+class Argon2idKdf(KeyDerivation):
+    """
+    Argon2id; `memory_cost` is in KiB. Calibration only changes `iterations`.
+    """
+    name = "argon2id"
+
+    def __init__(self, iterations: int = 3, lanes: int = 4, memory_cost: int = 64 * 1024, length: int = KEY_LENGTH) -> None:
+        check_positive(self.name, iterations=iterations, lanes=lanes, memory_cost=memory_cost)
+        if memory_cost < 8 * lanes:
+            raise ValueError(f"Invalid {self.name} settings: memory_cost must be at least 8 KiB per lane, got {memory_cost}.")
+        check_length(self.name, length)
+        self.iterations = iterations
+        self.lanes = lanes
+        self.memory_cost = memory_cost
+        self.length = length
+
+    @timed
+    def derive(self, password: str, salt: bytes) -> bytes:
+        if Argon2id is None:
+            raise ValueError("Argon2id needs cryptography 44 or newer.")
+        kdf = Argon2id(salt=salt, length=self.length, iterations=self.iterations, lanes=self.lanes, memory_cost=self.memory_cost)
+        return kdf.derive(password.encode())
+
+    def params(self) -> Dict[str, Any]:
+        return {"kdf": self.name, "iterations": self.iterations, "lanes": self.lanes, "memory_cost": self.memory_cost, "length": self.length}
+
+    @classmethod
+    def from_params(cls, params: Dict[str, Any]) -> Self:
+        return cls(
+            iterations=int(params.get("iterations", 3)),
+            lanes=int(params.get("lanes", 4)),
+            memory_cost=int(params.get("memory_cost", 64 * 1024)),
+            length=int(params.get("length", KEY_LENGTH))
+        )
+
+    def scaled(self, factor: float) -> Self:
+        return type(self)(max(1, round(self.iterations * factor)), self.lanes, self.memory_cost, self.length)
+
+
+def check_positive(kdf: str, **costs: int) -> None:
+    for name, value in costs.items():
+        if value < 1:
+            raise ValueError(f"Invalid {kdf} settings: {name} must be positive, got {value}.")
+
+def check_length(kdf: str, length: int) -> None:
+    if length not in KEY_LENGTHS:
+        raise ValueError(f"Invalid {kdf} settings: length must be 16, 24 or 32 bytes, got {length}.")
+
+def available_kdfs() -> List[str]:
+    names = [Pbkdf2.name, ScryptKdf.name]
+    if Argon2id is not None:
+        names.append(Argon2idKdf.name)
+    return names
+
+def kdf_from_params(params: Dict[str, Any] | None) -> KeyDerivation:
+    """
+    The KDF recorded in a field's params. Fields without one predate recorded
+    params and were derived with PBKDF2-SHA256 at 600,000 iterations.
+
+    Raises ValueError for an unknown KDF or invalid params.
+    """
+    params = params or {}
+    try:
+        match params.get("kdf", Pbkdf2.name):
+            case Pbkdf2.name:
+                return Pbkdf2.from_params(params)
+            case ScryptKdf.name:
+                return ScryptKdf.from_params(params)
+            case Argon2idKdf.name:
+                return Argon2idKdf.from_params(params)
+            case other:
+                raise ValueError(f"Key derivation function '{other}' is not supported.")
+    except TypeError as err:
+        # int() of a missing or non-numeric param.
+        raise ValueError(f"Invalid key derivation params: {err}")
+
+def calibrate(kdf: KeyDerivation,
+              target_seconds: float,
+              rounds: int = 4,
+              tolerance: float = 0.15,
+              clock: Callable[[], float] = time.perf_counter) -> Tuple[KeyDerivation, float]:
+    """
+    Scales the work factor of `kdf` until one derivation takes about `target_seconds`
+    on this machine. Returns the calibrated KDF and its measured derivation time.
+    """
+    salt = bytes(16)
+    elapsed = measure(kdf, salt, clock)
+    for _ in range(rounds):
+        if abs(elapsed - target_seconds) <= tolerance * target_seconds:
+            break
+        candidate = kdf.scaled(target_seconds / max(elapsed, 1e-6))
+        if candidate.params() == kdf.params():
+            break
+        kdf, elapsed = candidate, measure(candidate, salt, clock)
+    return kdf, elapsed
+
+def measure(kdf: KeyDerivation, salt: bytes, clock: Callable[[], float] = time.perf_counter) -> float:
+    started = clock()
+    kdf.derive("rune-calibration", salt)
+    return clock() - started
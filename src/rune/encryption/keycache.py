@@ -0,0 +1,149 @@
+import hashlib
+import hmac
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional, Tuple
+
+from rune.utils.settings import get_settings
+
+
+@dataclass
+class KeyCacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    derive_seconds: float = 0.0
+
+    @property
+    def saved_seconds(self) -> float:
+        """
+        Estimated KDF time saved by cache hits, based on the average cost of a miss.
+        """
+        if self.misses == 0:
+            return 0.0
+        return self.hits * (self.derive_seconds / self.misses)
+
+
+class DerivedKeyCache:
+    """
+    Bounded, process-local cache of derived keys.
+
+    Entries are indexed by a keyed hash of (password, salt, KDF params), expire
+    `ttl_seconds` after they were last used and are zeroed when evicted.
+    """
+
+    def __init__(self,
+                 max_entries: int = 32,
+                 ttl_seconds: float = 300.0,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        self._max_entries = max_entries
+        self._ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._hash_key = os.urandom(32)
+        self._entries: OrderedDict[bytes, Tuple[bytearray, float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = KeyCacheStats()
+
+    def get_or_derive(self, password: str, salt: bytes, params: Dict, derive: Callable[[], bytes]) -> bytes:
+        """
+        Returns the cached key for these inputs, calling `derive` on a miss.
+        """
+        entry_key = self._entry_key(password, salt, params)
+        now = self._clock()
+
+        with self._lock:
+            entry = self._entries.get(entry_key)
+            if entry is not None and entry[1] > now:
+                self._entries[entry_key] = (entry[0], now + self._ttl_seconds)
+                self._entries.move_to_end(entry_key)
+                self._stats.hits += 1
+                return bytes(entry[0])
+            if entry is not None:
+                self._evict(entry_key)
+
+        started = time.perf_counter()
+        key = derive()
+        elapsed = time.perf_counter() - started
+
+        with self._lock:
+            self._stats.misses += 1
+            self._stats.derive_seconds += elapsed
+            if entry_key in self._entries:
+                self._evict(entry_key)
+            self._entries[entry_key] = (bytearray(key), now + self._ttl_seconds)
+            self._purge(now)
+
+        return key
+
+    def clear(self) -> None:
+        """
+        Evicts and zeroes every cached key.
+        """
+        with self._lock:
+            for entry_key in list(self._entries):
+                self._evict(entry_key)
+
+    def stats(self) -> KeyCacheStats:
+        with self._lock:
+            return KeyCacheStats(**vars(self._stats))
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _entry_key(self, password: str, salt: bytes, params: Dict) -> bytes:
+        mac = hmac.new(self._hash_key, digestmod=hashlib.sha256)
+        for part in (password.encode(), salt, repr(sorted(params.items())).encode()):
+            mac.update(len(part).to_bytes(8, "big"))
+            mac.update(part)
+        return mac.digest()
+
+    def _purge(self, now: float) -> None:
+        for entry_key, (_, expires_at) in list(self._entries.items()):
+            if expires_at <= now:
+                self._evict(entry_key)
+        while len(self._entries) > self._max_entries:
+            self._evict(next(iter(self._entries)))
+
+    def _evict(self, entry_key: bytes) -> None:
+        key, _ = self._entries.pop(entry_key)
+        key[:] = bytes(len(key))
+        self._stats.evictions += 1
+
+
+_configured_cache: Optional[DerivedKeyCache] = None
+
+def get_configured_key_cache() -> Optional[DerivedKeyCache]:
+    """
+    Returns the process-wide key cache, or None if it is disabled in settings.
+    """
+    global _configured_cache
+    if _configured_cache is None:
+        settings = get_settings().key_cache
+        if not settings.enabled:
+            return None
+        _configured_cache = DerivedKeyCache(
+            max_entries=settings.max_entries,
+            ttl_seconds=settings.ttl_seconds
+        )
+    return _configured_cache
+
+def install_key_cache(cache: Optional[DerivedKeyCache]) -> None:
+    """
+    Replaces the process-wide key cache regardless of settings.
+    The previous cache, if any, is cleared.
+    """
+    global _configured_cache
+    if _configured_cache is not None and _configured_cache is not cache:
+        _configured_cache.clear()
+    _configured_cache = cache
+
+def key_cache_stats() -> Optional[KeyCacheStats]:
+    """
+    Returns hit/miss counters of the process-wide key cache, if one was created.
+    """
+    if _configured_cache is None:
+        return None
+    return _configured_cache.stats()
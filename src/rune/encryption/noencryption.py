@@ -1,6 +1,7 @@
 from rune.encryption.base import Encrypter
 from rune.exception.wrongencryption import WrongEncryptionMode
-from rune.models.secret import SecretField
+from rune.models.secret import SecretField, as_text
+from rune.utils.profiling import timed
 
 class NoEncryption(Encrypter):
     @classmethod
@@ -10,6 +11,7 @@ class NoEncryption(Encrypter):
     def __init__(self) -> None:
         self._encryption_algorithm = "no-encryption"
 
+    @timed
     def encrypt(self, secret: str, key: str, **kwargs) -> SecretField:
         """
         Encrypts the provided secret with the provided key.
@@ -19,10 +21,11 @@ class NoEncryption(Encrypter):
             algorithm=self._encryption_algorithm
         )
 
+    @timed
     def decrypt(self, secret: SecretField, key: str, **kwargs) -> str:
         """
         Decrypts the provided secret with the provided key
         """
         if self._encryption_algorithm != secret.algorithm:
             raise WrongEncryptionMode(f"Secret was encrypted with mode {secret.algorithm}. Please use it to decrypt.")
-        return secret.ciphertext
+        return as_text(secret.ciphertext)
@@ -0,0 +1,4 @@
+class AgentProtocolError(RuntimeError):
+    def __init__(self, message: str = "Malformed agent message"):
+        super().__init__(message)
+        self.message = message
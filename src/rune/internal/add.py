@@ -1,37 +1,52 @@
+from rune.agent import client as AgentClient
 from rune.encryption import factory as EncryptionFactory
 from rune.exception.notfounderror import NotFoundError
 from rune.models.result import Failure, Result, Success
 from rune.models.secret import Secret
 from rune.storage import factory as StorageManagerFactory
 from typing import Dict
+from rune.utils.profiling import timed
 
+@timed
 def add_secret(name: str, fields: Dict[str, str], key: str, namespace: str = "") -> Result[None]:
     """
     Encrypts a secret with the configured encrypter.
     Stores the encrypted secret with the configured storage manager.
 
     Returns the result.
+
+    Goes through the rune agent instead, if one is running.
     """
-    encrypter = EncryptionFactory.get_configured_encrypter()
+    delegated = AgentClient.add_secret(name, fields, key, namespace)
+    if delegated is not None:
+        return delegated
+
+    try:
+        encrypter = EncryptionFactory.get_configured_encrypter()
+    except ValueError as err:
+        return Failure(str(err))
     storage = StorageManagerFactory.get_configured_storage_manager()
 
-    encrypted_fields = {name: encrypter.encrypt(secret, key) for name, secret in fields.items()}
+    encrypted_fields = encrypter.encrypt_fields(fields, key)
 
     model = Secret(
         name = name,
         namespace = namespace,
         algorithm = encrypter._encryption_algorithm,
-        fields = encrypted_fields
+        fields = encrypted_fields,
+        version = encrypter.envelope_version
     )
 
     try:
-        if storage.retreive_secret(name, namespace) is not None:
-            return Failure(f"Secret '{name}' already exists. You can update it with `rune update -n {name}`")
-
-        if storage.store_secret(model):
-            return Success()
-        else:
-            return Failure(f"Storage manager could not store the secret {name}")
+        with storage.transaction() as transaction:
+            if transaction.get(name, namespace) is not None:
+                return Failure(f"Secret '{name}' already exists. You can update it with `rune update -n {name}`")
+
+            transaction.put(model)
+            if transaction.commit():
+                return Success()
+            else:
+                return Failure(f"Storage manager could not store the secret {name}")
 
     except NotFoundError as err:
         return Failure(err.message)
@@ -0,0 +1,34 @@
+from typing import Optional, Tuple
+
+from rune.models.result import Failure, Result, Success
+from rune.models.settings import KdfSettings
+from rune.utils.settings import get_settings
+from rune.utils.profiling import timed
+
+@timed
+def calibrate_kdf(name: Optional[str], target_ms: float) -> Result[Tuple[KdfSettings, float]]:
+    """
+    Calibrates the cost parameters of a key derivation function (the configured one if
+    `name` is None) so that deriving one key takes about `target_ms` on this machine.
+    Returns the calibrated KDF settings and the measured time of one derivation in ms.
+    Returns the reason for failure, if it fails.
+    """
+    from rune.encryption.kdf import available_kdfs, calibrate, kdf_from_params
+
+    configured = get_settings().kdf
+    name = name or configured.name
+    if name not in available_kdfs():
+        return Failure(f"Key derivation function '{name}' is not available. Use one of: {', '.join(available_kdfs())}.")
+    if target_ms <= 0:
+        return Failure("The target must be a positive number of milliseconds.")
+
+    # Start from the configured costs when calibrating the configured KDF, else from its defaults.
+    start = dict(configured.params) if name == configured.name else {}
+    try:
+        kdf, elapsed = calibrate(kdf_from_params({**start, "kdf": name}), target_ms / 1000)
+    except (ValueError, MemoryError) as err:
+        return Failure(str(err))
+
+    params = kdf.params()
+    params.pop("kdf")
+    return Success((KdfSettings(name=name, params=params), elapsed * 1000))
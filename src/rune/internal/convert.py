@@ -0,0 +1,72 @@
+import os
+from typing import Optional
+
+from rune.exception.notfounderror import NotFoundError
+from rune.models.result import Failure, Result, Success
+from rune.storage import factory as StorageManagerFactory
+from rune.utils.settings import get_configured_storage_manager_identifier, get_secrets_path, get_settings
+from rune.utils.profiling import timed
+
+ENCODINGS = ("json", "binary")
+
+VAULT_EXTENSIONS = {"json": ".json", "binary": ".vault"}
+
+@timed
+def convert_vault(encoding: str, target_path: Optional[str] = None) -> Result[str]:
+    """
+    Rewrites every secret of the configured vault in `encoding` (`json` or `binary`).
+
+    A local vault is a single file in one encoding, so it is copied into a new file at
+    `target_path` (by default, the vault's path with a `.json` or `.vault` extension) and
+    the original is left as it is. SQLite and journal vaults can hold both encodings at once,
+    so they are rewritten in place, atomically.
+
+    Returns the path of the converted vault, or the reason for failure.
+    """
+    if encoding not in ENCODINGS:
+        return Failure(f"Unknown encoding '{encoding}', expected one of: {', '.join(ENCODINGS)}.")
+
+    mode = get_configured_storage_manager_identifier()
+    try:
+        if mode in ("sqlite", "journal"):
+            if target_path is not None:
+                return Failure(f"{mode} vaults are converted in place, so no file can be given.")
+            return convert_in_place(mode, encoding)
+        return convert_local(encoding, target_path)
+    except NotFoundError as err:
+        return Failure(err.message)
+
+def convert_in_place(mode: str, encoding: str) -> Result[str]:
+    path = get_secrets_path()
+    storage = StorageManagerFactory.get_storage_manager(mode, path, encoding)
+    if not storage.rewrite_secrets(lambda secrets: secrets):
+        return Failure("Storage manager could not rewrite the secrets. Nothing was changed.")
+    return Success(path)
+
+def convert_local(encoding: str, target_path: Optional[str]) -> Result[str]:
+    settings = get_settings().storage
+    source_path = get_secrets_path()
+    if settings.encoding == encoding:
+        return Failure(f"The vault at '{source_path}' is already {encoding}.")
+    target_path = target_path or os.path.splitext(source_path)[0] + VAULT_EXTENSIONS[encoding]
+    if os.path.exists(target_path):
+        return Failure(f"'{target_path}' already exists.")
+
+    source = StorageManagerFactory.get_storage_manager("local", source_path, settings.encoding)
+    target = StorageManagerFactory.get_storage_manager("local", target_path, encoding, settings.compact)
+    try:
+        if encoding == "json":
+            with open(target_path, "w") as f:
+                f.write("{}")
+        # The target starts out empty: every secret it is given comes from the source.
+        if target.rewrite_secrets(lambda _: (source.decode(data) for _, data in source.iter_raw())):
+            return Success(target_path)
+        failure = Failure(f"Could not write the converted vault to '{target_path}'.")
+    except OSError as err:
+        failure = Failure(f"Could not write the converted vault to '{target_path}': {err}")
+    except NotFoundError as err:
+        failure = Failure(err.message)
+
+    if os.path.exists(target_path):
+        os.remove(target_path)
+    return failure
@@ -0,0 +1,18 @@
+from typing import Dict, List
+from rune.exception.notfounderror import NotFoundError
+from rune.models.result import Failure, Result, Success
+from rune.storage import factory as StorageManagerFactory
+from rune.utils.profiling import timed
+
+@timed
+def find_secret_names(tags: List[str], metadata: Dict[str, str]) -> Result[List[str]]:
+    """
+    Retrieves the sorted full names of the secrets carrying every given tag and
+    metadata key/value pair with the configured storage manager, from its tag index.
+    Returns the reason for failure, if it fails.
+    """
+    storage = StorageManagerFactory.get_configured_storage_manager()
+    try:
+        return Success(storage.find_names(tags, metadata))
+    except NotFoundError as err:
+        return Failure(err.message)
@@ -1,12 +1,15 @@
+from rune.agent import client as AgentClient
 from rune.exception.notfounderror import NotFoundError
 from rune.exception.wrongencryption import WrongEncryptionMode
 from rune.exception.wrongkey import WrongKeyUsed
 from rune.models.result import Result, Success, Failure
 from rune.storage import factory as StorageManagerFactory
 from rune.encryption import factory as EncrypterFactory
+from rune.utils.profiling import timed
 
 from typing import Dict
 
+@timed
 def get_secret(name: str, key: str, namespace: str = "") -> Result[Dict[str, str]]:
     """
     Retreives the encrypted secret via the configured storage manager.
@@ -14,17 +17,20 @@ def get_secret(name: str, key: str, namespace: str = "") -> Result[Dict[str, str
 
     Returns the decrypted secret, if it exists.
     Returns None if not successful.
+
+    Goes through the rune agent instead, if one is running.
     """
+    delegated = AgentClient.get_secret(name, key, namespace)
+    if delegated is not None:
+        return delegated
+
     storage = StorageManagerFactory.get_configured_storage_manager()
 
     try:
         secret = storage.retreive_secret(name, namespace)
         if secret is not None:
             try:
-                decrypted_fields = {}
-                for field_name, field in secret.fields.items():
-                    encrypter = EncrypterFactory.get_encrypter(field.algorithm)
-                    decrypted_fields[field_name] = encrypter.decrypt(field, key)
+                decrypted_fields = EncrypterFactory.decrypt_fields(secret.fields, key)
             except WrongEncryptionMode as err:
                 return Failure(err.message)
             except WrongKeyUsed as err:
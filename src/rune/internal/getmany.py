@@ -0,0 +1,76 @@
+from typing import Dict, List
+
+from rune.agent import client as AgentClient
+from rune.encryption import factory as EncrypterFactory
+from rune.encryption.keycache import DerivedKeyCache, get_configured_key_cache
+from rune.exception.notfounderror import NotFoundError
+from rune.exception.wrongencryption import WrongEncryptionMode
+from rune.exception.wrongkey import WrongKeyUsed
+from rune.models.result import Failure, Result, Success
+from rune.models.secret import SecretHeader
+from rune.storage import factory as StorageManagerFactory
+from rune.storage.nameindex import matches_prefix
+from rune.utils.concurrency import parallel_map
+from rune.utils.settings import get_settings
+from rune.utils.profiling import timed
+
+BATCH_KEY_TTL_SECONDS = 60
+
+@timed
+def get_secrets(names: List[str], key: str, prefix: str | None = None) -> Result[Dict[str, Dict[str, str]]]:
+    """
+    Retreives and decrypts several secrets at once, selected by full name
+    (e.g. `db/prod/mydb`) and/or by namespace prefix (e.g. `db/prod`).
+
+    The vault is read once, each distinct salt's key is derived once
+    and secrets are decrypted concurrently on the configured number of workers.
+
+    Returns the decrypted fields by secret full name.
+    Fails if a named secret does not exist or any selected secret cannot be decrypted.
+
+    Goes through the rune agent instead, if one is running.
+    """
+    delegated = AgentClient.get_secrets(names, key, prefix)
+    if delegated is not None:
+        return delegated
+
+    storage = StorageManagerFactory.get_configured_storage_manager()
+    try:
+        # Headers only decode the fields of the secrets that end up selected.
+        stored = {h.full_name: h for h in storage.iter_headers("" if names else prefix or "")}
+    except NotFoundError as err:
+        return Failure(err.message)
+
+    selected: Dict[str, SecretHeader] = {}
+    for full_name in names:
+        if full_name not in stored:
+            return Failure(f"Secret '{full_name}' does not exist.")
+        selected[full_name] = stored[full_name]
+
+    if prefix is not None:
+        for full_name, header in stored.items():
+            if matches_prefix(full_name, prefix):
+                selected.setdefault(full_name, header)
+
+    key_cache = get_configured_key_cache()
+    batch_cache = key_cache or DerivedKeyCache(max_entries=len(selected) or 1, ttl_seconds=BATCH_KEY_TTL_SECONDS)
+
+    def decrypt(secret: SecretHeader) -> Result[Dict[str, str]]:
+        try:
+            return Success(EncrypterFactory.decrypt_fields(secret.fields, key, batch_cache))
+        except (WrongEncryptionMode, WrongKeyUsed) as err:
+            return Failure(f"{secret.full_name}: {err.message}")
+
+    try:
+        results = parallel_map(decrypt, list(selected.values()), get_settings().workers)
+    finally:
+        if key_cache is None:
+            batch_cache.clear()
+
+    decrypted = {}
+    for full_name, result in zip(selected, results):
+        if result.is_failure():
+            return Failure(result.failure_reason() or f"Could not decrypt '{full_name}'.")
+        decrypted[full_name] = result.value() or {}
+
+    return Success(decrypted)
@@ -1,9 +1,11 @@
-from typing import List
+from typing import List, Optional
 from rune.exception.notfounderror import NotFoundError
 from rune.models.result import Failure, Result, Success
-from rune.models.secret import Secret
+from rune.models.secret import Secret, SecretHeader
 from rune.storage import factory as StorageManagerFactory
+from rune.utils.profiling import timed
 
+@timed
 def list_secrets() -> Result[List[Secret]]:
     """
     Retrieves all secret entries with the configured storage manager.
@@ -15,3 +17,29 @@ def list_secrets() -> Result[List[Secret]]:
     except NotFoundError as err:
         return Failure(err.message)
 
+
+@timed
+def list_secret_names(prefix: str = "", offset: int = 0, limit: Optional[int] = None) -> Result[List[str]]:
+    """
+    Retrieves the sorted full names of the secrets under a namespace prefix
+    with the configured storage manager, without decoding the secrets themselves.
+    Returns None if it there is an error getting the names.
+    """
+    storage = StorageManagerFactory.get_configured_storage_manager()
+    try:
+        return Success(storage.list_names(prefix, offset, limit))
+    except NotFoundError as err:
+        return Failure(err.message)
+
+@timed
+def list_secret_headers(prefix: str = "") -> Result[List[SecretHeader]]:
+    """
+    Retrieves lightweight headers (names, tags, metadata, timestamps) of the secrets
+    under a namespace prefix with the configured storage manager.
+    Returns None if it there is an error getting the secrets.
+    """
+    storage = StorageManagerFactory.get_configured_storage_manager()
+    try:
+        return Success(list(storage.iter_headers(prefix)))
+    except NotFoundError as err:
+        return Failure(err.message)
@@ -0,0 +1,67 @@
+from typing import Callable, Iterable, Iterator, Optional
+
+from rune.encryption import factory as EncryptionFactory
+from rune.exception.notfounderror import NotFoundError
+from rune.exception.wrongencryption import WrongEncryptionMode
+from rune.exception.wrongkey import WrongKeyUsed
+from rune.models.result import Failure, Result, Success
+from rune.models.secret import Secret
+from rune.storage import factory as StorageManagerFactory
+from rune.utils.concurrency import parallel_imap
+from rune.utils.settings import get_configured_encryption_identifier, get_settings
+from rune.utils.profiling import timed
+
+@timed
+def reencrypt_secrets(old_key: str,
+                      new_key: str,
+                      algorithm: Optional[str] = None,
+                      progress: Optional[Callable[[int], None]] = None) -> Result[int]:
+    """
+    Decrypts every secret with `old_key` and re-encrypts it with `new_key` using `algorithm`
+    (the configured encryption if None), on the configured number of worker threads.
+
+    The vault is streamed through the storage manager and committed as a single atomic change,
+    so an interrupted or failed run leaves every secret as it was and can simply be run again.
+    When the key stays the same, secrets already encrypted with `algorithm` are kept as they are.
+    `progress` is called with the number of secrets processed so far.
+
+    Returns the number of secrets re-encrypted, or the reason for failure.
+    """
+    storage = StorageManagerFactory.get_configured_storage_manager()
+    try:
+        encrypter = EncryptionFactory.get_encrypter(algorithm or get_configured_encryption_identifier())
+    except ValueError as err:
+        return Failure(str(err))
+
+    reencrypted = 0
+
+    def reencrypt(secret: Secret) -> Secret:
+        if old_key == new_key and all(f.algorithm == encrypter._encryption_algorithm for f in secret.fields.values()):
+            return secret
+        try:
+            fields = EncryptionFactory.decrypt_fields(secret.fields, old_key)
+        except (WrongKeyUsed, WrongEncryptionMode) as err:
+            raise WrongKeyUsed(f"Secret '{secret.full_name}' could not be decrypted: {err}.")
+        return secret.update(
+            algorithm = encrypter._encryption_algorithm,
+            fields = encrypter.encrypt_fields(fields, new_key),
+            version = encrypter.envelope_version
+        )
+
+    def transform(secrets: Iterator[Secret]) -> Iterable[Secret]:
+        nonlocal reencrypted
+        for done, (original, secret) in enumerate(parallel_imap(lambda s: (s, reencrypt(s)), secrets, get_settings().workers), 1):
+            if secret is not original:
+                reencrypted += 1
+            if progress is not None:
+                progress(done)
+            yield secret
+
+    try:
+        if not storage.rewrite_secrets(transform):
+            return Failure("Storage manager could not write the re-encrypted secrets. Nothing was changed.")
+    except (WrongKeyUsed, ValueError) as err:
+        return Failure(f"{err} Nothing was changed.")
+    except NotFoundError as err:
+        return Failure(err.message)
+    return Success(reencrypted)
@@ -0,0 +1,21 @@
+from typing import List
+from rune.exception.notfounderror import NotFoundError
+from rune.models.result import Failure, Result, Success
+from rune.storage import factory as StorageManagerFactory
+from rune.utils.profiling import timed
+
+@timed
+def search_secret_names(query: str, limit: int = 10) -> Result[List[str]]:
+    """
+    Retrieves up to `limit` full names fuzzily matching `query`, best match first,
+    with the configured storage manager's trigram index.
+    An empty query returns the first names in sorted order.
+    Returns the reason for failure, if it fails.
+    """
+    storage = StorageManagerFactory.get_configured_storage_manager()
+    try:
+        if query.strip() == "":
+            return Success(storage.list_names(limit=limit))
+        return Success(storage.search_names(query, limit))
+    except NotFoundError as err:
+        return Failure(err.message)
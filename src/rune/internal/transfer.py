@@ -0,0 +1,132 @@
+from typing import Iterable, Iterator, Optional, Set, TextIO, Tuple
+
+from rune.encryption import factory as EncryptionFactory
+from rune.encryption.keycache import DerivedKeyCache, get_configured_key_cache
+from rune.exception.notfounderror import NotFoundError
+from rune.exception.wrongencryption import WrongEncryptionMode
+from rune.exception.wrongkey import WrongKeyUsed
+from rune.models.result import Failure, Result, Success
+from rune.models.secret import Secret, SecretHeader
+from rune.storage import factory as StorageManagerFactory
+from rune.storage.transaction import Transaction
+from rune.utils.concurrency import parallel_imap
+from rune.utils.input import split_name_and_ns
+from rune.utils.settings import get_settings
+from rune.utils.transfer import SecretEntry, write_secrets
+from rune.utils.profiling import timed
+
+BATCH_KEY_TTL_SECONDS = 60
+
+@timed
+def import_secrets(entries: Iterable[SecretEntry], key: str, overwrite: bool = False) -> Result[int]:
+    """
+    Encrypts (full name, fields) entries with the configured encrypter on the configured
+    number of workers as they are read, and stores them all with a single batched write.
+
+    Fails without storing anything if a secret already exists, unless `overwrite` is set;
+    overwritten secrets get the imported fields and keep their tags and metadata.
+    A name appearing more than once keeps its last fields.
+
+    Returns the number of secrets imported.
+    """
+    storage = StorageManagerFactory.get_configured_storage_manager()
+    try:
+        encrypter = EncryptionFactory.get_configured_encrypter()
+    except ValueError as err:
+        return Failure(str(err))
+
+    imported: Set[str] = set()
+    conflicts: Set[str] = set()
+    problem: Optional[str] = None
+
+    def read(transaction: Transaction, stored: Set[str]) -> Iterator[Tuple[SecretEntry, Optional[Secret]]]:
+        """
+        Yields each entry with the secret it replaces, until the first conflict (after which
+        entries are only checked for more conflicts) or unreadable entry.
+        """
+        nonlocal problem
+        try:
+            for full_name, fields in entries:
+                full_name = full_name.strip("/")
+                if full_name == "" or not fields:
+                    problem = f"Secret '{full_name}' needs a name and at least one field."
+                    return
+                imported.add(full_name)
+                if full_name in stored and not overwrite:
+                    conflicts.add(full_name)
+                if conflicts:
+                    continue
+                existing = transaction.get(*split_name_and_ns(full_name)) if full_name in stored else None
+                yield (full_name, fields), existing
+        except (OSError, ValueError) as err:
+            problem = f"Could not read the secrets to import: {err}"
+
+    def encrypt(item: Tuple[SecretEntry, Optional[Secret]]) -> Secret:
+        (full_name, fields), existing = item
+        encrypted = encrypter.encrypt_fields(fields, key)
+        if existing is not None:
+            return existing.update(
+                algorithm = encrypter._encryption_algorithm,
+                fields = encrypted,
+                version = encrypter.envelope_version
+            )
+        name, namespace = split_name_and_ns(full_name)
+        return Secret(
+            name = name,
+            namespace = namespace,
+            algorithm = encrypter._encryption_algorithm,
+            fields = encrypted,
+            version = encrypter.envelope_version
+        )
+
+    try:
+        with storage.transaction() as transaction:
+            stored = set(transaction.names())
+            for secret in parallel_imap(encrypt, read(transaction, stored), get_settings().workers):
+                transaction.put(secret)
+
+            if problem is not None:
+                return Failure(problem)
+            if conflicts:
+                listed = sorted(conflicts)
+                names = ", ".join(listed[:5]) + (", ..." if len(listed) > 5 else "")
+                return Failure(f"{len(listed)} secret(s) already exist ({names}). Use --overwrite to replace them.")
+            if not imported:
+                return Failure("There are no secrets to import.")
+            if not transaction.commit():
+                return Failure("Storage manager could not store the imported secrets.")
+    except NotFoundError as err:
+        return Failure(err.message)
+    return Success(len(imported))
+
+@timed
+def export_secrets(out: TextIO, output_format: str, key: str, prefix: str = "") -> Result[int]:
+    """
+    Decrypts the secrets under `prefix` on the configured number of workers and writes them
+    to `out` in `output_format` as they are decrypted, so the vault is never held in memory.
+    Each distinct salt's key is derived once.
+
+    Returns the number of secrets exported. On failure, `out` may hold a partial export.
+    """
+    storage = StorageManagerFactory.get_configured_storage_manager()
+    key_cache = get_configured_key_cache()
+    batch_cache = key_cache or DerivedKeyCache(ttl_seconds=BATCH_KEY_TTL_SECONDS)
+
+    def decrypt(header: SecretHeader) -> SecretEntry:
+        try:
+            return header.full_name, EncryptionFactory.decrypt_fields(header.fields, key, batch_cache)
+        except (WrongEncryptionMode, WrongKeyUsed) as err:
+            raise WrongKeyUsed(f"{header.full_name}: {err.message}")
+
+    def decrypted() -> Iterator[SecretEntry]:
+        yield from parallel_imap(decrypt, storage.iter_headers(prefix), get_settings().workers)
+
+    try:
+        return Success(write_secrets(out, decrypted(), output_format))
+    except (WrongKeyUsed, ValueError) as err:
+        return Failure(str(err))
+    except NotFoundError as err:
+        return Failure(err.message)
+    finally:
+        if key_cache is None:
+            batch_cache.clear()
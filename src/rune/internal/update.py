@@ -1,52 +1,53 @@
 from typing import Dict
 from rune.encryption import factory as EncryptionFactory
 from rune.exception.notfounderror import NotFoundError
+from rune.exception.wrongencryption import WrongEncryptionMode
 from rune.exception.wrongkey import WrongKeyUsed
 from rune.models.result import Failure, Result, Success
 from rune.storage import factory as StorageManagerFactory
+from rune.utils.profiling import timed
 
+@timed
 def update_secret(name: str, fields: Dict[str, str], key: str, namespace: str = "") -> Result[None]:
     """
     Encrypts a secret with the configured encrypter.
     Updates the encrypted secret (if it exists) with the configured storage manager.
 
+    All fields are re-encrypted together, so the updated secret uses a single key envelope.
+
     Returns the result.
     """
     storage = StorageManagerFactory.get_configured_storage_manager()
-
     try:
-        original_secret = storage.retreive_secret(name, namespace)
-        decrypted_fields = {}
-        if original_secret is not None:
-            for name, field in original_secret.fields.items():
-                encrypter = EncryptionFactory.get_encrypter(field.algorithm)
-                decrypted_fields[name] = encrypter.decrypt(field, key)
-        else:
-            return Failure(f"Secret '{name}' does not exist. You can create it with `rune add -n {name}`.")
-    except WrongKeyUsed as err:
-        return Failure(f"You have to use the same key to update a secret.")
-
-    encrypter = EncryptionFactory.get_configured_encrypter()
-    provided_encrypted_fields = {name: encrypter.encrypt(secret, key) for name, secret in fields.items()}
+        encrypter = EncryptionFactory.get_configured_encrypter()
+    except ValueError as err:
+        return Failure(str(err))
 
-    encrypted_fields = {}
-    for name, f in original_secret.fields.items():
-        encrypted_fields[name] = provided_encrypted_fields.get(name) or f
-
-    for name, f in provided_encrypted_fields.items():
-        if name not in original_secret.fields:
-            encrypted_fields[name] = f
-
-    model = original_secret.update(
-        algorithm = encrypter._encryption_algorithm,
-        fields = encrypted_fields
-    )
     try:
-        if storage.store_secret(model):
-            return Success()
-        else:
-            return Failure(f"Storage manager could not store the secret {name}.")
+        # Read, re-encrypted and written under one transaction, so no concurrent write is lost.
+        with storage.transaction() as transaction:
+            original_secret = transaction.get(name, namespace)
+            if original_secret is None:
+                return Failure(f"Secret '{name}' does not exist. You can create it with `rune add -n {name}`.")
+            try:
+                decrypted_fields = EncryptionFactory.decrypt_fields(original_secret.fields, key)
+            except WrongKeyUsed:
+                return Failure("You have to use the same key to update a secret.")
+            except WrongEncryptionMode as err:
+                return Failure(err.message)
+
+            updated_fields = {**decrypted_fields, **fields}
+            encrypted_fields = encrypter.encrypt_fields(updated_fields, key)
+
+            transaction.put(original_secret.update(
+                algorithm = encrypter._encryption_algorithm,
+                fields = encrypted_fields,
+                version = encrypter.envelope_version
+            ))
+            if transaction.commit():
+                return Success()
+            else:
+                return Failure(f"Storage manager could not store the secret {name}.")
 
     except NotFoundError as err:
         return Failure(err.message)
-
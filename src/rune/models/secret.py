@@ -1,25 +1,47 @@
-from typing import Self, Dict, Optional, List
+from typing import Any, Self, Dict, Optional, List
 from dataclasses import dataclass, field
-import uuid
+import base64
 from datetime import datetime
 
-@dataclass
+# Binary values of a field (ciphertext, nonce, tag, salt) are stored as base64 text in JSON,
+# but a binary encoding may hand them over as the raw bytes instead. Either form is accepted
+# wherever a SecretField is read; `as_bytes` and `as_text` convert between the two losslessly.
+Binary = str | bytes | memoryview
+
+def as_bytes(value: Optional[Binary]) -> bytes | memoryview:
+    if value is None:
+        return b""
+    if isinstance(value, str):
+        return base64.b64decode(value)
+    return value
+
+def as_text(value: Optional[Binary]) -> Optional[str]:
+    if value is None or isinstance(value, str):
+        return value
+    return base64.b64encode(value).decode()
+
+def new_id() -> str:
+    # uuid is only imported when a secret is actually created.
+    import uuid
+    return str(uuid.uuid4())
+
+@dataclass(slots=True)
 class SecretField:
-    ciphertext: str
-    nonce: Optional[str] = None
-    tag: Optional[str] = None
-    salt: Optional[str] = None
+    ciphertext: Binary
+    nonce: Optional[Binary] = None
+    tag: Optional[Binary] = None
+    salt: Optional[Binary] = None
     algorithm: Optional[str] = None
-    params: Dict[str, str] = field(default_factory=dict)
+    params: Dict[str, Any] = field(default_factory=dict)
 
     version: int = 1
 
     def to_dict(self) -> Dict:
         return {
-            "ciphertext": self.ciphertext,
-            "nonce": self.nonce,
-            "tag": self.tag,
-            "salt": self.salt,
+            "ciphertext": as_text(self.ciphertext),
+            "nonce": as_text(self.nonce),
+            "tag": as_text(self.tag),
+            "salt": as_text(self.salt),
             "algorithm": self.algorithm,
             "params": self.params,
             "version": self.version
@@ -27,17 +49,18 @@ class SecretField:
 
     @classmethod
     def from_dict(cls, data: Dict) -> Self:
+        get = data.get
         return cls(
-            ciphertext=data["ciphertext"],
-            nonce=data.get("nonce"),
-            tag=data.get("tag"),
-            salt=data.get("salt"),
-            algorithm=data.get("algorithm"),
-            params=data.get("params", {}),
-            version=data.get("version", 1)
+            data["ciphertext"],
+            get("nonce"),
+            get("tag"),
+            get("salt"),
+            get("algorithm"),
+            get("params") or {},
+            get("version", 1)
         )
 
-@dataclass
+@dataclass(slots=True)
 class Secret:
     name: str
     algorithm: str
@@ -47,7 +70,7 @@ class Secret:
     metadata: Dict[str, str] = field(default_factory=dict)
     created_at: datetime = field(default_factory=datetime.now)
     updated_at: datetime = field(default_factory=datetime.now)
-    id: str = field(default_factory=lambda: str(uuid.uuid4()))
+    id: str = field(default_factory=new_id)
 
     version: int = 1
 
@@ -79,6 +102,7 @@ class Secret:
         return self.namespace + "/" + self.name
 
     def to_dict(self) -> Dict:
+        created_at = self.created_at.isoformat()
         return {
             "id": self.id,
             "name": self.name,
@@ -87,24 +111,116 @@ class Secret:
             "fields": {k: v.to_dict() for k, v in self.fields.items()},
             "tags": self.tags,
             "metadata": self.metadata,
-            "created_at": self.created_at.isoformat(),
-            "updated_at": self.updated_at.isoformat(),
+            "created_at": created_at,
+            "updated_at": created_at if self.updated_at == self.created_at else self.updated_at.isoformat(),
             "version": self.version
         }
 
     @classmethod
     def from_dict(cls, data: Dict) -> Self:
-        fields = {k: SecretField.from_dict(v) for k, v in data.get("fields", {}).items()}
+        """
+        Builds a secret from its stored dict. Missing ids and timestamps are only generated
+        when actually missing, and a secret never updated parses its timestamp once.
+        """
+        get = data.get
+        created = get("created_at")
+        updated = get("updated_at")
+        now = datetime.now() if created is None or updated is None else None
+        created_at = now if created is None else datetime.fromisoformat(created)
+        if updated is None:
+            updated_at = now
+        elif updated == created:
+            updated_at = created_at
+        else:
+            updated_at = datetime.fromisoformat(updated)
+
+        field_from_dict = SecretField.from_dict
         return cls(
-            id=data.get("id", str(uuid.uuid4())),
-            name=data["name"],
-            algorithm=data["algorithm"],
-            namespace=data.get("namespace", ""),
-            fields=fields,
-            tags=data.get("tags", []),
-            metadata=data.get("metadata", {}),
-            created_at=datetime.fromisoformat(data.get("created_at", datetime.now().isoformat())),
-            updated_at=datetime.fromisoformat(data.get("updated_at", datetime.now().isoformat())),
-            version=data.get("version", 1)
+            data["name"],
+            data["algorithm"],
+            get("namespace", ""),
+            {k: field_from_dict(v) for k, v in (get("fields") or {}).items()},
+            get("tags") or [],
+            get("metadata") or {},
+            created_at,
+            updated_at,
+            get("id") or new_id(),
+            get("version", 1)
         )
 
+
+
+class SecretHeader:
+    """
+    Read-only view of a stored secret for listing and searching.
+
+    Wraps the raw stored dict: name, namespace and tags are plain lookups, while
+    timestamps and fields are only decoded (and then cached) on first access.
+    """
+    __slots__ = ("_data", "_fields", "_created_at", "_updated_at")
+
+    def __init__(self, data: Dict[str, Any]) -> None:
+        self._data = data
+        self._fields: Optional[Dict[str, SecretField]] = None
+        self._created_at: Optional[datetime] = None
+        self._updated_at: Optional[datetime] = None
+
+    @property
+    def id(self) -> Optional[str]:
+        return self._data.get("id")
+
+    @property
+    def name(self) -> str:
+        return self._data["name"]
+
+    @property
+    def namespace(self) -> str:
+        return self._data.get("namespace", "")
+
+    @property
+    def algorithm(self) -> str:
+        return self._data["algorithm"]
+
+    @property
+    def tags(self) -> List[str]:
+        return self._data.get("tags", [])
+
+    @property
+    def metadata(self) -> Dict[str, str]:
+        return self._data.get("metadata", {})
+
+    @property
+    def version(self) -> int:
+        return self._data.get("version", 1)
+
+    @property
+    def full_name(self) -> str:
+        namespace = self.namespace
+        if namespace == "":
+            return self.name
+        return namespace + "/" + self.name
+
+    @property
+    def created_at(self) -> Optional[datetime]:
+        if self._created_at is None and "created_at" in self._data:
+            self._created_at = datetime.fromisoformat(self._data["created_at"])
+        return self._created_at
+
+    @property
+    def updated_at(self) -> Optional[datetime]:
+        if self._updated_at is None and "updated_at" in self._data:
+            self._updated_at = datetime.fromisoformat(self._data["updated_at"])
+        return self._updated_at
+
+    @property
+    def fields(self) -> Dict[str, SecretField]:
+        if self._fields is None:
+            self._fields = {k: SecretField.from_dict(v) for k, v in self._data.get("fields", {}).items()}
+        return self._fields
+
+    def to_secret(self) -> Secret:
+        return Secret.from_dict(self._data)
+
+    @classmethod
+    def from_secret(cls, secret: Secret) -> Self:
+        return cls(secret.to_dict())
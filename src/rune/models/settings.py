@@ -0,0 +1,111 @@
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional, Self
+
+@dataclass(slots=True, frozen=True)
+class StorageSettings:
+    mode: str
+    file: str
+    # Write the JSON vault without indentation.
+    compact: bool = False
+    # How secrets are encoded: "json" or "binary". With sqlite and journal this only applies to
+    # new secrets; those already stored are read back in either encoding.
+    # With local, "binary" switches to a different file format (LocalBinaryStorageManager):
+    # pointing it at an existing JSON vault fails with "is not a rune binary vault" until
+    # the vault is converted with `rune convert`.
+    encoding: str = "json"
+
+    def to_dict(self) -> Dict:
+        return {"mode": self.mode, "file": self.file, "compact": self.compact, "encoding": self.encoding}
+
+    @classmethod
+    def from_dict(cls, data: Dict, defaults: Self) -> Self:
+        return cls(
+            mode=data.get("mode", defaults.mode),
+            file=data.get("file", defaults.file),
+            compact=bool(data.get("compact", defaults.compact)),
+            encoding=data.get("encoding", defaults.encoding)
+        )
+
+@dataclass(slots=True, frozen=True)
+class KeyCacheSettings:
+    enabled: bool = False
+    max_entries: int = 32
+    ttl_seconds: float = 300
+
+    def to_dict(self) -> Dict:
+        return {"enabled": self.enabled, "max_entries": self.max_entries, "ttl_seconds": self.ttl_seconds}
+
+    @classmethod
+    def from_dict(cls, data: Dict, defaults: Self) -> Self:
+        return cls(
+            enabled=bool(data.get("enabled", defaults.enabled)),
+            max_entries=int(data.get("max_entries", defaults.max_entries)),
+            ttl_seconds=float(data.get("ttl_seconds", defaults.ttl_seconds))
+        )
+
+@dataclass(slots=True, frozen=True)
+class AgentSettings:
+    socket: Optional[str] = None
+    idle_timeout: float = 900
+
+    def to_dict(self) -> Dict:
+        return {"socket": self.socket, "idle_timeout": self.idle_timeout}
+
+    @classmethod
+    def from_dict(cls, data: Dict, defaults: Self) -> Self:
+        return cls(
+            socket=data.get("socket", defaults.socket),
+            idle_timeout=float(data.get("idle_timeout", defaults.idle_timeout))
+        )
+
+@dataclass(slots=True, frozen=True)
+class KdfSettings:
+    # Key derivation for newly encrypted secrets; existing secrets keep the KDF recorded with them.
+    name: str = "pbkdf2-sha256"
+    # Cost parameters for `name` (e.g. "iterations", or "n"/"r"/"p" for scrypt); missing ones use the KDF's defaults.
+    params: Dict[str, Any] = field(default_factory=dict)
+
+    def to_dict(self) -> Dict:
+        return {"name": self.name, "params": dict(self.params)}
+
+    @classmethod
+    def from_dict(cls, data: Dict, defaults: Self) -> Self:
+        return cls(
+            name=data.get("name", defaults.name),
+            params=dict(data.get("params", defaults.params))
+        )
+
+@dataclass(slots=True, frozen=True)
+class Settings:
+    encryption: str
+    storage: StorageSettings
+    key_cache: KeyCacheSettings = KeyCacheSettings()
+    agent: AgentSettings = AgentSettings()
+    kdf: KdfSettings = KdfSettings()
+    # Threads used for key derivation and decryption; 0 means one per CPU.
+    workers: int = 0
+
+    def to_dict(self) -> Dict:
+        return {
+            "encryption": self.encryption,
+            "storage": self.storage.to_dict(),
+            "key_cache": self.key_cache.to_dict(),
+            "agent": self.agent.to_dict(),
+            "kdf": self.kdf.to_dict(),
+            "workers": self.workers
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict, defaults: Self) -> Self:
+        """
+        Builds settings from a (possibly partial, older) settings dict,
+        taking anything missing from `defaults`.
+        """
+        return cls(
+            encryption=data.get("encryption", defaults.encryption),
+            storage=StorageSettings.from_dict(data.get("storage", {}), defaults.storage),
+            key_cache=KeyCacheSettings.from_dict(data.get("key_cache", {}), defaults.key_cache),
+            agent=AgentSettings.from_dict(data.get("agent", {}), defaults.agent),
+            kdf=KdfSettings.from_dict(data.get("kdf", {}), defaults.kdf),
+            workers=int(data.get("workers", defaults.workers))
+        )
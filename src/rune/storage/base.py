@@ -1,7 +1,12 @@
 from abc import ABC, abstractmethod
-from typing import List, Optional
+from contextlib import contextmanager, nullcontext
+from typing import Callable, ContextManager, Dict, Iterable, Iterator, List, Optional, Set
 
-from rune.models.secret import Secret
+from rune.models.secret import Secret, SecretHeader
+from rune.storage.fuzzy import rank
+from rune.storage.nameindex import matches_prefix
+from rune.storage.tagindex import secret_terms
+from rune.storage.transaction import Transaction
 
 class StorageManager(ABC):
     @abstractmethod
@@ -14,6 +19,17 @@ class StorageManager(ABC):
         """
         raise NotImplementedError()
 
+    def store_secrets(self, secrets: Iterable[Secret]) -> bool:
+        """
+        Stores several secrets (adding or replacing them by full name) in one write.
+
+        Returns True if every secret was stored, False otherwise.
+        Storage managers should override this to write the batch at once;
+        this fallback stores the secrets one at a time.
+        Raises NotFoundError if it fails to find a secrets file.
+        """
+        return all([self.store_secret(secret) for secret in secrets])
+
     @abstractmethod
     def retreive_secret(self, name: str, namespace: str)-> Optional[Secret]:
         """
@@ -42,4 +58,95 @@ class StorageManager(ABC):
         """
         raise NotImplementedError()
 
+    @contextmanager
+    def transaction(self) -> Iterator[Transaction]:
+        """
+        Opens a unit of work: reads through it are loaded once, writes are buffered
+        and applied atomically by `commit()`, and nobody else can write in between.
+        Leaving the block without committing discards the writes.
 
+        Raises NotFoundError if it fails to find a secrets file.
+        """
+        with self.locked():
+            yield Transaction(self)
+
+    def locked(self) -> ContextManager:
+        """
+        Holds the storage manager's write lock (and any snapshot) for a transaction.
+        Storage managers with a lock should override this; by default there is none.
+        """
+        return nullcontext()
+
+    def apply_changes(self, puts: List[Secret], deletes: Set[str]) -> bool:
+        """
+        Stores `puts` and deletes the secrets whose full names are in `deletes`, as one
+        atomic change, for a transaction holding `locked()`.
+
+        Returns True if every change was applied, False otherwise.
+        Storage managers should override this to apply the changes at once;
+        this fallback applies them one at a time.
+        Raises NotFoundError if it fails to find a secrets file.
+        """
+        stored = self.store_secrets(puts) if puts else True
+        for full_name in deletes:
+            namespace, _, name = full_name.rpartition("/")
+            stored = self.delete_secret(name, namespace) and stored
+        return stored
+
+    def rewrite_secrets(self, transform: Callable[[Iterator[Secret]], Iterable[Secret]]) -> bool:
+        """
+        Streams every secret through `transform` and stores the secrets it yields in their place,
+        as a single atomic change: if `transform` raises (or writing fails), the vault is left as it was.
+        `transform` must yield each secret it receives, under the same name.
+
+        Returns True if the vault was rewritten, False otherwise.
+        Storage managers should override this to make the rewrite atomic; this fallback
+        stores the secrets one at a time.
+        Raises NotFoundError if it fails to find a secrets file.
+        """
+        rewritten = list(transform(iter(self.get_all_secrets())))
+        return all([self.store_secret(secret) for secret in rewritten])
+
+    def list_names(self, prefix: str = "", offset: int = 0, limit: Optional[int] = None) -> List[str]:
+        """
+        Retrieves the sorted full names of the secrets in the namespace subtree under `prefix`,
+        skipping the first `offset` and returning at most `limit` of them.
+
+        Storage managers with an index should override this to avoid loading every secret.
+        Raises NotFoundError if it fails to retreive entries.
+        """
+        names = sorted(s.full_name for s in self.get_all_secrets() if matches_prefix(s.full_name, prefix))
+        return names[offset:] if limit is None else names[offset:offset + limit]
+
+    def iter_headers(self, prefix: str = "") -> Iterator[SecretHeader]:
+        """
+        Yields lightweight headers of the secrets under `prefix`, for listing and searching
+        without materializing every Secret. Fields are decoded lazily on access.
+
+        Storage managers should override this to build headers straight from stored data.
+        Raises NotFoundError if it fails to retreive entries.
+        """
+        for secret in self.get_all_secrets():
+            if matches_prefix(secret.full_name, prefix):
+                yield SecretHeader.from_secret(secret)
+
+    def find_names(self, tags: List[str], metadata: Dict[str, str]) -> List[str]:
+        """
+        Retrieves the sorted full names of the secrets carrying every tag in `tags`
+        and every key/value pair in `metadata`.
+
+        Storage managers should override this to answer from an inverted index.
+        Raises NotFoundError if it fails to retreive entries.
+        """
+        terms = secret_terms(tags, metadata)
+        return sorted(h.full_name for h in self.iter_headers() if terms <= secret_terms(h.tags, h.metadata))
+
+    def search_names(self, query: str, limit: int = 10) -> List[str]:
+        """
+        Retrieves up to `limit` full names fuzzily matching `query`, best match first.
+
+        Storage managers should override this to shortlist candidates from a trigram index
+        instead of scoring every name.
+        Raises NotFoundError if it fails to retreive entries.
+        """
+        return rank(query, self.list_names(), limit)
@@ -0,0 +1,150 @@
+import base64
+import binascii
+import json
+import struct
+from typing import Any, Dict, List, Optional
+
+from rune.models.secret import Binary, Secret
+
+# Binary encoding of one secret, an alternative to its JSON dict:
+#
+#   HEADER (format version, length of the JSON part), the JSON part, the raw bytes part
+#
+# The JSON part is a compact array holding everything but the raw bytes:
+#   [id, name, namespace, algorithm, created_at, updated_at, tags, metadata, version, params, fields]
+# `params` lists the distinct KDF params of the fields (usually just one), and each field is
+#   [name, version, algorithm, index into params, ciphertext, nonce, tag, salt]
+# Ciphertext, nonce, tag and salt are stored as raw bytes whenever they are canonical base64
+# (a third smaller than the text, and no base64 on decryption); in the JSON part they are
+# then replaced by their length, and their bytes follow one after another in the raw part.
+# Values that are not base64 (or are None) stay in the JSON part as they are.
+#
+# Keeping the structure in one JSON document lets the C JSON decoder do the parsing, which
+# is much faster than unpacking values one by one in Python.
+# The first byte is FORMAT_VERSION, so an encoded secret never looks like a JSON object.
+
+FORMAT_VERSION = 1
+
+HEADER = struct.Struct("<BI")
+
+_encoder = json.JSONEncoder(separators=(",", ":"), ensure_ascii=False)
+
+
+def encode_secret(secret: Secret) -> bytes:
+    raw_parts: List[bytes] = []
+    params: List[Dict[str, Any]] = []
+
+    def binary(value: Optional[Binary]) -> str | int | None:
+        if value is None:
+            return None
+        raw = raw_bytes(value)
+        if raw is None:
+            return value
+        raw_parts.append(raw)
+        return len(raw)
+
+    def params_index(field_params: Dict[str, Any]) -> int:
+        if field_params not in params:
+            params.append(field_params)
+        return params.index(field_params)
+
+    fields = [
+        [name, field.version, field.algorithm, params_index(field.params),
+         binary(field.ciphertext), binary(field.nonce), binary(field.tag), binary(field.salt)]
+        for name, field in secret.fields.items()
+    ]
+    document = _encoder.encode([
+        secret.id, secret.name, secret.namespace, secret.algorithm,
+        secret.created_at.isoformat(), secret.updated_at.isoformat(),
+        secret.tags, secret.metadata, secret.version, params, fields
+    ]).encode()
+    return b"".join([HEADER.pack(FORMAT_VERSION, len(document)), document, *raw_parts])
+
+def decode_secret(buffer: bytes | memoryview, copy: bool = True) -> Dict[str, Any]:
+    """
+    Decodes an encoded secret into the same dict `Secret.to_dict()` returns, except that
+    raw field values are bytes. With `copy=False` they are memoryview slices of `buffer`
+    instead, which keep it alive (and, for an mmap, open) for as long as they are referenced.
+    Fields with the same params share one params dict.
+
+    Raises ValueError if `buffer` is not an encoded secret.
+    """
+    view = memoryview(buffer)
+    # Slicing bytes copies in one step; slicing the view doesn't copy at all.
+    source = buffer if copy and isinstance(buffer, bytes) else view
+    try:
+        format_version, document_length = HEADER.unpack_from(view, 0)
+        if format_version != FORMAT_VERSION:
+            raise ValueError(f"Unsupported secret encoding {format_version}")
+        position = HEADER.size + document_length
+        secret_id, name, namespace, algorithm, created_at, updated_at, tags, metadata, version, params, encoded_fields = \
+            json.loads(bytes(view[HEADER.size:position]))
+
+        fields: Dict[str, Dict[str, Any]] = {}
+        for field_name, field_version, field_algorithm, params_index, ciphertext, nonce, tag, salt in encoded_fields:
+            # Unrolled: this loop is the hot part of decoding.
+            if type(ciphertext) is int:
+                ciphertext, position = source[position:position + ciphertext], position + ciphertext
+            if type(nonce) is int:
+                nonce, position = source[position:position + nonce], position + nonce
+            if type(tag) is int:
+                tag, position = source[position:position + tag], position + tag
+            if type(salt) is int:
+                salt, position = source[position:position + salt], position + salt
+            fields[field_name] = {
+                "ciphertext": ciphertext,
+                "nonce": nonce,
+                "tag": tag,
+                "salt": salt,
+                "algorithm": field_algorithm,
+                "params": params[params_index],
+                "version": field_version
+            }
+    except (struct.error, TypeError, IndexError) as err:
+        raise ValueError(f"Corrupted encoded secret: {err}")
+    if position != len(view):
+        raise ValueError("Corrupted encoded secret: unexpected length")
+    if copy and source is view:
+        fields = {name: {k: bytes(v) if isinstance(v, memoryview) else v for k, v in field.items()} for name, field in fields.items()}
+    return {
+        "id": secret_id,
+        "name": name,
+        "algorithm": algorithm,
+        "namespace": namespace,
+        "fields": fields,
+        "tags": tags,
+        "metadata": metadata,
+        "created_at": created_at,
+        "updated_at": updated_at,
+        "version": version
+    }
+
+def is_encoded_secret(data: bytes | memoryview) -> bool:
+    return len(data) > 0 and data[0] == FORMAT_VERSION
+
+def raw_bytes(value: Binary) -> Optional[bytes]:
+    """
+    The bytes `value` stands for if it is raw already or canonical base64 text
+    (so that re-encoding them gives back exactly `value`), else None.
+    """
+    if not isinstance(value, str):
+        return bytes(value)
+    try:
+        raw = base64.b64decode(value, validate=True)
+    except (binascii.Error, ValueError):
+        return None
+    if base64.b64encode(raw).decode() != value:
+        return None
+    return raw
+
+def decode_stored(data: str | bytes | memoryview) -> Dict[str, Any]:
+    """
+    Decodes a stored secret in either encoding: a JSON document or an encoded secret.
+
+    Raises ValueError if it is neither.
+    """
+    if isinstance(data, str):
+        return json.loads(data)
+    if is_encoded_secret(data):
+        return decode_secret(data)
+    return json.loads(bytes(data))
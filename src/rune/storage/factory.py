@@ -1,12 +1,21 @@
-from rune.utils.settings import get_configured_storage_manager_identifier, get_secrets_path
+from rune.utils.settings import get_configured_storage_manager_identifier, get_secrets_path, get_settings
 
 
 def get_configured_storage_manager():
-    manager_identifier = get_configured_storage_manager_identifier()
+    storage = get_settings().storage
+    return get_storage_manager(get_configured_storage_manager_identifier(), get_secrets_path(), storage.encoding, storage.compact)
+
+def get_storage_manager(manager_identifier: str, secrets_file_path: str, encoding: str = "json", compact: bool = False):
     match manager_identifier:
-        case "local":
-            from rune.storage.local import LocalJsonStorageManager
-            return LocalJsonStorageManager(get_secrets_path())
+        case "sqlite":
+            from rune.storage.sqlite import SqliteStorageManager
+            return SqliteStorageManager(secrets_file_path, encoding=encoding)
+        case "journal":
+            from rune.storage.journal import JournalStorageManager
+            return JournalStorageManager(secrets_file_path, encoding=encoding)
+        case _ if encoding == "binary":
+            from rune.storage.localbinary import LocalBinaryStorageManager
+            return LocalBinaryStorageManager(secrets_file_path)
         case _:
             from rune.storage.local import LocalJsonStorageManager
-            return LocalJsonStorageManager(get_secrets_path())
+            return LocalJsonStorageManager(secrets_file_path, compact=compact)
@@ -0,0 +1,91 @@
+import os
+import tempfile
+from contextlib import contextmanager
+from typing import Iterator
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+@contextmanager
+def file_lock(path: str) -> Iterator[None]:
+    """
+    Holds an exclusive advisory lock on `<path>.lock` for the duration of the block.
+
+    Concurrent rune processes serialize their read-modify-write cycles on it.
+    On platforms without fcntl this is a no-op.
+    """
+    if fcntl is None:
+        yield
+        return
+
+    fd = os.open(path + ".lock", os.O_RDWR | os.O_CREAT, 0o600)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        yield
+    finally:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+        os.close(fd)
+
+class AtomicFile:
+    """
+    Writes a replacement for the file at `path` into a temp file next to it.
+
+    `commit()` fsyncs it and swaps it in with os.replace, so readers see either the
+    old or the new contents, never a partial write, even if the process crashes.
+    Leaving the block without committing discards the temp file.
+    """
+
+    def __init__(self, path: str, mode: str = "wb") -> None:
+        self.__path = path
+        self.__directory = os.path.dirname(os.path.abspath(path))
+        fd, self.__temp_path = tempfile.mkstemp(dir=self.__directory, prefix="." + os.path.basename(path) + ".", suffix=".tmp")
+        self.file = os.fdopen(fd, mode)
+        self.__committed = False
+
+    def commit(self) -> None:
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.file.close()
+        os.replace(self.__temp_path, self.__path)
+        self.__committed = True
+        sync_directory(self.__directory)
+
+    def discard(self) -> None:
+        self.file.close()
+        if os.path.exists(self.__temp_path):
+            os.unlink(self.__temp_path)
+
+    def __enter__(self) -> "AtomicFile":
+        return self
+
+    def __exit__(self, *_) -> None:
+        if not self.__committed:
+            self.discard()
+
+def atomic_write(path: str, data: bytes) -> None:
+    """
+    Replaces the file at `path` with `data` atomically (see AtomicFile).
+
+    Raises OSError if the write fails; the original file is left untouched.
+    """
+    with AtomicFile(path) as f:
+        f.file.write(data)
+        f.commit()
+
+def sync_directory(directory: str) -> None:
+    """
+    Flushes directory entries (e.g. after a rename) to disk, where the platform allows it.
+    """
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
@@ -0,0 +1,110 @@
+import heapq
+from typing import Dict, Iterable, List, Optional, Set
+
+from rune.storage.tagindex import PostingIndex
+
+# Candidates kept per requested result after counting shared trigrams,
+# before the (slower) fuzzy score ranks them.
+CANDIDATES_PER_RESULT = 20
+
+def trigrams(text: str) -> Set[str]:
+    """
+    Case-insensitive trigrams of `text`, padded so that its start and end form trigrams too.
+    """
+    padded = "  " + text.lower() + " "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def query_trigrams(query: str) -> Set[str]:
+    """
+    Trigrams to look up for a query. The query may match anywhere in a name,
+    so unlike indexed names it is not padded.
+    """
+    query = query.lower()
+    return {query[i:i + 3] for i in range(len(query) - 2)}
+
+def query_bigrams(query: str) -> Set[str]:
+    """
+    Bigrams of a query, used when its trigrams match nothing (typos, dropped letters):
+    every trigram starting with one of them is a candidate.
+    """
+    query = query.lower()
+    return {query[i:i + 2] for i in range(len(query) - 1)} or {query}
+
+def is_subsequence(query: str, name: str) -> bool:
+    remaining = iter(name)
+    return all(c in remaining for c in query)
+
+def fuzzy_score(query: str, name: str) -> float:
+    """
+    Scores how well `name` matches `query`: exact, prefix and substring matches first,
+    then shared trigrams and in-order characters. Shorter names win ties.
+    """
+    query, lowered = query.lower(), name.lower()
+    basename = lowered.rpartition("/")[2]
+    score = 0.0
+    if lowered == query or basename == query:
+        score += 1000
+    if basename.startswith(query):
+        score += 200
+    elif lowered.startswith(query):
+        score += 150
+    elif query in lowered:
+        score += 100
+    elif is_subsequence(query, lowered):
+        score += 30
+
+    grams = query_trigrams(query)
+    if grams:
+        score += 100 * len(grams & trigrams(lowered)) / len(grams)
+    return score - 0.1 * len(lowered)
+
+def rank(query: str, names: Iterable[str], limit: int) -> List[str]:
+    """
+    The `limit` best matches for `query` among `names`, best first, skipping names
+    that share nothing with the query.
+    """
+    scored = []
+    for name in names:
+        score = fuzzy_score(query, name)
+        # Only the length penalty left means nothing matched.
+        if score > -0.1 * len(name):
+            scored.append((score, name))
+    return [name for _, name in heapq.nsmallest(limit, scored, key=lambda s: (-s[0], s[1]))]
+
+def rank_candidates(query: str, postings: Dict[str, List[str]], limit: int) -> List[str]:
+    """
+    Ranks names from trigram posting lists: the names sharing the most trigrams
+    with the query are shortlisted, then ordered by fuzzy_score.
+    """
+    hits: Dict[str, int] = {}
+    for names in postings.values():
+        for name in names:
+            hits[name] = hits.get(name, 0) + 1
+    shortlist = heapq.nlargest(limit * CANDIDATES_PER_RESULT, hits, key=hits.__getitem__)
+    return rank(query, shortlist, limit)
+
+
+class GramIndex(PostingIndex):
+    """
+    Trigram index over secret full names, for fuzzy search (see PostingIndex).
+    """
+
+    def __init__(self, vault_path: str) -> None:
+        super().__init__(vault_path, ".grams")
+
+    def search(self, query: str, limit: int) -> Optional[List[str]]:
+        """
+        The `limit` best matches for `query`, or None if the index is missing or stale.
+        Queries that are too short or too misspelled to share a trigram with any name
+        fall back to every trigram starting with one of their bigrams.
+        """
+        postings = self.lookup(query_trigrams(query))
+        if postings is not None and not any(postings.values()):
+            for bigram in query_bigrams(query):
+                found = self.lookup_prefix(bigram)
+                if found is None:
+                    return None
+                postings.update(found)
+        if postings is None:
+            return None
+        return rank_candidates(query, postings, limit)
@@ -0,0 +1,514 @@
+import json
+import os
+import struct
+import zlib
+from contextlib import contextmanager
+from typing import BinaryIO, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from rune.exception.notfounderror import NotFoundError
+from rune.models.secret import Secret, SecretHeader
+from rune.storage.base import StorageManager
+from rune.storage.binarycodec import decode_stored, encode_secret
+from rune.storage.fileio import AtomicFile, file_lock, sync_directory
+from rune.storage.nameindex import VaultSignature, matches_prefix, vault_signature
+from rune.storage.fuzzy import GramIndex, trigrams
+from rune.storage.tagindex import TagIndex, secret_terms
+from rune.utils.profiling import timed
+
+MAGIC = b"RUNEJRN1"
+
+OP_PUT = 1
+OP_DELETE = 2
+
+# op, key length, body length, crc32 of (op + key + body)
+RECORD_HEADER = struct.Struct(">BIII")
+
+COMPACTION_MIN_DEAD_RECORDS = 64
+COMPACTION_DEAD_RATIO = 1.0
+
+class JournalStorageManager(StorageManager):
+    """
+    Append-only, log-structured storage.
+
+    Every write appends a checksummed put or delete record; an in-memory index of
+    full name -> body offset is rebuilt by scanning the journal when it is opened.
+    A record torn by a crash fails its length or checksum check, ends the scan and
+    is truncated away before the next append.
+    Every write holds the journal's lock file, and the index is rescanned whenever the
+    journal's (inode, mtime, size) no longer match the version it was built from, so
+    several processes can share one journal.
+    The journal is rewritten with only live records once dead records outnumber
+    live ones (and there are at least `compaction_min_dead` of them).
+    Record bodies are compact JSON, or with the "binary" `encoding`, struct-packed secrets.
+    """
+
+    def __init__(self,
+                 secrets_file_path: str,
+                 compaction_min_dead: int = COMPACTION_MIN_DEAD_RECORDS,
+                 compaction_ratio: float = COMPACTION_DEAD_RATIO,
+                 encoding: str = "json") -> None:
+        self.__secrets_file_path = secrets_file_path
+        self.__binary = encoding == "binary"
+        self.__compaction_min_dead = compaction_min_dead
+        self.__compaction_ratio = compaction_ratio
+        self.__index: Optional[Dict[str, Tuple[int, int]]] = None
+        self.__tag_index = TagIndex(secrets_file_path)
+        self.__gram_index = GramIndex(secrets_file_path)
+        self.__dead_records = 0
+        self.__end = 0
+        # Version of the journal the index was built from, and whether that scan held the lock.
+        self.__signature: Optional[VaultSignature] = None
+        self.__scanned_locked = False
+        self.__lock_depth = 0
+
+    def full_name(self, name: str, namespace: str) -> str:
+        if namespace == "":
+            return name
+        return namespace + "/" + name
+
+    @timed
+    def store_secret(self, secret: Secret) -> bool:
+        """
+        Stores the provided ciphertext under the provided secret name.
+
+        Returns True if storage is successful, False otherwise.
+        Raises NotFoundError if it fails to find a secrets file.
+        """
+        return self.store_secrets([secret])
+
+    @timed
+    def store_secrets(self, secrets: Iterable[Secret]) -> bool:
+        """
+        Stores several secrets with a single append (and fsync) of their put records.
+
+        Returns True if storage is successful, False otherwise.
+        Raises NotFoundError if it fails to find a secrets file.
+        """
+        with self.locked():
+            return self.apply_changes(list(secrets), set())
+
+    @contextmanager
+    def locked(self) -> Iterator[None]:
+        """
+        Holds the journal's lock file (re-entrantly), re-reading the journal first if another
+        process changed it since it was indexed, or if it ends in a torn record that was not
+        seen by a scan holding the lock (it may have been an append still in progress).
+        """
+        if self.__lock_depth > 0:
+            self.__lock_depth += 1
+            try:
+                yield
+            finally:
+                self.__lock_depth -= 1
+            return
+
+        with file_lock(self.__secrets_file_path):
+            self.__lock_depth = 1
+            try:
+                if self.__index is not None:
+                    signature = vault_signature(self.__secrets_file_path)
+                    torn_tail = signature is not None and signature[2] != self.__end
+                    if signature != self.__signature or (torn_tail and not self.__scanned_locked):
+                        self.__index = None
+                yield
+            finally:
+                self.__lock_depth = 0
+
+    @timed
+    def apply_changes(self, puts: List[Secret], deletes: Set[str]) -> bool:
+        """
+        Appends the put and delete records of a transaction with a single write and fsync.
+        The caller holds `locked()`.
+
+        Returns True if storage is successful, False otherwise.
+        Raises NotFoundError if it fails to find a secrets file.
+        """
+        index = self.index()
+        before = self.__signature
+        records = [
+            (OP_PUT, secret.full_name, self.encode(secret))
+            for secret in puts
+        ]
+        records += [(OP_DELETE, full_name, b"") for full_name in deletes if full_name in index]
+        try:
+            body_offsets = self.append_records(records)
+        except OSError:
+            return False
+
+        terms = {secret.full_name: secret_terms(secret.tags, secret.metadata) for secret in puts}
+        changes: Dict[str, Optional[Set[str]]] = {}
+        for (op, full_name, body), body_offset in zip(records, body_offsets):
+            if op == OP_DELETE:
+                del index[full_name]
+                changes[full_name] = None
+                # Both the delete record and the put it shadows are now dead.
+                self.__dead_records += 2
+                continue
+            if full_name in index:
+                self.__dead_records += 1
+            index[full_name] = (body_offset, len(body))
+            changes[full_name] = terms[full_name]
+        self.__tag_index.log_changes(before, self.__signature, changes)
+        return self.compact_if_needed()
+
+    @timed
+    def retreive_secret(self, name: str, namespace: str) -> Optional[Secret]:
+        """
+        Retreives the provided ciphertext under the provided secret name.
+
+        Raises NotFoundError if it fails to find a secrets file.
+        """
+        with self.reading() as (f, index):
+            location = index.get(self.full_name(name, namespace))
+            if location is None:
+                return None
+            return self.read_secret(f, *location)
+
+    @timed
+    def delete_secret(self, name: str, namespace: str) -> bool:
+        """
+        Deletes the entry with the provided name.
+
+        Returns True if successful, False if it fails.
+        Raises NotFoundError if it fails to find a secrets file.
+        """
+        with self.locked():
+            index = self.index()
+            full_name = self.full_name(name, namespace)
+            if full_name not in index:
+                return False
+
+            before = self.__signature
+            try:
+                self.append(OP_DELETE, full_name, b"")
+            except OSError:
+                return False
+
+            del index[full_name]
+            self.__tag_index.log_changes(before, self.__signature, {full_name: None})
+            # Both the delete record and the put it shadows are now dead.
+            self.__dead_records += 2
+            return self.compact_if_needed()
+
+    @timed
+    def get_all_secrets(self) -> List[Secret]:
+        """
+        Retrieves all entry names.
+
+        Raises NotFoundError if it fails to retreive entries.
+        """
+        with self.reading() as (f, index):
+            return [self.read_secret(f, offset, length) for offset, length in sorted(index.values())]
+
+    @timed
+    def rewrite_secrets(self, transform: Callable[[Iterator[Secret]], Iterable[Secret]]) -> bool:
+        """
+        Streams the live records through `transform` into a new journal (compacted as a side effect)
+        that is swapped in once every secret has been written; until then (or if `transform` raises)
+        the journal is untouched. Holds the lock throughout, so no write can be lost in between.
+
+        Returns True if the vault was rewritten, False otherwise.
+        Raises NotFoundError if it fails to find a secrets file.
+        """
+        new_index: Dict[str, Tuple[int, int]] = {}
+        with self.locked():
+            try:
+                with self.reading() as (src, index), AtomicFile(self.__secrets_file_path, "wb") as out:
+                    locations = sorted(index.values())
+                    out.file.write(MAGIC)
+                    end = len(MAGIC)
+                    for secret in transform(self.read_secret(src, offset, length) for offset, length in locations):
+                        key = secret.full_name.encode()
+                        body = self.encode(secret)
+                        out.file.write(encode_record(OP_PUT, key, body))
+                        new_index[secret.full_name] = (end + RECORD_HEADER.size + len(key), len(body))
+                        end += RECORD_HEADER.size + len(key) + len(body)
+                    out.commit()
+            except OSError:
+                return False
+            self.replaced(new_index, end)
+        return True
+
+    @timed
+    def list_names(self, prefix: str = "", offset: int = 0, limit: Optional[int] = None) -> List[str]:
+        """
+        Retrieves sorted full names under `prefix` from the in-memory index, without reading any record.
+
+        Raises NotFoundError if it fails to retreive entries.
+        """
+        names = sorted(n for n in self.index() if matches_prefix(n, prefix))
+        return names[offset:] if limit is None else names[offset:offset + limit]
+
+    def iter_headers(self, prefix: str = "") -> Iterator[SecretHeader]:
+        """
+        Yields lightweight headers of the secrets under `prefix`, reading only the matching records.
+
+        Raises NotFoundError if it fails to retreive entries.
+        """
+        with self.reading() as (f, index):
+            locations = sorted(location for name, location in index.items() if matches_prefix(name, prefix))
+            for offset, length in locations:
+                yield SecretHeader(self.read_body(f, offset, length))
+
+    @timed
+    def find_names(self, tags: List[str], metadata: Dict[str, str]) -> List[str]:
+        """
+        Retrieves sorted full names carrying every tag and metadata pair from the tag index
+        next to the journal.
+
+        Appends log the terms of the secrets they touch next to the index rather than rewriting
+        it (which would make every write O(N) again). The index is rebuilt from the live records
+        only when the log was not kept up, e.g. after a rewrite or once it grows long.
+        Raises NotFoundError if it fails to retreive entries.
+        """
+        terms = sorted(secret_terms(tags, metadata))
+        if not terms:
+            return self.list_names()
+        names = self.__tag_index.query(terms)
+        if names is None:
+            self.rebuild_tag_index()
+            names = self.__tag_index.query(terms)
+        if names is None:
+            return super().find_names(tags, metadata)
+        return names
+
+    @timed
+    def rebuild_tag_index(self) -> None:
+        signature = vault_signature(self.__secrets_file_path)
+        postings = [
+            (term, header.full_name)
+            for header in self.iter_headers()
+            for term in secret_terms(header.tags, header.metadata)
+        ]
+        if vault_signature(self.__secrets_file_path) == signature:
+            self.__tag_index.write(postings, signature)
+
+    @timed
+    def search_names(self, query: str, limit: int = 10) -> List[str]:
+        """
+        Retrieves the full names best matching `query`, best first, from the trigram index
+        next to the journal, rebuilt from the in-memory index on the first search after a write.
+
+        Raises NotFoundError if it fails to retreive entries.
+        """
+        names = self.__gram_index.search(query, limit)
+        if names is None:
+            self.rebuild_gram_index()
+            names = self.__gram_index.search(query, limit)
+        if names is None:
+            return super().search_names(query, limit)
+        return names
+
+    @timed
+    def rebuild_gram_index(self) -> None:
+        names = list(self.index())
+        signature = vault_signature(self.__secrets_file_path)
+        # Skip it if another process wrote since our index was built.
+        if signature is not None and signature == self.__signature:
+            self.__gram_index.write([(gram, name) for name in names for gram in trigrams(name)], signature)
+
+    def index(self) -> Dict[str, Tuple[int, int]]:
+        """
+        The live records' full name -> (body offset, length), rescanned if the journal changed.
+        Offsets are only safe to read from a file opened with `reading()`.
+        """
+        if self.__index is not None and self.__lock_depth == 0 \
+                and vault_signature(self.__secrets_file_path) != self.__signature:
+            self.__index = None
+        if self.__index is None:
+            with self.reading():
+                pass
+        return self.__index  # type: ignore[return-value]
+
+    @contextmanager
+    def reading(self) -> Iterator[Tuple[BinaryIO, Dict[str, Tuple[int, int]]]]:
+        """
+        Opens the journal together with an index of that very file: the open file keeps its
+        inode even if another process swaps in a compacted journal, so the offsets stay valid.
+        """
+        if not os.path.exists(self.__secrets_file_path) or os.path.getsize(self.__secrets_file_path) == 0:
+            with self.locked():
+                if not os.path.exists(self.__secrets_file_path) or os.path.getsize(self.__secrets_file_path) == 0:
+                    self.create_journal()
+        with self.open_journal("rb") as f:
+            if self.__index is None or file_signature(f) != self.__signature:
+                self.__index = self.scan(f)
+            yield f, self.__index
+
+    @timed
+    def scan(self, f: BinaryIO) -> Dict[str, Tuple[int, int]]:
+        """
+        Builds the index by replaying the open journal `f`, stopping at the first torn or corrupt record.
+        """
+        index: Dict[str, Tuple[int, int]] = {}
+        dead = 0
+        signature = file_signature(f)
+        f.seek(0)
+        if f.read(len(MAGIC)) != MAGIC:
+            raise NotFoundError(f"Secrets file at {self.__secrets_file_path} is not a rune journal")
+        end = len(MAGIC)
+        while True:
+            header = f.read(RECORD_HEADER.size)
+            if len(header) < RECORD_HEADER.size:
+                break
+            op, key_length, body_length, checksum = RECORD_HEADER.unpack(header)
+            key = f.read(key_length)
+            body = f.read(body_length)
+            if len(key) < key_length or len(body) < body_length:
+                break
+            if record_checksum(op, key, body) != checksum:
+                break
+
+            full_name = key.decode()
+            if full_name in index:
+                dead += 1
+            if op == OP_PUT:
+                index[full_name] = (end + RECORD_HEADER.size + key_length, body_length)
+            elif op == OP_DELETE:
+                index.pop(full_name, None)
+                dead += 1
+            end += RECORD_HEADER.size + key_length + body_length
+
+        self.__dead_records = dead
+        self.__end = end
+        self.__signature = signature
+        self.__scanned_locked = self.__lock_depth > 0
+        return index
+
+    def append(self, op: int, full_name: str, body: bytes) -> int:
+        """
+        Appends one record and syncs it to disk. Returns the offset of its body.
+        """
+        return self.append_records([(op, full_name, body)])[0]
+
+    @timed
+    def append_records(self, records: List[Tuple[int, str, bytes]]) -> List[int]:
+        """
+        Appends (op, full name, body) records with one write and one fsync.
+        Returns the offset of each record's body. The caller holds `locked()`, whose
+        checks guarantee anything past the indexed end is a torn record.
+        """
+        encoded = bytearray()
+        body_offsets = []
+        for op, full_name, body in records:
+            key = full_name.encode()
+            body_offsets.append(self.__end + len(encoded) + RECORD_HEADER.size + len(key))
+            encoded += encode_record(op, key, body)
+
+        with self.open_journal("r+b") as f:
+            # Drops a torn tail left behind by an interrupted append.
+            f.truncate(self.__end)
+            f.seek(self.__end)
+            f.write(encoded)
+            f.flush()
+            os.fsync(f.fileno())
+            self.__signature = file_signature(f)
+
+        self.__end += len(encoded)
+        return body_offsets
+
+    def compact_if_needed(self) -> bool:
+        live_records = len(self.index())
+        if self.__dead_records < self.__compaction_min_dead:
+            return True
+        if self.__dead_records < live_records * self.__compaction_ratio:
+            return True
+        return self.compact()
+
+    @timed
+    def compact(self) -> bool:
+        """
+        Rewrites the journal with only live records and atomically swaps it in.
+        """
+        temp_path = self.__secrets_file_path + ".compact"
+        new_index: Dict[str, Tuple[int, int]] = {}
+        with self.locked():
+            try:
+                with self.reading() as (src, index), open(temp_path, "wb") as dst:
+                    before = self.__signature
+                    dst.write(MAGIC)
+                    end = len(MAGIC)
+                    for full_name, (offset, length) in sorted(index.items(), key=lambda item: item[1]):
+                        src.seek(offset)
+                        body = src.read(length)
+                        key = full_name.encode()
+                        dst.write(encode_record(OP_PUT, key, body))
+                        new_index[full_name] = (end + RECORD_HEADER.size + len(key), length)
+                        end += RECORD_HEADER.size + len(key) + length
+                    dst.flush()
+                    os.fsync(dst.fileno())
+                os.replace(temp_path, self.__secrets_file_path)
+                sync_directory(os.path.dirname(os.path.abspath(self.__secrets_file_path)))
+            except OSError:
+                if os.path.exists(temp_path):
+                    os.unlink(temp_path)
+                return False
+            self.replaced(new_index, end)
+            # Same secrets in a new file: the tag index stays current.
+            self.__tag_index.log_changes(before, self.__signature, {})
+        return True
+
+    def replaced(self, index: Dict[str, Tuple[int, int]], end: int) -> None:
+        """
+        Adopts the index of a journal this instance just swapped in, while holding the lock.
+        """
+        self.__index = index
+        self.__dead_records = 0
+        self.__end = end
+        self.__signature = vault_signature(self.__secrets_file_path)
+        self.__scanned_locked = True
+
+    def create_journal(self) -> None:
+        """
+        Creates the journal readable only by its owner, or writes the header into an
+        empty file that already exists there (keeping its permissions).
+        """
+        try:
+            try:
+                fd = os.open(self.__secrets_file_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o600)
+            except FileExistsError:
+                fd = os.open(self.__secrets_file_path, os.O_WRONLY | os.O_TRUNC)
+            with os.fdopen(fd, "wb") as f:
+                f.write(MAGIC)
+                f.flush()
+                os.fsync(f.fileno())
+        except OSError:
+            raise NotFoundError(f"Secrets file at {self.__secrets_file_path} could not be created")
+
+    def open_journal(self, mode: str):
+        try:
+            return open(self.__secrets_file_path, mode)
+        except OSError:
+            raise NotFoundError(f"Secrets file at {self.__secrets_file_path} not found")
+
+    def read_secret(self, f: BinaryIO, offset: int, length: int) -> Secret:
+        try:
+            return Secret.from_dict(self.read_body(f, offset, length))
+        except (KeyError, AttributeError, TypeError, ValueError):
+            raise NotFoundError(f"Secrets file at {self.__secrets_file_path} is corrupted")
+
+    def read_body(self, f: BinaryIO, offset: int, length: int) -> Dict:
+        f.seek(offset)
+        try:
+            return decode_stored(f.read(length))
+        except ValueError:
+            raise NotFoundError(f"Secrets file at {self.__secrets_file_path} is corrupted")
+
+    def encode(self, secret: Secret) -> bytes:
+        if self.__binary:
+            return encode_secret(secret)
+        return json.dumps(secret.to_dict(), separators=(",", ":")).encode()
+
+
+def file_signature(f: BinaryIO) -> VaultSignature:
+    """
+    The vault signature (see `vault_signature`) of an open journal.
+    """
+    stat = os.fstat(f.fileno())
+    return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+def record_checksum(op: int, key: bytes, body: bytes) -> int:
+    return zlib.crc32(body, zlib.crc32(key, zlib.crc32(bytes([op]))))
+
+def encode_record(op: int, key: bytes, body: bytes) -> bytes:
+    return RECORD_HEADER.pack(op, len(key), len(body), record_checksum(op, key, body)) + key + body
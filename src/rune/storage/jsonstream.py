@@ -0,0 +1,163 @@
+import json
+from typing import Any, Dict, Iterator, TextIO, Tuple
+
+CHUNK_SIZE = 64 * 1024
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = " \t\n\r"
+
+
+def iter_json_object(f: TextIO, chunk_size: int = CHUNK_SIZE) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Incrementally parses a top-level JSON object of objects (the vault layout),
+    yielding one (key, value) pair at a time.
+
+    Only the entry being parsed is buffered, so memory stays proportional to the
+    largest entry rather than to the file, and callers can stop early.
+    Raises ValueError if the file is not such an object.
+    """
+    for key, value, _ in iter_json_spans(f, chunk_size):
+        yield key, value
+
+def iter_json_spans(f: TextIO, chunk_size: int = CHUNK_SIZE) -> Iterator[Tuple[str, Dict[str, Any], Tuple[int, int]]]:
+    """
+    Same as iter_json_object, also yielding the byte offset and length of each value in the file.
+    Offsets are only exact if `f` was opened as UTF-8 with newline="" (no newline translation).
+    """
+    reader = _ChunkReader(f, chunk_size)
+    reader.expect("{")
+    if reader.peek() == "}":
+        reader.advance(1)
+        reader.expect_end()
+        return
+
+    while True:
+        key = reader.decode()
+        if not isinstance(key, str):
+            raise ValueError("Expected a string key")
+        reader.expect(":")
+        reader.peek()
+        start = reader.offset()
+        value = reader.decode()
+        if not isinstance(value, dict):
+            raise ValueError(f"Expected an object for key '{key}'")
+        yield key, value, (start, reader.offset() - start)
+
+        separator = reader.peek()
+        reader.advance(1)
+        if separator == "}":
+            reader.expect_end()
+            return
+        if separator != ",":
+            raise ValueError(f"Unexpected '{separator}' in vault")
+
+
+class VaultWriter:
+    """
+    Writes a top-level JSON object one entry at a time.
+
+    The pretty layout is byte-for-byte what `json.dump(..., indent=4)` produces;
+    the compact one drops all optional whitespace.
+    """
+
+    def __init__(self, out: TextIO, compact: bool = False) -> None:
+        self.__out = out
+        self.__compact = compact
+        self.__count = 0
+        self.__position = 0
+
+    def write(self, key: str, value: Dict[str, Any]) -> Tuple[int, int]:
+        """
+        Writes one entry, returning the byte offset and length of its value in the file.
+        """
+        if self.__compact:
+            prefix = ("{" if self.__count == 0 else ",") + json.dumps(key) + ":"
+            encoded = json.dumps(value, separators=(",", ":"))
+        else:
+            prefix = ("{\n    " if self.__count == 0 else ",\n    ") + json.dumps(key) + ": "
+            encoded = json.dumps(value, indent=4).replace("\n", "\n    ")
+        self.__out.write(prefix + encoded)
+        self.__count += 1
+        # json.dumps escapes everything outside ASCII, so characters and bytes line up.
+        start = self.__position + len(prefix)
+        self.__position = start + len(encoded)
+        return start, len(encoded)
+
+    def close(self) -> None:
+        if self.__count == 0:
+            self.__out.write("{}")
+        else:
+            self.__out.write("}" if self.__compact else "\n}")
+
+
+class _ChunkReader:
+    def __init__(self, f: TextIO, chunk_size: int) -> None:
+        self.__f = f
+        self.__chunk_size = chunk_size
+        self.__buffer = ""
+        self.__position = 0
+        self.__eof = False
+        # Byte offset of the buffer's start in the file, and whether the buffer is all ASCII.
+        self.__base = 0
+        self.__ascii = True
+
+    def peek(self) -> str:
+        self.__skip_whitespace()
+        if self.__position >= len(self.__buffer):
+            raise ValueError("Unexpected end of vault")
+        return self.__buffer[self.__position]
+
+    def advance(self, count: int) -> None:
+        self.__position += count
+
+    def expect(self, token: str) -> None:
+        if self.peek() != token:
+            raise ValueError(f"Expected '{token}' in vault")
+        self.advance(1)
+
+    def offset(self) -> int:
+        """
+        Byte offset of the current position in the file, assuming it is UTF-8.
+        """
+        if self.__ascii:
+            return self.__base + self.__position
+        return self.__base + len(self.__buffer[:self.__position].encode())
+
+    def expect_end(self) -> None:
+        self.__skip_whitespace()
+        if self.__position < len(self.__buffer):
+            raise ValueError("Trailing data after vault")
+
+    def decode(self) -> Any:
+        self.__skip_whitespace()
+        read_size = self.__chunk_size
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.__buffer, self.__position)
+                self.__position = end
+                return value
+            except json.JSONDecodeError:
+                if self.__eof:
+                    raise
+                # The value continues past the buffer; read more, growing geometrically
+                # so a very large entry is re-scanned only O(log n) times.
+                self.__read(read_size)
+                read_size *= 2
+
+    def __skip_whitespace(self) -> None:
+        while True:
+            while self.__position < len(self.__buffer) and self.__buffer[self.__position] in _WHITESPACE:
+                self.__position += 1
+            if self.__position < len(self.__buffer) or self.__eof:
+                return
+            self.__read(self.__chunk_size)
+
+    def __read(self, size: int) -> None:
+        chunk = self.__f.read(size)
+        if chunk == "":
+            self.__eof = True
+        # Drop what has already been consumed so the buffer only holds the current entry.
+        self.__base = self.offset()
+        self.__buffer = self.__buffer[self.__position:] + chunk
+        self.__position = 0
+        self.__ascii = self.__buffer.isascii()
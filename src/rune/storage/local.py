@@ -1,19 +1,41 @@
-from typing import Dict, Optional, List
+import json
+import mmap
+from typing import Any, Callable, ContextManager, Dict, Iterable, Iterator, Optional, List, Set, Tuple
 from rune.exception.notfounderror import NotFoundError
-from rune.models.secret import Secret
+from rune.models.secret import Secret, SecretHeader
 from rune.storage.base import StorageManager
-from json import load, dump
+from rune.storage.fileio import AtomicFile, file_lock
+from rune.storage.jsonstream import VaultWriter, iter_json_spans
+from rune.storage.nameindex import NameIndex, VaultSignature, matches_prefix, vault_signature
+from rune.storage.fuzzy import GramIndex, trigrams
+from rune.storage.offsetindex import OffsetIndex, Span
+from rune.storage.tagindex import TagIndex, secret_terms
+from rune.utils.profiling import timed
 
 class LocalJsonStorageManager(StorageManager):
+    """
+    Stores all secrets in a single JSON object keyed by secret id.
 
-    def __init__(self, secrets_file_path: str) -> None:
+    The vault is streamed entry by entry on both reads and writes, so memory use is
+    bounded by the largest secret rather than the vault. Point lookups find their secret's
+    byte span in the offset index and read only that part of the memory-mapped vault.
+    With `compact`, the vault is written without indentation.
+    """
+
+    def __init__(self, secrets_file_path: str, compact: bool = False) -> None:
         self.__secrets_file_path = secrets_file_path
+        self.__compact = compact
+        self.__name_index = NameIndex(secrets_file_path)
+        self.__tag_index = TagIndex(secrets_file_path)
+        self.__gram_index = GramIndex(secrets_file_path)
+        self.__offset_index = OffsetIndex(secrets_file_path)
 
     def full_name(self, name: str, namespace: str) -> str:
         if namespace == "":
             return name
         return namespace + "/" + name
 
+    @timed
     def store_secret(self, secret: Secret) -> bool:
         """
         Stores the provided ciphertext under the provided secret name.
@@ -21,20 +43,62 @@ class LocalJsonStorageManager(StorageManager):
         Returns True if storage is successful, False otherwise.
         Raises NotFoundError if it fails to find a secrets file.
         """
-        secrets = self.stored_secrets_by_full_name()
-        secrets[secret.full_name] = secret
+        with file_lock(self.__secrets_file_path):
+            return self.rewrite(replace={secret.full_name: secret})
+
+    @timed
+    def store_secrets(self, secrets: Iterable[Secret]) -> bool:
+        """
+        Stores several secrets with a single rewrite of the vault.
+
+        Returns True if storage is successful, False otherwise.
+        Raises NotFoundError if it fails to find a secrets file.
+        """
+        with file_lock(self.__secrets_file_path):
+            return self.rewrite(replace={secret.full_name: secret for secret in secrets})
+
+    def locked(self) -> ContextManager:
+        """
+        Holds the lock that writers of the secrets file take for their read-modify-write cycles.
+        """
+        return file_lock(self.__secrets_file_path)
+
+    @timed
+    def apply_changes(self, puts: List[Secret], deletes: Set[str]) -> bool:
+        """
+        Applies a transaction's writes with a single rewrite of the vault.
+        The caller holds `locked()`.
 
-        return self.store_secrets(secrets)
+        Returns True if the vault was rewritten, False otherwise.
+        Raises NotFoundError if it fails to find a secrets file.
+        """
+        return self.rewrite(replace={secret.full_name: secret for secret in puts}, delete=deletes)
 
+    @timed
     def retreive_secret(self, name: str, namespace: str) -> Optional[Secret]:
         """
-        Retreives the provided ciphertext under the provided secret name.
+        Retreives the provided ciphertext under the provided secret name, reading only its
+        own span of the vault. The offset index is rebuilt first if the vault changed behind
+        its back; if it still cannot be used, the vault is scanned.
 
         Raises NotFoundError if it fails to find a secrets file.
         """
-        secrets = self.stored_secrets_by_full_name()
-        return secrets.get(self.full_name(name, namespace))
+        full_name = self.full_name(name, namespace)
+        spans = self.__offset_index.lookup([full_name])
+        if spans is None:
+            self.rebuild_name_index()
+            spans = self.__offset_index.lookup([full_name])
+        if spans is not None:
+            if full_name not in spans:
+                return None
+            data = self.read_span(spans[full_name])
+            # Checked in case the vault was replaced between reading the index and the vault.
+            if data is not None and SecretHeader(data).full_name == full_name:
+                return self.decode(data)
+        data = self.scan_for(full_name)
+        return None if data is None else self.decode(data)
 
+    @timed
     def delete_secret(self, name: str, namespace: str) -> bool:
         """
         Deletes the entry with the provided name.
@@ -42,43 +106,238 @@ class LocalJsonStorageManager(StorageManager):
         Returns True if successful, False if it fails.
         Raises NotFoundError if it fails to find a secrets file.
         """
-        secrets = self.stored_secrets_by_full_name()
-        full_name = self.full_name(name, namespace)
-        if not full_name in secrets:
-            return False
-        
-        removed = {n: s for n, s in secrets.items() if not n == full_name}
+        with file_lock(self.__secrets_file_path):
+            return self.rewrite(delete={self.full_name(name, namespace)})
 
-        return self.store_secrets(removed)
+    @timed
+    def rewrite_secrets(self, transform: Callable[[Iterator[Secret]], Iterable[Secret]]) -> bool:
+        """
+        Streams the vault through `transform` into a copy that is swapped in once every
+        secret has been written; until then (or if `transform` raises) the vault is untouched.
 
+        Returns True if the vault was rewritten, False otherwise.
+        Raises NotFoundError if it fails to find a secrets file.
+        """
+        indexes = IndexBuilder()
+        with file_lock(self.__secrets_file_path):
+            try:
+                with AtomicFile(self.__secrets_file_path, "w") as out:
+                    writer = VaultWriter(out.file, self.__compact)
+                    for secret in transform(self.decode(data) for _, data in self.iter_raw()):
+                        data = secret.to_dict()
+                        indexes.add(SecretHeader(data), writer.write(secret.id, data))
+                    writer.close()
+                    out.commit()
+            except OSError:
+                return False
+
+            self.write_indexes(indexes, vault_signature(self.__secrets_file_path))
+        return True
 
+    @timed
     def get_all_secrets(self) -> List[Secret]:
         """
         Retrieves all entry names.
 
         Raises NotFoundError if it fails to retreive entries.
         """
+        return [ self.decode(data) for _, data in self.iter_raw() ]
+
+    def iter_headers(self, prefix: str = "") -> Iterator[SecretHeader]:
+        """
+        Yields lightweight headers of the secrets under `prefix`, straight from the parsed JSON.
+
+        Raises NotFoundError if it fails to retreive entries.
+        """
+        for _, data in self.iter_raw():
+            header = SecretHeader(data)
+            if matches_prefix(header.full_name, prefix):
+                yield header
+
+    @timed
+    def list_names(self, prefix: str = "", offset: int = 0, limit: Optional[int] = None) -> List[str]:
+        """
+        Retrieves sorted full names under `prefix` from the name index next to the vault,
+        rebuilding the index first if the vault changed behind its back.
+
+        Raises NotFoundError if it fails to retreive entries.
+        """
+        names = self.__name_index.query(prefix, offset, limit)
+        if names is None:
+            self.rebuild_name_index()
+            names = self.__name_index.query(prefix, offset, limit)
+        if names is None:
+            return super().list_names(prefix, offset, limit)
+        return names
+
+    @timed
+    def find_names(self, tags: List[str], metadata: Dict[str, str]) -> List[str]:
+        """
+        Retrieves sorted full names carrying every tag and metadata pair from the tag index
+        next to the vault, rebuilding the indexes first if the vault changed behind their back.
+
+        Raises NotFoundError if it fails to retreive entries.
+        """
+        terms = sorted(secret_terms(tags, metadata))
+        if not terms:
+            return self.list_names()
+        names = self.__tag_index.query(terms)
+        if names is None:
+            self.rebuild_name_index()
+            names = self.__tag_index.query(terms)
+        if names is None:
+            return super().find_names(tags, metadata)
+        return names
+
+    @timed
+    def search_names(self, query: str, limit: int = 10) -> List[str]:
+        """
+        Retrieves the full names best matching `query`, best first, from the trigram index
+        next to the vault, rebuilding the indexes first if the vault changed behind their back.
+
+        Raises NotFoundError if it fails to retreive entries.
+        """
+        names = self.__gram_index.search(query, limit)
+        if names is None:
+            self.rebuild_name_index()
+            names = self.__gram_index.search(query, limit)
+        if names is None:
+            return super().search_names(query, limit)
+        return names
+
+    @timed
+    def rebuild_name_index(self) -> None:
+        """
+        Rebuilds the name, tag, trigram and offset indexes from the vault.
+        """
+        signature = vault_signature(self.__secrets_file_path)
+        indexes = IndexBuilder()
+        for data, span in self.iter_spans():
+            indexes.add(SecretHeader(data), span)
+        if vault_signature(self.__secrets_file_path) == signature:
+            self.write_indexes(indexes, signature)
+
+    @timed
+    def write_indexes(self, indexes: "IndexBuilder", signature: Optional[VaultSignature]) -> None:
+        self.__name_index.write(indexes.names, signature)
+        self.__tag_index.write(indexes.tag_postings, signature)
+        self.__gram_index.write(indexes.gram_postings, signature)
+        self.__offset_index.write(indexes.spans, signature)
+
+    def iter_raw(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Streams (id, stored dict) pairs from the vault.
+
+        Raises NotFoundError if the vault is missing or corrupted.
+        """
+        for secret_id, data, _ in self.iter_entries():
+            yield secret_id, data
+
+    def iter_spans(self) -> Iterator[Tuple[Dict[str, Any], Span]]:
+        """
+        Streams (stored dict, byte span in the vault) pairs from the vault.
+
+        Raises NotFoundError if the vault is missing or corrupted.
+        """
+        for _, data, span in self.iter_entries():
+            yield data, span
+
+    def iter_entries(self) -> Iterator[Tuple[str, Dict[str, Any], Span]]:
         try:
-            with open(self.__secrets_file_path, "r") as f:
-                d = load(f)
-                return [ Secret.from_dict(v) for _, v in d.items() ]
-        except:
+            with open(self.__secrets_file_path, "r", encoding="utf-8", newline="") as f:
+                yield from iter_json_spans(f)
+        except OSError:
             raise NotFoundError(f"Secrets file at {self.__secrets_file_path} not found")
+        except ValueError:
+            raise NotFoundError(f"Secrets file at {self.__secrets_file_path} is corrupted")
 
+    def read_span(self, span: Span) -> Optional[Dict[str, Any]]:
+        """
+        Reads the stored dict at `span` of the memory-mapped vault, or None if it is not one.
 
-    def store_secrets(self, secrets: Dict[str, Secret]) -> bool:
+        Raises NotFoundError if the vault is missing.
+        """
+        offset, length = span
         try:
-            with open(self.__secrets_file_path, "w") as f:
-                to_dump = {s.id: s.to_dict() for s in secrets.values()}
-                dump(to_dump, f, indent=4)
-                return True
-        except:
+            with open(self.__secrets_file_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                data = json.loads(mm[offset:offset + length])
+        except OSError:
+            raise NotFoundError(f"Secrets file at {self.__secrets_file_path} not found")
+        except ValueError:
+            return None
+        return data if isinstance(data, dict) else None
+
+    def scan_for(self, full_name: str) -> Optional[Dict[str, Any]]:
+        """
+        Streams the vault up to the stored dict of `full_name`.
+
+        Raises NotFoundError if the vault is missing or corrupted.
+        """
+        for _, data in self.iter_raw():
+            if SecretHeader(data).full_name == full_name:
+                return data
+        return None
+
+    def rewrite(self, replace: Dict[str, Secret] | None = None, delete: set[str] | None = None) -> bool:
+        """
+        Streams the vault into an atomically swapped-in copy, replacing secrets by full name
+        in place (or appending them) and dropping deleted ones, then refreshes the indexes.
+        Returns False, leaving the vault untouched, if writing fails or nothing was deleted.
+        Callers should hold `file_lock` on the secrets file.
+        """
+        pending = dict(replace or {})
+        delete = delete or set()
+        indexes = IndexBuilder()
+        deleted = False
+        try:
+            with AtomicFile(self.__secrets_file_path, "w") as out:
+                writer = VaultWriter(out.file, self.__compact)
+                for secret_id, data in self.iter_raw():
+                    header = SecretHeader(data)
+                    if header.full_name in delete:
+                        deleted = True
+                        continue
+                    if header.full_name in pending:
+                        secret = pending.pop(header.full_name)
+                        secret_id, data = secret.id, secret.to_dict()
+                        header = SecretHeader(data)
+                    indexes.add(header, writer.write(secret_id, data))
+                for secret in pending.values():
+                    data = secret.to_dict()
+                    indexes.add(SecretHeader(data), writer.write(secret.id, data))
+                writer.close()
+
+                if delete and not deleted:
+                    return False
+                out.commit()
+        except OSError:
             return False
 
+        self.write_indexes(indexes, vault_signature(self.__secrets_file_path))
+        return True
+
+    def decode(self, data: Dict[str, Any]) -> Secret:
+        try:
+            return Secret.from_dict(data)
+        except (KeyError, AttributeError, TypeError, ValueError):
+            raise NotFoundError(f"Secrets file at {self.__secrets_file_path} is corrupted")
+
 
-    def stored_secrets_by_full_name(self) -> Dict[str, Secret]:
-        secrets = self.get_all_secrets()
-        return {s.full_name: s for s in secrets}
-        
+class IndexBuilder:
+    """
+    Collects what the sidecar indexes need while the vault streams past,
+    so they can all be rewritten after a single pass.
+    """
 
+    def __init__(self) -> None:
+        self.names: List[str] = []
+        self.tag_postings: List[Tuple[str, str]] = []
+        self.gram_postings: List[Tuple[str, str]] = []
+        self.spans: List[Tuple[str, int, int]] = []
 
+    def add(self, header: SecretHeader, span: Span) -> None:
+        full_name = header.full_name
+        self.names.append(full_name)
+        self.spans.append((full_name, *span))
+        self.tag_postings.extend((term, full_name) for term in secret_terms(header.tags, header.metadata))
+        self.gram_postings.extend((gram, full_name) for gram in trigrams(full_name))
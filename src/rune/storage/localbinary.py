@@ -0,0 +1,228 @@
+import mmap
+import os
+import struct
+from typing import Any, BinaryIO, Callable, Dict, Iterable, Iterator, Optional, Tuple
+
+from rune.exception.notfounderror import NotFoundError
+from rune.models.secret import Secret, SecretHeader
+from rune.storage.binarycodec import decode_secret, encode_secret
+from rune.storage.fileio import AtomicFile, file_lock
+from rune.storage.local import IndexBuilder, LocalJsonStorageManager
+from rune.storage.nameindex import vault_signature
+from rune.storage.offsetindex import Span
+from rune.utils.profiling import timed
+
+MAGIC = b"RUNEVLT1"
+
+# full name length, encoded secret length
+RECORD_HEADER = struct.Struct("<II")
+
+class LocalBinaryStorageManager(LocalJsonStorageManager):
+    """
+    Stores all secrets in a single binary file: MAGIC, then one record per secret holding
+    its length-prefixed full name and binary-encoded secret (see binarycodec).
+
+    The vault is read through a memory map. Point lookups jump to their record with the
+    offset index, and ciphertext, nonce and salt reach the decryption as raw bytes without
+    being base64-decoded. Secrets handed out are copied out of the map, since touching a map
+    whose file was truncated behind its back kills the process with SIGBUS.
+    Writes stream the records into an atomically swapped-in copy, copying untouched records
+    byte for byte. Names, tags and trigrams are indexed in the same sidecars as the JSON vault.
+    """
+
+    def __init__(self, secrets_file_path: str) -> None:
+        super().__init__(secrets_file_path)
+        self.__secrets_file_path = secrets_file_path
+        self.__map: Optional[mmap.mmap] = None
+        self.__map_signature: Optional[Tuple[int, int, int]] = None
+
+    @timed
+    def rewrite_secrets(self, transform: Callable[[Iterator[Secret]], Iterable[Secret]]) -> bool:
+        """
+        Streams the vault through `transform` into a copy that is swapped in once every
+        secret has been written; until then (or if `transform` raises) the vault is untouched.
+
+        Returns True if the vault was rewritten, False otherwise.
+        Raises NotFoundError if it fails to find a secrets file.
+        """
+        indexes = IndexBuilder()
+        with file_lock(self.__secrets_file_path):
+            try:
+                with AtomicFile(self.__secrets_file_path, "wb") as out:
+                    position = out.file.write(MAGIC)
+                    for secret in transform(self.decode(data) for _, data in self.iter_raw()):
+                        body = encode_secret(secret)
+                        length = write_record(out.file, secret.full_name.encode(), body)
+                        indexes.add(SecretHeader(self.decode_body(body, copy=False)), (position, length))
+                        position += length
+                    out.commit()
+            except OSError:
+                return False
+
+            self.write_indexes(indexes, vault_signature(self.__secrets_file_path))
+        return True
+
+    def iter_raw(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Streams (full name, stored dict) pairs from the vault.
+
+        Raises NotFoundError if the vault is missing or corrupted.
+        """
+        for key, body, _ in self.iter_records():
+            yield str(key, "utf-8"), self.decode_body(body)
+
+    def iter_spans(self) -> Iterator[Tuple[Dict[str, Any], Span]]:
+        """
+        Streams (stored dict, byte span of its record) pairs from the vault.
+
+        Raises NotFoundError if the vault is missing or corrupted.
+        """
+        for _, body, span in self.iter_records():
+            yield self.decode_body(body), span
+
+    def iter_records(self) -> Iterator[Tuple[memoryview, memoryview, Span]]:
+        """
+        Streams the (full name, encoded secret) records of the vault as views into the memory map,
+        with the byte span of each record.
+
+        Raises NotFoundError if the vault is missing or corrupted.
+        """
+        view = self.mapped()
+        position = len(MAGIC)
+        while position < len(view):
+            key, body = self.record_at(view, position)
+            length = RECORD_HEADER.size + len(key) + len(body)
+            yield key, body, (position, length)
+            position += length
+
+    def record_at(self, view: memoryview, position: int) -> Tuple[memoryview, memoryview]:
+        """
+        The (full name, encoded secret) views of the record starting at `position`.
+
+        Raises NotFoundError if there is no complete record there.
+        """
+        try:
+            key_length, body_length = RECORD_HEADER.unpack_from(view, position)
+        except struct.error:
+            raise NotFoundError(f"Secrets file at {self.__secrets_file_path} is corrupted")
+        key_end = position + RECORD_HEADER.size + key_length
+        body_end = key_end + body_length
+        if body_end > len(view):
+            raise NotFoundError(f"Secrets file at {self.__secrets_file_path} is corrupted")
+        return view[position + RECORD_HEADER.size:key_end], view[key_end:body_end]
+
+    def read_span(self, span: Span) -> Optional[Dict[str, Any]]:
+        """
+        Decodes the record at `span` of the memory-mapped vault, or returns None if it is not one.
+        """
+        offset, length = span
+        view = self.mapped()
+        if offset < len(MAGIC) or offset + length > len(view):
+            return None
+        try:
+            key, body = self.record_at(view, offset)
+            if RECORD_HEADER.size + len(key) + len(body) != length:
+                return None
+            return self.decode_body(body)
+        except NotFoundError:
+            return None
+
+    def scan_for(self, full_name: str) -> Optional[Dict[str, Any]]:
+        """
+        Finds the record of `full_name` by comparing names, decoding only that record.
+
+        Raises NotFoundError if the vault is missing or corrupted.
+        """
+        key = full_name.encode()
+        for record_key, body, _ in self.iter_records():
+            if record_key == key:
+                return self.decode_body(body)
+        return None
+
+    def mapped(self) -> memoryview:
+        """
+        The vault, memory-mapped read-only; remapped whenever the file is replaced or changes.
+
+        Maps are never closed explicitly: views into them may still be alive. Rune writes by
+        replacing the file, so an old map keeps showing the old vault until it is garbage collected.
+        """
+        if not os.path.exists(self.__secrets_file_path) or os.path.getsize(self.__secrets_file_path) == 0:
+            self.create_vault()
+        signature = vault_signature(self.__secrets_file_path)
+        if self.__map is None or signature != self.__map_signature:
+            try:
+                with open(self.__secrets_file_path, "rb") as f:
+                    mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except (OSError, ValueError):
+                raise NotFoundError(f"Secrets file at {self.__secrets_file_path} not found")
+            if mapped[:len(MAGIC)] != MAGIC:
+                raise NotFoundError(f"Secrets file at {self.__secrets_file_path} is not a rune binary vault")
+            self.__map, self.__map_signature = mapped, signature
+        return memoryview(self.__map)
+
+    def create_vault(self) -> None:
+        try:
+            with open(self.__secrets_file_path, "wb") as f:
+                f.write(MAGIC)
+        except OSError:
+            raise NotFoundError(f"Secrets file at {self.__secrets_file_path} could not be created")
+
+    def rewrite(self, replace: Dict[str, Secret] | None = None, delete: set[str] | None = None) -> bool:
+        """
+        Streams the vault into an atomically swapped-in copy, replacing secrets by full name
+        in place (or appending them) and dropping deleted ones, then refreshes the indexes.
+        Untouched records are copied as they are.
+        Returns False, leaving the vault untouched, if writing fails or nothing was deleted.
+        Callers should hold `file_lock` on the secrets file.
+        """
+        pending = dict(replace or {})
+        delete = delete or set()
+        indexes = IndexBuilder()
+        deleted = False
+        try:
+            with AtomicFile(self.__secrets_file_path, "wb") as out:
+                position = out.file.write(MAGIC)
+                for key, body, _ in self.iter_records():
+                    full_name = str(key, "utf-8")
+                    if full_name in delete:
+                        deleted = True
+                        continue
+                    if full_name in pending:
+                        body = encode_secret(pending.pop(full_name))
+                    length = write_record(out.file, key, body)
+                    indexes.add(SecretHeader(self.decode_body(body, copy=False)), (position, length))
+                    position += length
+                for full_name, secret in pending.items():
+                    body = encode_secret(secret)
+                    length = write_record(out.file, full_name.encode(), body)
+                    indexes.add(SecretHeader(self.decode_body(body, copy=False)), (position, length))
+                    position += length
+
+                if delete and not deleted:
+                    return False
+                out.commit()
+        except OSError:
+            return False
+
+        self.write_indexes(indexes, vault_signature(self.__secrets_file_path))
+        return True
+
+    def decode_body(self, body: bytes | memoryview, copy: bool = True) -> Dict[str, Any]:
+        """
+        Decodes an encoded secret. With `copy=False` its binary values are views into `body`,
+        for values that do not outlive the call (as when indexing the records being written).
+        """
+        try:
+            return decode_secret(body, copy=copy)
+        except ValueError:
+            raise NotFoundError(f"Secrets file at {self.__secrets_file_path} is corrupted")
+
+
+def write_record(f: BinaryIO, key: bytes | memoryview, body: bytes | memoryview) -> int:
+    """
+    Writes one record, returning its length in bytes.
+    """
+    f.write(RECORD_HEADER.pack(len(key), len(body)))
+    f.write(key)
+    f.write(body)
+    return RECORD_HEADER.size + len(key) + len(body)
@@ -0,0 +1,230 @@
+from contextlib import contextmanager
+import json
+import mmap
+import os
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Tuple
+
+INDEX_VERSION = 1
+
+VaultSignature = Tuple[int, ...]
+
+def vault_signature(path: str) -> Optional[VaultSignature]:
+    """
+    Identifies one version of the vault file: (inode, mtime, size).
+    Atomic replaces change the inode, so this changes on every rune write.
+    A SQLite write-ahead log next to the vault is included too, since writes land there
+    until they are checkpointed into the vault file.
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    signature = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+    try:
+        wal = os.stat(path + "-wal")
+    except OSError:
+        return signature
+    return signature + (wal.st_mtime_ns, wal.st_size)
+
+def matches_prefix(full_name: str, prefix: str) -> bool:
+    """
+    True if `full_name` is `prefix` itself or lives in the namespace subtree under it.
+    """
+    prefix = prefix.strip("/")
+    return prefix == "" or full_name == prefix or full_name.startswith(prefix + "/")
+
+def prefix_ranges(prefix: str) -> List[Tuple[str, Optional[str]]]:
+    """
+    Half-open ranges of sorted full names that match `prefix` (None means unbounded).
+    '0' is the character right after '/', so [p/, p0) is exactly the subtree under p.
+    """
+    prefix = prefix.strip("/")
+    if prefix == "":
+        return [("", None)]
+    return [(prefix, prefix + "\0"), (prefix + "/", prefix + "0")]
+
+
+def write_sidecar(index_path: str, signature: Optional[VaultSignature], lines: Iterable[Any]) -> None:
+    """
+    Writes a sorted sidecar index: a header line recording the vault signature it was built
+    from, then one JSON-encoded value per line, in sorted order.
+    """
+    # Imported here so that read-only lookups (shell completion) skip tempfile and friends.
+    from rune.storage.fileio import atomic_write
+
+    if signature is None:
+        return
+    header = json.dumps({"version": INDEX_VERSION, "vault": list(signature)})
+    body = [header] + [json.dumps(line) for line in sorted(lines)]
+    try:
+        atomic_write(index_path, ("\n".join(body) + "\n").encode())
+    except OSError:
+        pass
+
+@contextmanager
+def map_sidecar(index_path: str,
+                vault_path: str,
+                signature: Optional[VaultSignature] = None) -> Iterator[Optional[Tuple[mmap.mmap, int]]]:
+    """
+    Memory-maps a sidecar index, yielding (mapping, offset of the first data line),
+    or None if it is missing or was not built from version `signature` of the vault
+    (by default, its current version).
+    """
+    if signature is None:
+        signature = vault_signature(vault_path)
+    try:
+        f = open(index_path, "rb")
+    except OSError:
+        yield None
+        return
+    with f:
+        if signature is None or os.fstat(f.fileno()).st_size == 0:
+            yield None
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            header_end = mm.find(b"\n")
+            try:
+                header = json.loads(mm[:header_end])
+            except ValueError:
+                header = {}
+            if header.get("version") != INDEX_VERSION or tuple(header.get("vault", ())) != signature:
+                yield None
+                return
+            yield mm, header_end + 1
+
+def sidecar_signature(index_path: str) -> Optional[VaultSignature]:
+    """
+    The vault signature a sidecar index was built from, or None if it is missing or unreadable.
+    """
+    try:
+        with open(index_path, "rb") as f:
+            header = json.loads(f.readline())
+    except (OSError, ValueError):
+        return None
+    if not isinstance(header, dict) or header.get("version") != INDEX_VERSION:
+        return None
+    return tuple(header.get("vault", ()))
+
+def read_line(mm: mmap.mmap, position: int, decode: Callable[[bytes], Any] = json.loads) -> Tuple[Any, int]:
+    """
+    Decodes the line starting at `position`, returning it with the offset of the next line.
+    """
+    line_end = mm.find(b"\n", position)
+    if line_end == -1:
+        line_end = len(mm)
+    return decode(mm[position:line_end]), line_end + 1
+
+def lower_bound(mm: mmap.mmap, data_start: int, target: Any, decode: Callable[[bytes], Any] = json.loads) -> int:
+    """
+    Byte offset of the first line whose value (or the part of it `decode` extracts) is >= target.
+    """
+    low, high = data_start, len(mm)
+    while low < high:
+        middle = (low + high) // 2
+        newline = mm.rfind(b"\n", data_start, middle)
+        line_start = data_start if newline == -1 else newline + 1
+        value, next_line = read_line(mm, line_start, decode)
+        if value < target:
+            low = next_line
+        else:
+            high = line_start
+    return low
+
+
+class NameIndex:
+    """
+    Sorted list of secret full names kept in a sidecar file next to the vault.
+
+    The first line records the vault signature it was built from; each following line is
+    one JSON-encoded full name, in sorted order. Prefix queries binary search the
+    memory-mapped file, so they cost O(log N + offset + output) instead of a vault parse.
+    """
+
+    def __init__(self, vault_path: str) -> None:
+        self.__vault_path = vault_path
+        self.__index_path = vault_path + ".names"
+
+    def write(self, names: Iterable[str], signature: Optional[VaultSignature]) -> None:
+        write_sidecar(self.__index_path, signature, names)
+
+    def query(self, prefix: str = "", offset: int = 0, limit: Optional[int] = None) -> Optional[List[str]]:
+        """
+        Returns the sorted full names under `prefix`, or None if the index is missing
+        or was built from a different version of the vault.
+        """
+        try:
+            with map_sidecar(self.__index_path, self.__vault_path) as mapped:
+                if mapped is None:
+                    return None
+                mm, data_start = mapped
+                return self.__scan(mm, data_start, prefix, offset, limit)
+        except (OSError, ValueError):
+            return None
+
+    def starting_with(self, text: str, limit: int) -> Optional[List[str]]:
+        """
+        Returns up to `limit` sorted full names starting with `text` (a plain string prefix,
+        as typed on the command line), or None if the index is missing or stale.
+        """
+        try:
+            with map_sidecar(self.__index_path, self.__vault_path) as mapped:
+                if mapped is None:
+                    return None
+                mm, data_start = mapped
+                names: List[str] = []
+                position = lower_bound(mm, data_start, text)
+                while position < len(mm) and len(names) < limit:
+                    name, position = read_line(mm, position)
+                    if not name.startswith(text):
+                        break
+                    names.append(name)
+                return names
+        except (OSError, ValueError):
+            return None
+
+    def namespaces_starting_with(self, text: str, limit: int) -> Optional[List[str]]:
+        """
+        Returns up to `limit` namespaces starting with `text`, completed only up to the next '/',
+        or None if the index is missing or stale. Each namespace costs one binary search,
+        however many secrets it holds.
+        """
+        try:
+            with map_sidecar(self.__index_path, self.__vault_path) as mapped:
+                if mapped is None:
+                    return None
+                mm, data_start = mapped
+                namespaces: List[str] = []
+                position = lower_bound(mm, data_start, text)
+                while position < len(mm) and len(namespaces) < limit:
+                    name, next_line = read_line(mm, position)
+                    if not name.startswith(text):
+                        break
+                    end = name.find("/", len(text))
+                    if end == -1:
+                        position = next_line
+                        continue
+                    namespace = name[:end]
+                    namespaces.append(namespace)
+                    # Skip the rest of the subtree: '0' is the character right after '/'.
+                    position = lower_bound(mm, data_start, namespace + "0")
+                return namespaces
+        except (OSError, ValueError):
+            return None
+
+    def __scan(self, mm: mmap.mmap, data_start: int, prefix: str, offset: int, limit: Optional[int]) -> List[str]:
+        names: List[str] = []
+        skipped = 0
+        for low, high in prefix_ranges(prefix):
+            position = lower_bound(mm, data_start, low)
+            while position < len(mm):
+                name, next_line = read_line(mm, position)
+                if high is not None and name >= high:
+                    break
+                position = next_line
+                if skipped < offset:
+                    skipped += 1
+                    continue
+                if limit is not None and len(names) >= limit:
+                    return names
+                names.append(name)
+        return names
@@ -0,0 +1,53 @@
+import json
+from typing import Dict, Iterable, Optional, Tuple
+
+from rune.storage.nameindex import VaultSignature, lower_bound, map_sidecar, read_line, write_sidecar
+
+# Byte offset and length of a secret in the vault file.
+Span = Tuple[int, int]
+
+def decode_name(line: bytes) -> str:
+    return json.loads(line)[0]
+
+
+class OffsetIndex:
+    """
+    Where each secret lives in the vault file, kept in a sidecar file next to it.
+
+    Like the name index, the first line records the vault signature it was built from and
+    each following line is one JSON-encoded [full name, offset, length], sorted by name.
+    A point lookup binary searches the memory-mapped index and then reads just that span
+    of the vault, so it costs O(log N) plus the size of the secret, whatever the vault size.
+    """
+
+    def __init__(self, vault_path: str) -> None:
+        self.__vault_path = vault_path
+        self.__index_path = vault_path + ".offsets"
+
+    def write(self, spans: Iterable[Tuple[str, int, int]], signature: Optional[VaultSignature]) -> None:
+        """
+        Writes the index from (full name, offset, length) triples.
+        """
+        write_sidecar(self.__index_path, signature, ([name, offset, length] for name, offset, length in spans))
+
+    def lookup(self, full_names: Iterable[str]) -> Optional[Dict[str, Span]]:
+        """
+        Returns the span of each of `full_names` that is in the vault, or None if the index
+        is missing or was built from a different version of the vault.
+        """
+        try:
+            with map_sidecar(self.__index_path, self.__vault_path) as mapped:
+                if mapped is None:
+                    return None
+                mm, data_start = mapped
+                spans: Dict[str, Span] = {}
+                for full_name in full_names:
+                    position = lower_bound(mm, data_start, full_name, decode_name)
+                    if position >= len(mm):
+                        continue
+                    (name, offset, length), _ = read_line(mm, position)
+                    if name == full_name:
+                        spans[full_name] = (offset, length)
+                return spans
+        except (OSError, ValueError, TypeError):
+            return None
@@ -0,0 +1,409 @@
+import json
+import sqlite3
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from rune.exception.notfounderror import NotFoundError
+from rune.models.secret import Secret, SecretHeader
+from rune.storage.base import StorageManager
+from rune.storage.binarycodec import decode_stored, encode_secret
+from rune.storage.fuzzy import CANDIDATES_PER_RESULT, query_bigrams, query_trigrams, rank, trigrams
+from rune.storage.tagindex import secret_terms
+from rune.utils.profiling import timed
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS secrets (
+    namespace TEXT NOT NULL,
+    name TEXT NOT NULL,
+    id TEXT NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (namespace, name)
+) WITHOUT ROWID
+"""
+
+# Inverted index from tag and metadata terms to secrets, kept in step with `secrets`
+# by every write. Databases created before it existed are backfilled on open.
+TERMS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS secret_terms (
+    term TEXT NOT NULL,
+    namespace TEXT NOT NULL,
+    name TEXT NOT NULL,
+    PRIMARY KEY (term, namespace, name)
+) WITHOUT ROWID
+"""
+
+# Lets writes drop the old terms of one secret without scanning the whole index.
+TERMS_BY_SECRET_INDEX = "CREATE INDEX IF NOT EXISTS secret_terms_by_secret ON secret_terms (namespace, name)"
+
+# Trigram index over full names for fuzzy search, maintained the same way.
+GRAMS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS name_grams (
+    gram TEXT NOT NULL,
+    namespace TEXT NOT NULL,
+    name TEXT NOT NULL,
+    PRIMARY KEY (gram, namespace, name)
+) WITHOUT ROWID
+"""
+
+GRAMS_BY_SECRET_INDEX = "CREATE INDEX IF NOT EXISTS name_grams_by_secret ON name_grams (namespace, name)"
+
+SCHEMA_VERSION = 2
+
+# Rows read at a time when streaming the whole table.
+SCAN_BATCH_SIZE = 256
+
+FULL_NAME = "CASE namespace WHEN '' THEN name ELSE namespace || '/' || name END"
+
+class SqliteStorageManager(StorageManager):
+    """
+    Stores each secret as one row keyed by (namespace, name),
+    so lookups and writes only touch the affected row.
+    Rows hold JSON text, or with the "binary" `encoding`, struct-packed blobs.
+    """
+
+    def __init__(self, secrets_file_path: str, encoding: str = "json") -> None:
+        self.__secrets_file_path = secrets_file_path
+        self.__connection: Optional[sqlite3.Connection] = None
+        self.__binary = encoding == "binary"
+
+    @timed
+    def store_secret(self, secret: Secret) -> bool:
+        """
+        Stores the provided ciphertext under the provided secret name.
+
+        Returns True if storage is successful, False otherwise.
+        Raises NotFoundError if it fails to find a secrets file.
+        """
+        connection = self.connection()
+        try:
+            with connection:
+                self.upsert(connection, secret)
+            return True
+        except sqlite3.Error:
+            return False
+
+    @timed
+    def store_secrets(self, secrets: Iterable[Secret]) -> bool:
+        """
+        Stores several secrets in a single transaction.
+
+        Returns True if storage is successful, False otherwise.
+        Raises NotFoundError if it fails to find a secrets file.
+        """
+        connection = self.connection()
+        try:
+            with connection:
+                for secret in secrets:
+                    self.upsert(connection, secret)
+            return True
+        except sqlite3.Error:
+            return False
+
+    @contextmanager
+    def locked(self) -> Iterator[None]:
+        """
+        Opens an IMMEDIATE transaction, so the transaction's reads see one snapshot
+        and no other writer gets in before its commit. Rolled back unless committed.
+
+        Raises NotFoundError if the database cannot be locked.
+        """
+        connection = self.connection()
+        try:
+            connection.execute("BEGIN IMMEDIATE")
+        except sqlite3.Error as err:
+            raise NotFoundError(f"Unable to lock secrets database at {self.__secrets_file_path}: {err}")
+        try:
+            yield
+        finally:
+            if connection.in_transaction:
+                connection.rollback()
+
+    @timed
+    def apply_changes(self, puts: List[Secret], deletes: Set[str]) -> bool:
+        """
+        Applies a transaction's writes and commits the transaction opened by `locked()`.
+
+        Returns True if storage is successful, False otherwise.
+        """
+        connection = self.connection()
+        try:
+            for secret in puts:
+                self.upsert(connection, secret)
+            for full_name in deletes:
+                namespace, _, name = full_name.rpartition("/")
+                connection.execute("DELETE FROM secrets WHERE namespace = ? AND name = ?", (namespace, name))
+                self.index_terms(connection, namespace, name, set())
+                self.index_grams(connection, namespace, name, set())
+            connection.commit()
+            return True
+        except sqlite3.Error:
+            connection.rollback()
+            return False
+
+    @timed
+    def retreive_secret(self, name: str, namespace: str) -> Optional[Secret]:
+        """
+        Retreives the provided ciphertext under the provided secret name.
+
+        Raises NotFoundError if it fails to find a secrets file.
+        """
+        try:
+            row = self.connection().execute(
+                "SELECT data FROM secrets WHERE namespace = ? AND name = ?",
+                (namespace, name)
+            ).fetchone()
+        except sqlite3.Error as err:
+            raise NotFoundError(f"Unable to read secrets database at {self.__secrets_file_path}: {err}")
+
+        return None if row is None else self.decode(row[0])
+
+    @timed
+    def delete_secret(self, name: str, namespace: str) -> bool:
+        """
+        Deletes the entry with the provided name.
+
+        Returns True if successful, False if it fails.
+        Raises NotFoundError if it fails to find a secrets file.
+        """
+        connection = self.connection()
+        try:
+            with connection:
+                cursor = connection.execute(
+                    "DELETE FROM secrets WHERE namespace = ? AND name = ?",
+                    (namespace, name)
+                )
+                self.index_terms(connection, namespace, name, set())
+                self.index_grams(connection, namespace, name, set())
+            return cursor.rowcount > 0
+        except sqlite3.Error:
+            return False
+
+    def upsert(self, connection: sqlite3.Connection, secret: Secret) -> None:
+        connection.execute(
+            "INSERT INTO secrets (namespace, name, id, data) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (namespace, name) DO UPDATE SET id = excluded.id, data = excluded.data",
+            (secret.namespace, secret.name, secret.id, self.encode(secret))
+        )
+        self.index_terms(connection, secret.namespace, secret.name, secret_terms(secret.tags, secret.metadata))
+        self.index_grams(connection, secret.namespace, secret.name, trigrams(secret.full_name))
+
+    @timed
+    def rewrite_secrets(self, transform: Callable[[Iterator[Secret]], Iterable[Secret]]) -> bool:
+        """
+        Streams every row through `transform` and updates it in place, all in one transaction
+        that is rolled back if `transform` raises.
+
+        Returns True if the vault was rewritten, False otherwise.
+        Raises NotFoundError if it fails to find a secrets file.
+        """
+        connection = self.connection()
+        try:
+            with connection:
+                # Taken up front so no other writer slips in between the reads and the writes.
+                connection.execute("BEGIN IMMEDIATE")
+                for secret in transform(self.scan_rows(connection)):
+                    connection.execute(
+                        "UPDATE secrets SET id = ?, data = ? WHERE namespace = ? AND name = ?",
+                        (secret.id, self.encode(secret), secret.namespace, secret.name)
+                    )
+                    self.index_terms(connection, secret.namespace, secret.name, secret_terms(secret.tags, secret.metadata))
+            return True
+        except sqlite3.Error:
+            return False
+
+    def scan_rows(self, connection: sqlite3.Connection) -> Iterator[Secret]:
+        """
+        Yields every secret in (namespace, name) order, a batch of rows at a time,
+        so rows can be updated while the scan is in progress.
+        """
+        # Names are never empty, so ("", "") sorts before every row.
+        last = ("", "")
+        query = (
+            "SELECT namespace, name, data FROM secrets WHERE (namespace, name) > (?, ?) "
+            "ORDER BY namespace, name LIMIT ?"
+        )
+        while True:
+            rows = connection.execute(query, (*last, SCAN_BATCH_SIZE)).fetchall()
+            for _, _, data in rows:
+                yield self.decode(data)
+            if len(rows) < SCAN_BATCH_SIZE:
+                return
+            last = (rows[-1][0], rows[-1][1])
+
+    @timed
+    def get_all_secrets(self) -> List[Secret]:
+        """
+        Retrieves all entry names.
+
+        Raises NotFoundError if it fails to retreive entries.
+        """
+        try:
+            rows = self.connection().execute("SELECT data FROM secrets ORDER BY namespace, name").fetchall()
+        except sqlite3.Error as err:
+            raise NotFoundError(f"Unable to read secrets database at {self.__secrets_file_path}: {err}")
+
+        return [self.decode(data) for (data,) in rows]
+
+    @timed
+    def list_names(self, prefix: str = "", offset: int = 0, limit: Optional[int] = None) -> List[str]:
+        """
+        Retrieves sorted full names under `prefix` using the (namespace, name) primary key.
+
+        Raises NotFoundError if it fails to retreive entries.
+        """
+        where, params = prefix_filter(prefix)
+        query = f"SELECT {FULL_NAME} AS full_name FROM secrets{where} ORDER BY full_name LIMIT ? OFFSET ?"
+        params += [-1 if limit is None else limit, offset]
+
+        try:
+            return [row[0] for row in self.connection().execute(query, params)]
+        except sqlite3.Error as err:
+            raise NotFoundError(f"Unable to read secrets database at {self.__secrets_file_path}: {err}")
+
+    def iter_headers(self, prefix: str = "") -> Iterator[SecretHeader]:
+        """
+        Yields lightweight headers of the secrets under `prefix`, straight from the stored rows.
+
+        Raises NotFoundError if it fails to retreive entries.
+        """
+        where, params = prefix_filter(prefix)
+        try:
+            rows = self.connection().execute(f"SELECT data FROM secrets{where}", params).fetchall()
+        except sqlite3.Error as err:
+            raise NotFoundError(f"Unable to read secrets database at {self.__secrets_file_path}: {err}")
+
+        for (data,) in rows:
+            yield SecretHeader(decode_stored(data))
+
+    @timed
+    def find_names(self, tags: List[str], metadata: Dict[str, str]) -> List[str]:
+        """
+        Retrieves sorted full names carrying every tag and metadata pair using the secret_terms index.
+
+        Raises NotFoundError if it fails to retreive entries.
+        """
+        terms = sorted(secret_terms(tags, metadata))
+        if not terms:
+            return self.list_names()
+        placeholders = ", ".join("?" for _ in terms)
+        query = (
+            f"SELECT {FULL_NAME} AS full_name FROM secret_terms WHERE term IN ({placeholders}) "
+            "GROUP BY namespace, name HAVING COUNT(*) = ? ORDER BY full_name"
+        )
+        try:
+            return [row[0] for row in self.connection().execute(query, terms + [len(terms)])]
+        except sqlite3.Error as err:
+            raise NotFoundError(f"Unable to read secrets database at {self.__secrets_file_path}: {err}")
+
+    @timed
+    def search_names(self, query: str, limit: int = 10) -> List[str]:
+        """
+        Retrieves the full names best matching `query`, best first, shortlisting the names
+        that share the most trigrams with it using the name_grams index.
+
+        Raises NotFoundError if it fails to retreive entries.
+        """
+        shortlist = self.shortlist_by_grams(*in_filter(sorted(query_trigrams(query))), limit)
+        if not shortlist:
+            # Too short or misspelled for a shared trigram: use every trigram starting with one of its bigrams.
+            ranges = [range_filter(bigram) for bigram in sorted(query_bigrams(query))]
+            where = " OR ".join(clause for clause, _ in ranges)
+            shortlist = self.shortlist_by_grams(where, [p for _, params in ranges for p in params], limit)
+        return rank(query, shortlist, limit)
+
+    def shortlist_by_grams(self, where: str, params: List[str], limit: int) -> List[str]:
+        """
+        Full names sharing the most grams matching `where`, most shared first.
+        """
+        query = (
+            f"SELECT {FULL_NAME} AS full_name FROM name_grams WHERE {where} "
+            "GROUP BY namespace, name ORDER BY COUNT(*) DESC LIMIT ?"
+        )
+        try:
+            return [row[0] for row in self.connection().execute(query, params + [limit * CANDIDATES_PER_RESULT])]
+        except sqlite3.Error as err:
+            raise NotFoundError(f"Unable to read secrets database at {self.__secrets_file_path}: {err}")
+
+    def index_grams(self, connection: sqlite3.Connection, namespace: str, name: str, grams: set[str]) -> None:
+        connection.execute("DELETE FROM name_grams WHERE namespace = ? AND name = ?", (namespace, name))
+        connection.executemany(
+            "INSERT INTO name_grams (gram, namespace, name) VALUES (?, ?, ?)",
+            [(gram, namespace, name) for gram in grams]
+        )
+
+    def index_terms(self, connection: sqlite3.Connection, namespace: str, name: str, terms: set[str]) -> None:
+        connection.execute("DELETE FROM secret_terms WHERE namespace = ? AND name = ?", (namespace, name))
+        connection.executemany(
+            "INSERT INTO secret_terms (term, namespace, name) VALUES (?, ?, ?)",
+            [(term, namespace, name) for term in terms]
+        )
+
+    @timed
+    def migrate(self, connection: sqlite3.Connection) -> None:
+        """
+        Creates the tables and backfills the term and trigram indexes of databases written before they existed.
+        """
+        (version,) = connection.execute("PRAGMA user_version").fetchone()
+        if version >= SCHEMA_VERSION:
+            return
+        with connection:
+            connection.execute(SCHEMA)
+            connection.execute(TERMS_SCHEMA)
+            connection.execute(TERMS_BY_SECRET_INDEX)
+            connection.execute(GRAMS_SCHEMA)
+            connection.execute(GRAMS_BY_SECRET_INDEX)
+            for namespace, name, data in connection.execute("SELECT namespace, name, data FROM secrets").fetchall():
+                header = SecretHeader(decode_stored(data))
+                self.index_terms(connection, namespace, name, secret_terms(header.tags, header.metadata))
+                self.index_grams(connection, namespace, name, trigrams(header.full_name))
+            connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def connection(self) -> sqlite3.Connection:
+        if self.__connection is None:
+            try:
+                connection = sqlite3.connect(self.__secrets_file_path, check_same_thread=False)
+                connection.execute("PRAGMA journal_mode=WAL")
+                connection.execute("PRAGMA synchronous=NORMAL")
+                self.migrate(connection)
+            except sqlite3.Error as err:
+                raise NotFoundError(f"Unable to open secrets database at {self.__secrets_file_path}: {err}")
+            self.__connection = connection
+        return self.__connection
+
+    def encode(self, secret: Secret) -> str | bytes:
+        if self.__binary:
+            return encode_secret(secret)
+        return json.dumps(secret.to_dict(), separators=(",", ":"))
+
+    def decode(self, data: str | bytes) -> Secret:
+        return Secret.from_dict(decode_stored(data))
+
+
+def prefix_filter(prefix: str) -> Tuple[str, List[str]]:
+    """
+    WHERE clause (and its parameters) matching the secret named `prefix`
+    and the namespace subtree under it.
+    """
+    prefix = prefix.strip("/")
+    if prefix == "":
+        return "", []
+    namespace, _, name = prefix.rpartition("/")
+    # [p/, p0) is exactly the namespace subtree under p, since '0' follows '/'.
+    return (
+        " WHERE (namespace = ? AND name = ?) OR namespace = ? OR (namespace >= ? AND namespace < ?)",
+        [namespace, name, prefix, prefix + "/", prefix + "0"]
+    )
+
+def in_filter(grams: List[str]) -> Tuple[str, List[str]]:
+    """
+    WHERE clause (and its parameters) matching any of `grams`.
+    """
+    if not grams:
+        return "0", []
+    return f"gram IN ({', '.join('?' for _ in grams)})", grams
+
+def range_filter(prefix: str) -> Tuple[str, List[str]]:
+    """
+    WHERE clause (and its parameters) matching every gram starting with `prefix`.
+    """
+    return "(gram >= ? AND gram < ?)", [prefix, prefix + "\U0010ffff"]
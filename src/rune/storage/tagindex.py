@@ -0,0 +1,206 @@
+import json
+import os
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from rune.storage.nameindex import (
+    VaultSignature, lower_bound, map_sidecar, read_line, sidecar_signature, vault_signature, write_sidecar,
+)
+
+TERM_PEEK_BYTES = 256
+# Past this many logged writes, the next query finds the index stale and it is rebuilt.
+TAG_LOG_MAX_ENTRIES = 1000
+
+# One logged write: (vault signature before, after, [[full name, sorted terms or None if deleted]]).
+LogEntry = Tuple[VaultSignature, VaultSignature, List[List]]
+
+def tag_term(tag: str) -> str:
+    return "tag:" + tag
+
+def meta_term(key: str, value: str) -> str:
+    return "meta:" + key + "=" + value
+
+def secret_terms(tags: Iterable[str], metadata: Dict[str, str]) -> Set[str]:
+    """
+    Index terms of one secret: one per tag and one per metadata key/value pair.
+    """
+    return {tag_term(tag) for tag in tags} | {meta_term(key, str(value)) for key, value in metadata.items()}
+
+def decode_term(line: bytes) -> str:
+    """
+    Decodes only the term of a [term, [full names]] line, so binary searching
+    never pays for decoding posting lists.
+    """
+    decoder = json.JSONDecoder()
+    try:
+        # Terms are short; avoid decoding a long posting list just to find one.
+        term, _ = decoder.raw_decode(line[:TERM_PEEK_BYTES].decode(errors="ignore"), 1)
+    except ValueError:
+        term, _ = decoder.raw_decode(line.decode(), 1)
+    return term
+
+
+class PostingIndex:
+    """
+    Inverted index from terms to secret full names, kept in a sidecar file next to the vault.
+
+    Like the name index, the first line records the vault signature it was built from and
+    each following line is one JSON-encoded [term, [full names]] posting list, sorted by term.
+    Each term is a binary search over the memory-mapped file plus decoding a single line,
+    so lookups cost O(log T + matches) regardless of vault size.
+    """
+
+    def __init__(self, vault_path: str, suffix: str) -> None:
+        self.__vault_path = vault_path
+        self.__index_path = vault_path + suffix
+
+    def write(self, postings: Iterable[Tuple[str, str]], signature: Optional[VaultSignature]) -> None:
+        """
+        Writes the index from (term, full name) pairs.
+        """
+        grouped: Dict[str, Set[str]] = {}
+        for term, name in postings:
+            grouped.setdefault(term, set()).add(name)
+        write_sidecar(self.__index_path, signature, ([term, sorted(names)] for term, names in grouped.items()))
+
+    def lookup(self,
+               terms: Iterable[str],
+               signature: Optional[VaultSignature] = None) -> Optional[Dict[str, List[str]]]:
+        """
+        Returns the posting list of each term, or None if the index is missing
+        or was not built from version `signature` of the vault (by default, its current version).
+        """
+        try:
+            with map_sidecar(self.__index_path, self.__vault_path, signature) as mapped:
+                if mapped is None:
+                    return None
+                mm, data_start = mapped
+                return {term: self.__postings(mm, data_start, term) for term in terms}
+        except (OSError, ValueError):
+            return None
+
+    def lookup_prefix(self, prefix: str) -> Optional[Dict[str, List[str]]]:
+        """
+        Returns the posting lists of every term starting with `prefix`, or None if the index
+        is missing or was built from a different version of the vault.
+        """
+        try:
+            with map_sidecar(self.__index_path, self.__vault_path) as mapped:
+                if mapped is None:
+                    return None
+                mm, data_start = mapped
+                postings: Dict[str, List[str]] = {}
+                position = lower_bound(mm, data_start, prefix, decode_term)
+                while position < len(mm):
+                    (term, names), position = read_line(mm, position)
+                    if not term.startswith(prefix):
+                        break
+                    postings[term] = names
+                return postings
+        except (OSError, ValueError):
+            return None
+
+    def __postings(self, mm, data_start: int, term: str) -> List[str]:
+        position = lower_bound(mm, data_start, term, decode_term)
+        if position >= len(mm):
+            return []
+        (line_term, names), _ = read_line(mm, position)
+        return names if line_term == term else []
+
+
+class TagIndex(PostingIndex):
+    """
+    Inverted index from tags and metadata pairs to secret full names (see PostingIndex).
+
+    Append-only vaults also keep a change log next to it: each write appends the new terms
+    of the secrets it touched, which queries apply over the sorted index. The log entries
+    chain vault signatures from the one the index was built from to the current one, so
+    any write that was not logged leaves the index stale rather than wrong.
+    """
+
+    def __init__(self, vault_path: str) -> None:
+        super().__init__(vault_path, ".tags")
+        self.__vault_path = vault_path
+        self.__index_path = vault_path + ".tags"
+        self.__log_path = vault_path + ".tags.log"
+
+    def write(self, postings: Iterable[Tuple[str, str]], signature: Optional[VaultSignature]) -> None:
+        """
+        Writes the index from (term, full name) pairs, dropping the change log it supersedes.
+        """
+        try:
+            os.unlink(self.__log_path)
+        except FileNotFoundError:
+            pass
+        except OSError:
+            return
+        super().write(postings, signature)
+
+    def log_changes(self,
+                    before: Optional[VaultSignature],
+                    after: Optional[VaultSignature],
+                    changes: Dict[str, Optional[Set[str]]]) -> None:
+        """
+        Logs the terms of each secret a write changed (None if it deleted it), for a write
+        that took the vault from version `before` to `after`. Does nothing unless the index
+        is current as of `before`.
+        """
+        entries = self.read_log()
+        if before is None or after is None or entries is None or len(entries) >= TAG_LOG_MAX_ENTRIES:
+            return
+        end = entries[-1][1] if entries else sidecar_signature(self.__index_path)
+        if end != tuple(before):
+            return
+        changed = [[name, None if terms is None else sorted(terms)] for name, terms in sorted(changes.items())]
+        try:
+            with open(self.__log_path, "a") as f:
+                f.write(json.dumps([list(before), list(after), changed]) + "\n")
+        except OSError:
+            pass
+
+    def read_log(self) -> Optional[List[LogEntry]]:
+        """
+        Returns the logged writes, or None if the log is torn or its entries do not chain.
+        """
+        try:
+            with open(self.__log_path) as f:
+                lines = f.read().splitlines()
+        except FileNotFoundError:
+            return []
+        except OSError:
+            return None
+        entries: List[LogEntry] = []
+        try:
+            for line in lines:
+                before, after, changed = json.loads(line)
+                entries.append((tuple(before), tuple(after), changed))
+        except (TypeError, ValueError):
+            return None
+        if any(entries[i][1] != entries[i + 1][0] for i in range(len(entries) - 1)):
+            return None
+        return entries
+
+    def query(self, terms: List[str]) -> Optional[List[str]]:
+        """
+        Returns the sorted full names carrying every term, or None if the index is missing
+        or is not current for this version of the vault.
+        """
+        entries = self.read_log()
+        if entries is None:
+            return None
+        if entries and entries[-1][1] != vault_signature(self.__vault_path):
+            return None
+        postings = self.lookup(terms, entries[0][0] if entries else None)
+        if postings is None:
+            return None
+        matches: Optional[Set[str]] = None
+        for names in postings.values():
+            matches = set(names) if matches is None else matches & set(names)
+
+        # Later writes win, and replace everything the index knew about a secret.
+        changed: Dict[str, Optional[List[str]]] = {}
+        for _, _, entry_changes in entries:
+            changed.update((name, name_terms) for name, name_terms in entry_changes)
+        wanted = set(terms)
+        result = {name for name in matches or () if name not in changed}
+        result |= {name for name, name_terms in changed.items() if name_terms is not None and wanted <= set(name_terms)}
+        return sorted(result)
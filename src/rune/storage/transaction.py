@@ -0,0 +1,110 @@
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Set
+
+from rune.models.secret import Secret
+
+if TYPE_CHECKING:
+    from rune.storage.base import StorageManager
+
+def full_name(name: str, namespace: str) -> str:
+    if namespace == "":
+        return name
+    return namespace + "/" + name
+
+
+class Transaction:
+    """
+    Unit of work over a storage manager, opened with `StorageManager.transaction()`.
+
+    Reads go to the storage manager once per secret and are then served from memory,
+    with the transaction's own pending writes applied on top. Writes are only buffered;
+    `commit()` hands them all to the storage manager as one atomic change. Leaving the
+    block without committing discards them.
+    While the transaction is open the storage manager holds its write lock, so nothing
+    read here can change before the commit.
+    """
+
+    def __init__(self, storage: "StorageManager") -> None:
+        self.__storage = storage
+        self.__read: Dict[str, Optional[Secret]] = {}
+        self.__puts: Dict[str, Secret] = {}
+        self.__deletes: Set[str] = set()
+        self.__committed = False
+
+    def get(self, name: str, namespace: str = "") -> Optional[Secret]:
+        """
+        The secret called `name` in `namespace` as this transaction sees it, or None.
+
+        Raises NotFoundError if it fails to find a secrets file.
+        """
+        key = full_name(name, namespace)
+        if key in self.__puts:
+            return self.__puts[key]
+        if key in self.__deletes:
+            return None
+        return self.__stored(name, namespace)
+
+    def get_many(self, full_names: Iterable[str]) -> Dict[str, Secret]:
+        """
+        The secrets among `full_names` that exist, read with a single pass over the vault.
+
+        Raises NotFoundError if it fails to find a secrets file.
+        """
+        wanted = set(full_names)
+        missing = wanted - self.__read.keys() - self.__puts.keys() - self.__deletes
+        if missing:
+            found = {h.full_name: h.to_secret() for h in self.__storage.iter_headers() if h.full_name in missing}
+            for key in missing:
+                self.__read[key] = found.get(key)
+        visible = {key: self.__read.get(key) for key in wanted - self.__deletes}
+        visible.update({key: secret for key, secret in self.__puts.items() if key in wanted})
+        return {key: secret for key, secret in visible.items() if secret is not None}
+
+    def names(self) -> List[str]:
+        """
+        Sorted full names of every secret as this transaction sees it.
+
+        Raises NotFoundError if it fails to find a secrets file.
+        """
+        stored = set(self.__storage.list_names()) - self.__deletes
+        return sorted(stored | self.__puts.keys())
+
+    def put(self, secret: Secret) -> None:
+        """
+        Adds `secret`, or replaces the secret with the same full name, on commit.
+        """
+        self.__deletes.discard(secret.full_name)
+        self.__puts[secret.full_name] = secret
+
+    def delete(self, name: str, namespace: str = "") -> bool:
+        """
+        Deletes the secret on commit. Returns False if there is no such secret.
+
+        Raises NotFoundError if it fails to find a secrets file.
+        """
+        if self.get(name, namespace) is None:
+            return False
+        key = full_name(name, namespace)
+        self.__puts.pop(key, None)
+        # A secret only put by this transaction just never gets stored.
+        if self.__stored(name, namespace) is not None:
+            self.__deletes.add(key)
+        return True
+
+    def __stored(self, name: str, namespace: str) -> Optional[Secret]:
+        key = full_name(name, namespace)
+        if key not in self.__read:
+            self.__read[key] = self.__storage.retreive_secret(name, namespace)
+        return self.__read[key]
+
+    def commit(self) -> bool:
+        """
+        Applies every pending write at once. Returns True if they were all stored.
+
+        Raises NotFoundError if it fails to find a secrets file.
+        """
+        if self.__committed:
+            raise RuntimeError("Transaction was already committed")
+        self.__committed = True
+        if not self.__puts and not self.__deletes:
+            return True
+        return self.__storage.apply_changes(list(self.__puts.values()), set(self.__deletes))
@@ -0,0 +1,157 @@
+import os
+import sys
+from typing import List, Optional, Tuple
+
+# Shell completion for secret names and namespaces, answered before typer (and with it
+# rich, the commands and cryptography) is imported. Candidates come from the sorted name
+# index next to the vault, so a keypress costs a stat, a settings read and a binary search.
+# Anything else is left to typer's own completion.
+
+COMPLETE_VAR = "_RUNE_COMPLETE"
+
+NAME_OPTIONS = {"-n", "--name"}
+NAMESPACE_OPTIONS = {"-p", "--prefix"}
+NAME_COMMANDS = {"get", "update", "delete"}
+# `ls` options that take a value, so the word after them is not the prefix argument.
+LS_VALUE_OPTIONS = {"-l", "--limit", "--offset"}
+
+MAX_COMPLETIONS = 50
+
+def complete_from_cache() -> bool:
+    """
+    Prints completions if this process was started by a shell completion script asking
+    for a secret name or namespace. Returns False if typer should handle the request.
+    """
+    instruction = os.environ.get(COMPLETE_VAR, "")
+    if not instruction.startswith("complete_"):
+        return False
+    shell = instruction.removeprefix("complete_")
+
+    parsed = completion_args(shell)
+    if parsed is None:
+        return False
+    args, incomplete = parsed
+
+    kind = completion_kind(args, incomplete)
+    if kind is None:
+        return False
+    candidates = cached_candidates(kind, incomplete)
+    if candidates is None:
+        return False
+
+    output = format_completions(shell, candidates)
+    if output:
+        sys.stdout.write(output + "\n")
+    return True
+
+def completion_args(shell: str) -> Optional[Tuple[List[str], str]]:
+    """
+    The words before the cursor (without the program name) and the word being completed,
+    read from the environment the same way typer's completion classes do.
+    """
+    try:
+        if shell == "bash":
+            words = split_words(os.environ["COMP_WORDS"])
+            cword = int(os.environ["COMP_CWORD"])
+            return words[1:cword], words[cword] if cword < len(words) else ""
+        raw = os.environ.get("_TYPER_COMPLETE_ARGS", "")
+        words = split_words(raw)[1:]
+        if shell in ("zsh", "fish"):
+            if words and not raw.endswith(" "):
+                return words[:-1], words[-1]
+            return words, ""
+        if shell in ("powershell", "pwsh"):
+            incomplete = os.environ.get("_TYPER_COMPLETE_WORD_TO_COMPLETE", "")
+            return (words[:-1] if incomplete else words), incomplete
+    except (KeyError, ValueError):
+        pass
+    return None
+
+def split_words(line: str) -> List[str]:
+    # shlex (and the re/enum imports it pulls in) is only needed for quoted words.
+    if not any(c in line for c in "\"'\\"):
+        return line.split()
+    import shlex
+    return shlex.split(line)
+
+def completion_kind(args: List[str], incomplete: str) -> Optional[str]:
+    """
+    "name" or "namespace" if the word being completed is a secret name or namespace, else None.
+    """
+    if not args or incomplete.startswith("-"):
+        return None
+    command, previous = args[0], args[-1]
+    if command in NAME_COMMANDS and previous in NAME_OPTIONS:
+        return "name"
+    if command == "get" and previous in NAMESPACE_OPTIONS:
+        return "namespace"
+    if command == "ls" and previous not in LS_VALUE_OPTIONS and all(arg.startswith("-") for arg in args[1:]):
+        return "namespace"
+    return None
+
+def cached_candidates(kind: str, incomplete: str) -> Optional[List[str]]:
+    """
+    Names or namespaces starting with `incomplete`, from the name index next to the vault.
+    The index is rebuilt first if it is missing or the vault changed since it was written;
+    a name with no prefix match falls back to the trigram index, when that is up to date.
+    """
+    from rune.storage.nameindex import NameIndex
+    from rune.utils.settings import peek_secrets_path
+
+    vault_path = peek_secrets_path()
+    index = NameIndex(vault_path)
+    if kind == "name":
+        candidates = index.starting_with(incomplete, MAX_COMPLETIONS)
+    else:
+        candidates = index.namespaces_starting_with(incomplete, MAX_COMPLETIONS)
+
+    if candidates is None:
+        names = refresh_name_index(vault_path)
+        if names is None:
+            return None
+        candidates = [n for n in names if n.startswith(incomplete)]
+        if kind == "namespace":
+            candidates = sorted({n[:n.find("/", len(incomplete))] for n in candidates if n.find("/", len(incomplete)) != -1})
+        candidates = candidates[:MAX_COMPLETIONS]
+
+    if kind == "name" and candidates == [] and incomplete:
+        from rune.storage.fuzzy import GramIndex
+        candidates = GramIndex(vault_path).search(incomplete, MAX_COMPLETIONS) or []
+    return candidates
+
+def refresh_name_index(vault_path: str) -> Optional[List[str]]:
+    """
+    Rebuilds the name index from the configured storage manager, returning every name.
+    """
+    from rune.exception.notfounderror import NotFoundError
+    from rune.storage import factory as StorageManagerFactory
+    from rune.storage.nameindex import NameIndex, vault_signature
+
+    # Taken before the storage manager opens the vault (SQLite creates its WAL on open).
+    signature = vault_signature(vault_path)
+    try:
+        names = StorageManagerFactory.get_configured_storage_manager().list_names()
+    except NotFoundError:
+        return None
+    NameIndex(vault_path).write(names, signature)
+    return names
+
+def format_completions(shell: str, candidates: List[str]) -> str:
+    """
+    Formats candidates the way typer's completion script for `shell` expects them.
+    """
+    if shell == "zsh":
+        if not candidates:
+            return "_files"
+        escaped = "\n".join(f'"{zsh_escape(c)}"' for c in candidates)
+        return f"_arguments '*: :(({escaped}))'"
+    if shell == "fish":
+        if os.environ.get("_TYPER_COMPLETE_FISH_ACTION") == "is-args":
+            sys.exit(0 if candidates else 1)
+        return "\n".join(candidates)
+    if shell in ("powershell", "pwsh"):
+        return "\n".join(f"{c}::: " for c in candidates)
+    return "\n".join(candidates)
+
+def zsh_escape(s: str) -> str:
+    return s.replace('"', '""').replace("'", "''").replace("$", "\\$").replace("`", "\\`").replace(":", r"\\:")
@@ -0,0 +1,59 @@
+import os
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from itertools import islice
+from typing import Callable, Deque, Iterable, Iterator, List, Sequence, TypeVar
+
+from rune.utils.profiling import in_current_span
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+MAX_AUTO_WORKERS = 8
+
+def resolve_workers(workers: int) -> int:
+    """
+    Returns the effective worker count; 0 (or less) means one per CPU, up to MAX_AUTO_WORKERS.
+    """
+    if workers > 0:
+        return workers
+    return min(MAX_AUTO_WORKERS, os.cpu_count() or 1)
+
+def parallel_map(fn: Callable[[T], R], items: Sequence[T], workers: int = 0) -> List[R]:
+    """
+    Applies `fn` to every item on a bounded thread pool and returns the results in order.
+
+    Runs inline when there is a single item or a single worker, so callers don't pay
+    for a pool they can't use. The first exception raised by `fn` is re-raised.
+    """
+    workers = min(resolve_workers(workers), len(items))
+    if workers <= 1:
+        return [fn(item) for item in items]
+    fn = in_current_span(fn)
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="rune") as pool:
+        return list(pool.map(fn, items))
+
+def parallel_imap(fn: Callable[[T], R], items: Iterable[T], workers: int = 0, window: int = 4) -> Iterator[R]:
+    """
+    Lazily applies `fn` to a stream of items on a bounded thread pool, yielding results in order.
+
+    At most `window` items per worker are in flight, so memory stays bounded however long
+    the stream is. The first exception raised by `fn` is re-raised and the rest is cancelled.
+    """
+    workers = resolve_workers(workers)
+    if workers <= 1:
+        yield from map(fn, items)
+        return
+    items = iter(items)
+    fn = in_current_span(fn)
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="rune") as pool:
+        pending: Deque[Future] = deque(pool.submit(fn, item) for item in islice(items, workers * window))
+        try:
+            while pending:
+                result = pending.popleft().result()
+                for item in islice(items, 1):
+                    pending.append(pool.submit(fn, item))
+                yield result
+        finally:
+            for future in pending:
+                future.cancel()
@@ -0,0 +1,60 @@
+import json
+import re
+import shlex
+from typing import Dict, Optional
+
+FORMATS = ("dotenv", "json", "export")
+
+def env_var_name(full_name: str, field: str) -> str:
+    """
+    Turns a secret field into an environment variable name,
+    e.g. (`db/prod/mydb`, `password`) -> `DB_PROD_MYDB_PASSWORD`.
+    """
+    name = re.sub(r"[^A-Za-z0-9]+", "_", f"{full_name}_{field}").strip("_").upper()
+    if name == "" or name[0].isdigit():
+        name = "_" + name
+    return name
+
+def to_env_vars(secrets: Dict[str, Dict[str, str]], sources: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+    """
+    The environment variables of every secret field.
+    `sources` maps the names already taken (e.g. by earlier batches) to the field they came from,
+    and is updated with the new ones.
+
+    Raises ValueError if two fields turn into the same variable name.
+    """
+    sources = {} if sources is None else sources
+    env_vars = {}
+    for full_name, fields in secrets.items():
+        for field, value in fields.items():
+            name = env_var_name(full_name, field)
+            source = f"field '{field}' of '{full_name}'"
+            if name in sources:
+                raise ValueError(f"Both {sources[name]} and {source} become the variable {name}.")
+            sources[name] = source
+            env_vars[name] = value
+    return env_vars
+
+def format_dotenv(secrets: Dict[str, Dict[str, str]], sources: Optional[Dict[str, str]] = None) -> str:
+    lines = []
+    for name, value in to_env_vars(secrets, sources).items():
+        escaped = value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        lines.append(f'{name}="{escaped}"')
+    return "\n".join(lines)
+
+def format_export(secrets: Dict[str, Dict[str, str]]) -> str:
+    return "\n".join(f"export {name}={shlex.quote(value)}" for name, value in to_env_vars(secrets).items())
+
+def format_json(secrets: Dict[str, Dict[str, str]]) -> str:
+    return json.dumps(secrets, indent=2)
+
+def format_secrets(secrets: Dict[str, Dict[str, str]], output_format: str) -> str:
+    match output_format:
+        case "dotenv":
+            return format_dotenv(secrets)
+        case "json":
+            return format_json(secrets)
+        case "export":
+            return format_export(secrets)
+        case _:
+            raise ValueError(f"Format '{output_format}' is not supported. Use one of: {', '.join(FORMATS)}.")
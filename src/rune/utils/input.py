@@ -1,14 +1,20 @@
 from typing import Optional, Tuple, Dict
 from rich.prompt import Prompt
 
+from rune.utils.profiling import span
+
 NAME_PROMPT = "Secret name"
 KEY_PROMPT = "Encryption key"
 
+# Prompts are timed as their own phases, so waiting for the user stands apart in --profile.
+
 def input_name() -> str:
-    return Prompt.ask(NAME_PROMPT)
+    with span("prompt name"):
+        return Prompt.ask(NAME_PROMPT)
 
 def input_key() -> str:
-    return Prompt.ask(KEY_PROMPT, password=True)
+    with span("prompt key"):
+        return Prompt.ask(KEY_PROMPT, password=True)
 
 def split_name_and_ns(n_and_ns: str) -> Tuple[str, str]:
     s = n_and_ns.split("/")
@@ -17,7 +23,8 @@ def split_name_and_ns(n_and_ns: str) -> Tuple[str, str]:
     return s[-1], "/".join(s[:-1]).removeprefix("/").removesuffix("/")
 
 def get_secret_input(name: str) -> str:
-    return Prompt.ask(f"Value for field '[bold]{name}[/]'", password=True)
+    with span("prompt field"):
+        return Prompt.ask(f"Value for field '[bold]{name}[/]'", password=True)
 
 def get_fields_dict(fields: str) -> Dict[str, str]:
     return {k.strip(): get_secret_input(k.strip()) for k in fields.split(",")}
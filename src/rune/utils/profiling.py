@@ -0,0 +1,239 @@
+import functools
+import os
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple, TypeVar
+
+# Timing instrumentation for `rune --profile` / RUNE_PROFILE=1.
+#
+# Code marks its phases with `span("name")` blocks or the `timed` decorator. While profiling
+# is off, both cost a single global lookup; once enabled, every span's time is added up per
+# call path (the names of the spans it is nested in) and reported when the command ends.
+#
+# Only the standard library is imported here (cProfile, json and threading lazily), since
+# `rune.__main__` imports this module before anything else.
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+ENV_PROFILE = "RUNE_PROFILE"
+ENV_PROFILE_JSON = "RUNE_PROFILE_JSON"
+ENV_CPROFILE = "RUNE_CPROFILE"
+
+# Taken when `rune.__main__` imports this module, so the time before profiling was
+# switched on (imports, argument parsing) still shows up, as the "startup" phase.
+PROCESS_STARTED = time.perf_counter()
+
+Path = Tuple[str, ...]
+
+_recorder: Optional["Recorder"] = None
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        return None
+
+    def __exit__(self, *exc: Any) -> bool:
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Span:
+    __slots__ = ("recorder", "name", "started")
+
+    def __init__(self, recorder: "Recorder", name: str) -> None:
+        self.recorder = recorder
+        self.name = name
+        self.started = 0.0
+
+    def __enter__(self) -> None:
+        self.recorder.push(self.name)
+        self.started = time.perf_counter()
+
+    def __exit__(self, *exc: Any) -> bool:
+        self.recorder.pop(time.perf_counter() - self.started)
+        return False
+
+
+class Recorder:
+    """
+    Adds up span timings per call path. Each thread has its own stack of open spans;
+    work handed to worker threads with `in_current_span` is counted under the span
+    that handed it over.
+    """
+
+    def __init__(self, json_path: Optional[str] = None, cprofile_path: Optional[str] = None) -> None:
+        import threading
+        self.json_path = json_path
+        self.cprofile_path = cprofile_path
+        self.__local = threading.local()
+        self.__lock = threading.Lock()
+        # path -> [calls, total seconds], in the order paths were first entered.
+        self.__totals: Dict[Path, List[float]] = {}
+        self.__profiler = None
+        self.__totals[("startup",)] = [1, time.perf_counter() - PROCESS_STARTED]
+        if cprofile_path:
+            self.start_cprofile()
+
+    def stack(self) -> List[str]:
+        stack = getattr(self.__local, "stack", None)
+        if stack is None:
+            stack = self.__local.stack = []
+        return stack
+
+    def push(self, name: str) -> None:
+        stack = self.stack()
+        stack.append(name)
+        path = tuple(stack)
+        if path not in self.__totals:
+            with self.__lock:
+                self.__totals.setdefault(path, [0, 0.0])
+
+    def pop(self, elapsed: float) -> None:
+        stack = self.stack()
+        path = tuple(stack)
+        stack.pop()
+        with self.__lock:
+            totals = self.__totals[path]
+            totals[0] += 1
+            totals[1] += elapsed
+
+    def run_under(self, path: Path, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        saved = self.stack()
+        self.__local.stack = list(path)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            self.__local.stack = saved
+
+    def start_cprofile(self) -> None:
+        import cProfile
+        self.__profiler = cProfile.Profile()
+        self.__profiler.enable()
+
+    def phases(self) -> List[Dict[str, Any]]:
+        """
+        Every recorded path in tree order, with its calls, total and self time in ms.
+        Self time is what a span spent outside its child spans; spans run on worker
+        threads can overlap, so it is clamped at zero.
+        """
+        children: Dict[Path, float] = {}
+        for path, (_, total) in self.__totals.items():
+            if len(path) > 1:
+                children[path[:-1]] = children.get(path[:-1], 0.0) + total
+
+        first_seen = {path: i for i, path in enumerate(self.__totals)}
+        ordered = sorted(self.__totals, key=lambda path: [first_seen[path[:i]] for i in range(1, len(path) + 1)])
+        return [
+            {
+                "name": path[-1],
+                "path": "/".join(path),
+                "depth": len(path) - 1,
+                "calls": int(self.__totals[path][0]),
+                "total_ms": round(self.__totals[path][1] * 1000, 3),
+                "self_ms": round(max(0.0, self.__totals[path][1] - children.get(path, 0.0)) * 1000, 3),
+            }
+            for path in ordered
+        ]
+
+    def finish(self) -> None:
+        if self.__profiler is not None:
+            self.__profiler.disable()
+            self.__profiler.dump_stats(self.cprofile_path)
+
+        wall_ms = (time.perf_counter() - PROCESS_STARTED) * 1000
+        phases = self.phases()
+        if self.json_path:
+            import json
+            report = {"command": sys.argv[1:], "wall_ms": round(wall_ms, 3), "phases": phases}
+            with open(self.json_path, "w") as f:
+                json.dump(report, f, indent=2)
+            return
+
+        accounted_ms = sum(phase["total_ms"] for phase in phases if phase["depth"] == 0)
+        lines = [f"rune profile: {wall_ms:.1f} ms wall clock", f"  {'phase':<64} {'calls':>6} {'total ms':>10} {'self ms':>10}"]
+        for phase in phases:
+            label = "  " * phase["depth"] + phase["name"]
+            lines.append(f"  {label:<64} {phase['calls']:>6} {phase['total_ms']:>10.1f} {phase['self_ms']:>10.1f}")
+        lines.append(f"  {'(outside any phase)':<64} {'':>6} {max(0.0, wall_ms - accounted_ms):>10.1f}")
+        if self.cprofile_path:
+            lines.append(f"cProfile stats written to {self.cprofile_path}")
+        print("\n".join(lines), file=sys.stderr)
+
+
+def enabled() -> bool:
+    return _recorder is not None
+
+def enable(json_path: Optional[str] = None, cprofile_path: Optional[str] = None) -> None:
+    """
+    Starts recording spans, if not already recording. The report is written as JSON to
+    `json_path` if given, or printed to stderr, and cProfile stats go to `cprofile_path`.
+    """
+    global _recorder
+    if _recorder is None:
+        _recorder = Recorder(json_path, cprofile_path)
+        return
+    _recorder.json_path = json_path or _recorder.json_path
+    if cprofile_path and not _recorder.cprofile_path:
+        _recorder.cprofile_path = cprofile_path
+        _recorder.start_cprofile()
+
+def enable_from_environment() -> None:
+    json_path = os.environ.get(ENV_PROFILE_JSON)
+    cprofile_path = os.environ.get(ENV_CPROFILE)
+    if os.environ.get(ENV_PROFILE, "").lower() not in ("", "0", "false", "no") or json_path or cprofile_path:
+        enable(json_path, cprofile_path)
+
+def finish() -> None:
+    """
+    Stops recording and reports. Does nothing if profiling is off or already reported.
+    """
+    global _recorder
+    recorder, _recorder = _recorder, None
+    if recorder is not None:
+        recorder.finish()
+
+def span(name: str):
+    """
+    Context manager timing the enclosed block as phase `name`.
+    """
+    recorder = _recorder
+    if recorder is None:
+        return _NULL_SPAN
+    return Span(recorder, name)
+
+def timed(fn: F) -> F:
+    """
+    Times every call of `fn` as a phase named after its module and qualified name
+    (e.g. `internal.get.get_secret`).
+    """
+    name = fn.__module__.removeprefix("rune.") + "." + fn.__qualname__
+
+    @functools.wraps(fn)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        recorder = _recorder
+        if recorder is None:
+            return fn(*args, **kwargs)
+        with Span(recorder, name):
+            return fn(*args, **kwargs)
+
+    return wrapper  # type: ignore[return-value]
+
+def in_current_span(fn: F) -> F:
+    """
+    Wraps `fn`, about to be run on worker threads, so its spans are counted under the
+    caller's current span. Returns `fn` itself while profiling is off.
+    """
+    recorder = _recorder
+    if recorder is None:
+        return fn
+    path = tuple(recorder.stack())
+
+    @functools.wraps(fn)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        return recorder.run_under(path, fn, *args, **kwargs)
+
+    return wrapper  # type: ignore[return-value]
@@ -1,22 +1,49 @@
-from typing import Dict, Optional
-from platformdirs import PlatformDirs
+from typing import TYPE_CHECKING, Dict, Optional, Tuple
 import os
 import json
 
 from rune.models.result import Result, Success
+from rune.utils.profiling import timed
+
+if TYPE_CHECKING:
+    from rune.models.settings import Settings
+
+# The settings model (and dataclasses with it) is imported on first use, so that
+# peek_secrets_path stays cheap enough for shell completion.
+
+# Environment variables that take precedence over settings.json.
+# When all three are set, settings.json is not read (or created) at all.
+ENV_ENCRYPTION = "RUNE_ENCRYPTION"
+ENV_STORAGE_MODE = "RUNE_STORAGE_MODE"
+ENV_SECRETS_FILE = "RUNE_SECRETS_FILE"
+ENV_STORAGE_ENCODING = "RUNE_STORAGE_ENCODING"
+ENV_CONFIG_DIR = "RUNE_CONFIG_DIR"
+
+_cached_settings: Optional["Settings"] = None
+_cached_signature: Optional[Tuple[str, int, int]] = None
 
 def default_settings(config_path) -> Dict: 
-    return {
-        "encryption": "aesgcm",
-        "storage": {
-            "mode": "local",
-            "file": os.path.join(config_path, "secrets.json")
-        }
-    }
+    return default_settings_model(config_path).to_dict()
+
+def default_settings_model(config_path) -> "Settings":
+    from rune.models.settings import Settings, StorageSettings
+    return Settings(
+        encryption="aesgcm",
+        storage=StorageSettings(
+            mode="local",
+            file=default_secrets_path(config_path)
+        )
+    )
+
+def default_secrets_path(config_path) -> str:
+    return os.path.join(config_path, "secrets.json")
 
 def update_settings(encryption: Optional[str] = None,
                     storage_mode: Optional[str] = None,
-                    storage_file: Optional[str] = None) -> Result[str]:
+                    storage_file: Optional[str] = None,
+                    storage_encoding: Optional[str] = None,
+                    key_cache_enabled: Optional[bool] = None,
+                    kdf: Optional[Dict] = None) -> Result[str]:
     d = get_settings_dict()
     if encryption is not None:
         d["encryption"] = encryption
@@ -24,44 +51,64 @@ def update_settings(encryption: Optional[str] = None,
         d["storage"]["mode"] = storage_mode
     if storage_file is not None:
         d["storage"]["file"] = storage_file
+    if storage_encoding is not None:
+        d["storage"]["encoding"] = storage_encoding
+    if key_cache_enabled is not None:
+        d.setdefault("key_cache", default_settings(get_config_dir())["key_cache"])
+        d["key_cache"]["enabled"] = key_cache_enabled
+    if kdf is not None:
+        d["kdf"] = kdf
 
     settings_path = get_settings_path()
     with open(settings_path, "w") as f:
         json.dump(d, f, indent=4)
 
+    invalidate_settings()
     return Success(f"Updated settings at '{settings_path}'")
 
 
 def get_config_dir() -> str:
-    dirs = PlatformDirs("rune", None)
-    return dirs.user_config_dir
+    env_config_dir = os.environ.get(ENV_CONFIG_DIR)
+    if env_config_dir:
+        return env_config_dir
+    from platformdirs import user_config_dir
+    return user_config_dir("rune", None)
 
 def get_settings_path() -> str:
     config_dir = get_config_dir()
     settings_file = os.path.join(config_dir, "settings.json")
     return settings_file
 
+@timed
 def ensure_settings_exist() -> str:
-    dirs = PlatformDirs("rune", None)
-    config_dir = dirs.user_config_dir
+    settings_file = get_settings_path()
+    if configured_by_environment():
+        return settings_file
 
+    config_dir = get_config_dir()
     os.makedirs(config_dir, exist_ok=True)
 
-    settings_file = get_settings_path()
-
     if not os.path.exists(settings_file):
         with open(settings_file, "w") as f:
             json.dump(default_settings(config_dir), f, indent=4)
 
     return settings_file
 
+@timed
 def ensure_secrets_exist() -> str:
-    secrets_path = get_secrets_path()
-    if not os.path.exists(secrets_path) or os.path.getsize(secrets_path) == 0:
-        with open(secrets_path, "w") as f:
+    storage = get_settings().storage
+    if storage.mode in ("sqlite", "journal"):
+        # These storage managers create their files on first use.
+        return storage.file
+    if storage.encoding == "binary":
+        # So does the binary vault, which is not a JSON file.
+        return storage.file
+    if not os.path.exists(storage.file) or os.path.getsize(storage.file) == 0:
+        with open(storage.file, "w") as f:
             json.dump({}, f, indent=4)
-    return secrets_path
+    return storage.file
 
+@timed
 def get_settings_dict() -> Dict:
     try:
         with open(get_settings_path(), "r") as f:
@@ -69,14 +116,98 @@ def get_settings_dict() -> Dict:
     except:
         return default_settings(get_config_dir())
 
+def configured_by_environment() -> bool:
+    return all(os.environ.get(v) for v in (ENV_ENCRYPTION, ENV_STORAGE_MODE, ENV_SECRETS_FILE))
+
+def get_settings() -> "Settings":
+    """
+    Returns the effective settings: settings.json with environment overrides applied.
+
+    The file is parsed once per process and re-read only when its mtime or size changes,
+    so repeated lookups cost a single stat().
+    """
+    global _cached_settings, _cached_signature
+
+    config_dir = get_config_dir()
+    defaults = default_settings_model(config_dir)
+
+    if configured_by_environment():
+        return apply_environment(defaults)
+
+    settings_path = os.path.join(config_dir, "settings.json")
+    try:
+        stat = os.stat(settings_path)
+        signature = (settings_path, stat.st_mtime_ns, stat.st_size)
+    except OSError:
+        signature = None
+
+    if _cached_settings is None or signature is None or signature != _cached_signature:
+        from rune.models.settings import Settings
+        _cached_settings = Settings.from_dict(get_settings_dict(), defaults)
+        _cached_signature = signature
+
+    return apply_environment(_cached_settings)
+
+def apply_environment(settings: "Settings") -> "Settings":
+    encryption = os.environ.get(ENV_ENCRYPTION)
+    storage_mode = os.environ.get(ENV_STORAGE_MODE)
+    secrets_file = os.environ.get(ENV_SECRETS_FILE)
+    storage_encoding = os.environ.get(ENV_STORAGE_ENCODING)
+    if not (encryption or storage_mode or secrets_file or storage_encoding):
+        return settings
+
+    from dataclasses import replace
+    return replace(
+        settings,
+        encryption=encryption or settings.encryption,
+        storage=replace(
+            settings.storage,
+            mode=storage_mode or settings.storage.mode,
+            file=secrets_file or settings.storage.file,
+            encoding=storage_encoding or settings.storage.encoding
+        )
+    )
+
+def invalidate_settings() -> None:
+    global _cached_settings, _cached_signature
+    _cached_settings = None
+    _cached_signature = None
+
 def get_secrets_path() -> str:
-    settings = get_settings_dict()
-    return settings["storage"]["file"]
+    return get_settings().storage.file
+
+def peek_secrets_path() -> str:
+    """
+    Same as get_secrets_path, read straight from the environment and settings.json
+    without building the Settings model, for shell completion.
+    """
+    env_secrets_file = os.environ.get(ENV_SECRETS_FILE)
+    if env_secrets_file:
+        return env_secrets_file
+    try:
+        with open(get_settings_path(), "r") as f:
+            storage = json.load(f).get("storage") or {}
+    except (OSError, ValueError, AttributeError):
+        storage = {}
+    return storage.get("file") or default_secrets_path(get_config_dir())
 
 def get_configured_encryption_identifier() -> str:
-    settings = get_settings_dict()
-    return settings["encryption"]
+    return get_settings().encryption
 
 def get_configured_storage_manager_identifier() -> str:
-    settings = get_settings_dict()
-    return settings["storage"]["mode"]
+    return get_settings().storage.mode
+
+def get_agent_socket_path() -> str:
+    env_socket = os.environ.get("RUNE_AGENT_SOCKET")
+    if env_socket:
+        return env_socket
+
+    configured_socket = get_settings().agent.socket
+    if configured_socket:
+        return configured_socket
+
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir:
+        return os.path.join(runtime_dir, "rune", "agent.sock")
+    import tempfile
+    return os.path.join(tempfile.gettempdir(), f"rune-{os.getuid()}", "agent.sock")
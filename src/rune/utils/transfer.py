@@ -0,0 +1,136 @@
+import csv
+import json
+from typing import Dict, Iterable, Iterator, Optional, TextIO, Tuple
+
+from rune.storage.jsonstream import iter_json_object
+from rune.utils.envformat import format_dotenv
+
+# Import and export formats. JSON and CSV keep secret and field names, so an export
+# imports back as is.
+#   json:   {"db/prod/mydb": {"host": "...", "password": "..."}, ...}
+#   csv:    name,field,value rows, one per field
+#   dotenv: KEY=value lines; imported as the fields of one secret,
+#           exported with `get --many` variable names (DB_PROD_MYDB_HOST=...)
+FORMATS = ("json", "csv", "dotenv")
+
+CSV_HEADER = ["name", "field", "value"]
+
+SecretEntry = Tuple[str, Dict[str, str]]
+
+def read_secrets(f: TextIO, input_format: str, name: Optional[str] = None) -> Iterator[SecretEntry]:
+    """
+    Parses (full name, fields) entries from `f`, reading it incrementally.
+    Dotenv files are read as the fields of the secret called `name`.
+
+    Raises ValueError if the input is malformed or the format is not supported.
+    """
+    match input_format:
+        case "json":
+            return read_json(f)
+        case "csv":
+            return read_csv(f)
+        case "dotenv":
+            if not name:
+                raise ValueError("Importing a dotenv file needs the name of the secret to store it as.")
+            return iter([(name, read_dotenv(f))])
+        case _:
+            raise ValueError(f"Format '{input_format}' is not supported. Use one of: {', '.join(FORMATS)}.")
+
+def read_json(f: TextIO) -> Iterator[SecretEntry]:
+    for full_name, fields in iter_json_object(f):
+        if not all(isinstance(value, str) for value in fields.values()):
+            raise ValueError(f"Fields of '{full_name}' must be strings")
+        yield full_name, fields
+
+def read_csv(f: TextIO) -> Iterator[SecretEntry]:
+    """
+    Groups name,field,value rows into secrets. Rows of one secret are usually adjacent,
+    so each secret is yielded as soon as the next one starts; rows that come back to an
+    earlier secret are rejected rather than silently splitting it.
+    """
+    rows = csv.reader(f)
+    header = next(rows, None)
+    if header is None:
+        return
+    if [column.strip().lower() for column in header] != CSV_HEADER:
+        raise ValueError(f"Expected a CSV header of {','.join(CSV_HEADER)}")
+
+    seen = set()
+    current: Optional[str] = None
+    fields: Dict[str, str] = {}
+    for line, row in enumerate(rows, 2):
+        if not row:
+            continue
+        if len(row) != 3:
+            raise ValueError(f"Line {line}: expected 3 columns, got {len(row)}")
+        full_name, field, value = row
+        if full_name != current:
+            if current is not None:
+                yield current, fields
+            if full_name in seen:
+                raise ValueError(f"Line {line}: rows of '{full_name}' must be adjacent")
+            seen.add(full_name)
+            current, fields = full_name, {}
+        fields[field] = value
+    if current is not None:
+        yield current, fields
+
+def read_dotenv(f: TextIO) -> Dict[str, str]:
+    """
+    Reads KEY=value lines, skipping blank lines and comments. An `export ` prefix is
+    allowed, and values may be single-quoted (literal) or double-quoted (with escapes).
+    """
+    fields: Dict[str, str] = {}
+    for line, text in enumerate(f, 1):
+        text = text.strip()
+        if not text or text.startswith("#"):
+            continue
+        key, separator, value = text.removeprefix("export ").partition("=")
+        key = key.strip()
+        if not separator or not key:
+            raise ValueError(f"Line {line}: expected KEY=value")
+        fields[key] = dotenv_value(value.strip())
+    return fields
+
+def dotenv_value(value: str) -> str:
+    if len(value) >= 2 and value[0] == value[-1] == "'":
+        return value[1:-1]
+    if len(value) >= 2 and value[0] == value[-1] == '"':
+        return json.loads(value)
+    # Unquoted values end at an inline comment.
+    return value.split(" #", 1)[0].rstrip()
+
+def write_secrets(out: TextIO, secrets: Iterable[SecretEntry], output_format: str) -> int:
+    """
+    Writes (full name, fields) entries to `out` one at a time, in `output_format`.
+    Dotenv output names each variable after the secret and field, like `get --many`.
+    Returns the number of secrets written.
+
+    Raises ValueError if the format is not supported, or if two dotenv variables would share a name.
+    """
+    if output_format not in FORMATS:
+        raise ValueError(f"Format '{output_format}' is not supported. Use one of: {', '.join(FORMATS)}.")
+
+    count = 0
+    writer = csv.writer(out, lineterminator="\n")
+    # Variable names written so far, so names colliding across secrets are caught too.
+    env_sources: Dict[str, str] = {}
+    # Headers are only written with the first secret, so nothing is written if decrypting it fails.
+    for full_name, fields in secrets:
+        match output_format:
+            case "json":
+                out.write(("{" if count == 0 else ",") + "\n  " + json.dumps(full_name) + ": " + json.dumps(fields))
+            case "csv":
+                if count == 0:
+                    writer.writerow(CSV_HEADER)
+                writer.writerows([full_name, field, value] for field, value in fields.items())
+            case "dotenv":
+                if fields:
+                    out.write(format_dotenv({full_name: fields}, env_sources) + "\n")
+        count += 1
+
+    if output_format == "json":
+        out.write("\n}\n" if count else "{}\n")
+    elif output_format == "csv" and count == 0:
+        writer.writerow(CSV_HEADER)
+    return count
@@ -0,0 +1,16 @@
+import pytest
+
+from tests.helpers import BACKENDS, make_storage
+
+
+@pytest.fixture
+def vault_path(tmp_path) -> str:
+    return str(tmp_path / "secrets")
+
+@pytest.fixture(params=list(BACKENDS))
+def backend(request) -> str:
+    return request.param
+
+@pytest.fixture
+def storage(backend, vault_path):
+    return make_storage(backend, vault_path)
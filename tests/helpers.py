@@ -0,0 +1,37 @@
+import os
+
+from rune.models.secret import Secret, SecretField
+from rune.storage import factory as StorageManagerFactory
+
+# Storage backends as (storage mode, encoding).
+BACKENDS = {
+    "local": ("local", "json"),
+    "local-binary": ("local", "binary"),
+    "journal": ("journal", "json"),
+    "sqlite": ("sqlite", "json"),
+}
+
+def make_secret(name: str, namespace: str = "", value: str = "QUJD", **fields: str) -> Secret:
+    """
+    An unencrypted secret whose field values are base64 text, as the vault stores them.
+    """
+    fields = fields or {"value": value}
+    return Secret(
+        name=name,
+        algorithm="no-encryption",
+        namespace=namespace,
+        fields={k: SecretField(ciphertext=v, algorithm="no-encryption") for k, v in fields.items()},
+    )
+
+def make_storage(backend: str, path: str):
+    """
+    A storage manager of `backend` over a new, empty vault at `path`.
+    """
+    mode, encoding = BACKENDS[backend]
+    if mode == "local" and encoding == "json" and not os.path.exists(path):
+        with open(path, "w") as f:
+            f.write("{}")
+    return StorageManagerFactory.get_storage_manager(mode, path, encoding)
+
+def value_of(secret: Secret, field: str = "value") -> str:
+    return secret.fields[field].to_dict()["ciphertext"]
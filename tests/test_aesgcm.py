@@ -0,0 +1,95 @@
+import os
+import shutil
+
+import pytest
+
+from rune.encryption.aesgcm import ENVELOPE_VERSION, PER_FIELD_SALT_VERSION, AESGCMEncrypter
+from rune.encryption.kdf import Pbkdf2
+from rune.exception.wrongkey import WrongKeyUsed
+from rune.internal.update import update_secret
+from rune.storage.local import LocalJsonStorageManager
+from rune.utils import settings as Settings
+
+# A vault written by rune before per-secret envelopes: one salt per field, no recorded KDF params.
+V1_VAULT = os.path.join(os.path.dirname(__file__), "fixtures", "v1_vault.json")
+V1_KEY = "correct horse"
+V1_FIELDS = {"user": "admin", "password": "hunter2"}
+
+
+@pytest.fixture
+def encrypter() -> AESGCMEncrypter:
+    return AESGCMEncrypter(kdf=Pbkdf2(iterations=1000))
+
+@pytest.fixture
+def derived_salts(monkeypatch):
+    """
+    The salt of every PBKDF2 derivation made during the test.
+    """
+    salts = []
+    derive = Pbkdf2.derive
+
+    def counting(self, password: str, salt: bytes) -> bytes:
+        salts.append(salt)
+        return derive(self, password, salt)
+
+    monkeypatch.setattr(Pbkdf2, "derive", counting)
+    return salts
+
+def test_envelope_round_trip(encrypter, derived_salts):
+    fields = encrypter.encrypt_fields({"user": "admin", "password": "hunter2", "empty": ""}, "key")
+
+    assert {f.version for f in fields.values()} == {ENVELOPE_VERSION}
+    assert len({f.salt for f in fields.values()}) == 1
+    assert len({f.nonce for f in fields.values()}) == 3
+    assert all(f.params == {"kdf": "pbkdf2-sha256", "iterations": 1000, "length": 32} for f in fields.values())
+    assert encrypter.decrypt_fields(fields, "key") == {"user": "admin", "password": "hunter2", "empty": ""}
+    # One derivation to encrypt and one to decrypt, however many fields.
+    assert len(derived_salts) == 2
+
+def test_envelope_fields_decrypt_one_at_a_time(encrypter):
+    fields = encrypter.encrypt_fields({"user": "admin", "password": "hunter2"}, "key")
+
+    assert encrypter.decrypt(fields["password"], "key") == "hunter2"
+
+def test_wrong_key_is_rejected(encrypter):
+    fields = encrypter.encrypt_fields({"password": "hunter2"}, "key")
+
+    with pytest.raises(WrongKeyUsed):
+        encrypter.decrypt_fields(fields, "not the key")
+    with pytest.raises(WrongKeyUsed):
+        encrypter.decrypt(fields["password"], "not the key")
+
+def test_recorded_kdf_wins_over_the_configured_one(encrypter):
+    fields = encrypter.encrypt_fields({"password": "hunter2"}, "key")
+
+    assert AESGCMEncrypter(kdf=Pbkdf2(iterations=2000)).decrypt_fields(fields, "key") == {"password": "hunter2"}
+
+
+@pytest.fixture
+def v1_vault(tmp_path) -> str:
+    path = str(tmp_path / "secrets.json")
+    shutil.copy(V1_VAULT, path)
+    return path
+
+def test_v1_record_decrypts(v1_vault):
+    secret = LocalJsonStorageManager(v1_vault).retreive_secret("mydb", "db/prod")
+
+    assert {f.version for f in secret.fields.values()} == {PER_FIELD_SALT_VERSION}
+    assert len({f.salt for f in secret.fields.values()}) == 2
+    assert AESGCMEncrypter().decrypt_fields(secret.fields, V1_KEY) == V1_FIELDS
+    with pytest.raises(WrongKeyUsed):
+        AESGCMEncrypter().decrypt_fields(secret.fields, "not the key")
+
+def test_update_upgrades_a_v1_record(v1_vault, monkeypatch):
+    monkeypatch.setenv(Settings.ENV_ENCRYPTION, "aesgcm")
+    monkeypatch.setenv(Settings.ENV_STORAGE_MODE, "local")
+    monkeypatch.setenv(Settings.ENV_SECRETS_FILE, v1_vault)
+    monkeypatch.setenv("RUNE_NO_AGENT", "1")
+    Settings.invalidate_settings()
+
+    assert update_secret("mydb", {"password": "hunter3"}, V1_KEY, "db/prod").is_success()
+
+    secret = LocalJsonStorageManager(v1_vault).retreive_secret("mydb", "db/prod")
+    assert {f.version for f in secret.fields.values()} == {ENVELOPE_VERSION}
+    assert len({f.salt for f in secret.fields.values()}) == 1
+    assert AESGCMEncrypter().decrypt_fields(secret.fields, V1_KEY) == {"user": "admin", "password": "hunter3"}
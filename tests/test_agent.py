@@ -0,0 +1,148 @@
+import json
+import os
+import shutil
+import socket
+import stat
+import tempfile
+import time
+
+import pytest
+
+import rune
+from rune.agent import client as AgentClient
+from rune.agent import server as AgentServerModule
+from rune.agent.protocol import VAULT_MISMATCH
+from rune.agent.server import AgentServer
+from rune.commands.agentcmd import handle_agent_start, handle_agent_status, handle_agent_stop
+from rune.internal.add import add_secret
+from rune.internal.get import get_secret
+from rune.utils import settings as Settings
+
+KEY = "agent key"
+
+
+def new_vault(path: str) -> str:
+    with open(path, "w") as f:
+        f.write("{}")
+    return path
+
+def write_settings(config_dir: str, vault: str) -> None:
+    os.makedirs(config_dir, exist_ok=True)
+    with open(os.path.join(config_dir, "settings.json"), "w") as f:
+        json.dump({
+            "encryption": "aesgcm",
+            "storage": {"mode": "local", "file": vault},
+            "kdf": {"name": "pbkdf2-sha256", "params": {"iterations": 1000}},
+        }, f)
+
+@pytest.fixture
+def socket_path(tmp_path, monkeypatch):
+    """
+    Points rune at a vault in tmp_path and the agent at a socket in a fresh directory.
+    The socket lives under a short temporary directory, as Unix socket paths are limited to ~100 bytes.
+    """
+    config_dir = str(tmp_path / "config")
+    write_settings(config_dir, new_vault(str(tmp_path / "secrets.json")))
+    for name in (Settings.ENV_ENCRYPTION, Settings.ENV_STORAGE_MODE, Settings.ENV_SECRETS_FILE,
+                 Settings.ENV_STORAGE_ENCODING, "RUNE_NO_AGENT"):
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setenv(Settings.ENV_CONFIG_DIR, config_dir)
+
+    socket_root = tempfile.mkdtemp(prefix="rune-")
+    path = os.path.join(socket_root, "agent", "agent.sock")
+    monkeypatch.setenv("RUNE_AGENT_SOCKET", path)
+    # The agent process started by `agent start` imports rune from this tree.
+    source_root = os.path.dirname(os.path.dirname(rune.__file__))
+    monkeypatch.setenv("PYTHONPATH", os.pathsep.join(filter(None, [source_root, os.environ.get("PYTHONPATH")])))
+    monkeypatch.setattr(AgentClient, "_enabled", True)
+    Settings.invalidate_settings()
+
+    yield path
+
+    AgentClient.request("stop")
+    deadline = time.monotonic() + 5
+    while os.path.exists(path) and time.monotonic() < deadline:
+        time.sleep(0.05)
+    shutil.rmtree(socket_root, ignore_errors=True)
+    Settings.invalidate_settings()
+
+@pytest.fixture
+def agent(socket_path, capsys):
+    handle_agent_start(idle_timeout=60)
+    assert "Agent started" in capsys.readouterr().out
+    return socket_path
+
+def test_start_status_stop(agent, capsys):
+    status = AgentClient.request("status")
+    assert status is not None and status.is_success()
+    assert status.value()["socket"] == agent
+
+    handle_agent_status()
+    assert f"pid: {status.value()['pid']}" in capsys.readouterr().out
+
+    handle_agent_start()
+    assert "already running" in capsys.readouterr().out
+
+    handle_agent_stop()
+    assert "Agent stopped" in capsys.readouterr().out
+    deadline = time.monotonic() + 5
+    while os.path.exists(agent) and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert not os.path.exists(agent)
+    assert AgentClient.request("status") is None
+
+    handle_agent_status()
+    assert "No agent is running" in capsys.readouterr().out
+
+def test_socket_is_private(socket_path, capsys):
+    # A directory left readable by others is locked down when the agent binds.
+    os.makedirs(os.path.dirname(socket_path), mode=0o755)
+    os.chmod(os.path.dirname(socket_path), 0o755)
+    handle_agent_start(idle_timeout=60)
+
+    assert stat.S_IMODE(os.stat(os.path.dirname(socket_path)).st_mode) == 0o700
+    assert stat.S_IMODE(os.stat(socket_path).st_mode) == 0o600
+
+def test_agent_serves_its_own_vault(agent):
+    assert add_secret("db", {"password": "hunter2"}, KEY).is_success()
+    assert get_secret("db", KEY).value() == {"password": "hunter2"}
+    assert AgentClient.request("status").value()["key_cache_misses"] > 0
+
+def test_requests_for_another_vault_run_locally(agent, tmp_path, monkeypatch):
+    other_vault = new_vault(str(tmp_path / "other.json"))
+    monkeypatch.setenv(Settings.ENV_SECRETS_FILE, other_vault)
+    Settings.invalidate_settings()
+
+    assert AgentClient.get_secret("db", KEY) is None
+    assert add_secret("db", {"password": "other"}, KEY).is_success()
+    assert get_secret("db", KEY).value() == {"password": "other"}
+
+    # The agent neither derived keys for nor wrote to the other vault's secrets.
+    assert AgentClient.request("status").value()["key_cache_misses"] == 0
+    monkeypatch.delenv(Settings.ENV_SECRETS_FILE)
+    Settings.invalidate_settings()
+    assert get_secret("db", KEY).is_failure()
+
+def test_respond_refuses_another_vault(socket_path):
+    server = AgentServer(socket_path, idle_timeout=60)
+    other = {**AgentClient.vault_identity(), "file": "/elsewhere/secrets.json"}
+
+    response = server.respond({"op": "get", "name": "db", "key": KEY, "vault": other})
+    assert response["code"] == VAULT_MISMATCH
+    assert server.respond({"op": "get", "name": "db", "key": KEY})["code"] == VAULT_MISMATCH
+
+@pytest.mark.skipif(not hasattr(socket, "SO_PEERCRED"), reason="needs SO_PEERCRED")
+def test_peers_of_other_users_are_rejected(monkeypatch):
+    left, right = socket.socketpair(socket.AF_UNIX, socket.SOCK_STREAM)
+    with left, right:
+        assert AgentServerModule._peer_is_owner(left)
+
+        uid = os.getuid()
+        monkeypatch.setattr(AgentServerModule.os, "getuid", lambda: uid + 1)
+        assert not AgentServerModule._peer_is_owner(left)
+
+def test_peer_check_without_peer_credentials(monkeypatch):
+    monkeypatch.delattr(socket, "SO_PEERCRED", raising=False)
+    left, right = socket.socketpair(socket.AF_UNIX, socket.SOCK_STREAM)
+    with left, right:
+        assert AgentServerModule._peer_is_owner(left)
@@ -0,0 +1,87 @@
+import base64
+
+import pytest
+
+from rune.models.secret import Secret, SecretField
+from rune.storage.binarycodec import decode_secret, decode_stored, encode_secret
+from tests.helpers import make_secret
+
+
+def with_field(**values) -> Secret:
+    secret = make_secret("db", "prod")
+    secret.fields["value"] = SecretField(algorithm="aesgcm", params={"kdf": "scrypt", "n": 2}, **values)
+    return secret
+
+def test_round_trip_matches_to_dict():
+    secret = make_secret("db", "prod", user="dXNlcg==", password="cGFzc3dvcmQ=")
+    secret.tags = ["a", "b"]
+    secret.metadata = {"owner": "ops"}
+
+    decoded = decode_secret(encode_secret(secret))
+    assert Secret.from_dict(decoded).to_dict() == secret.to_dict()
+
+def test_base64_values_are_stored_as_raw_bytes():
+    raw = bytes(range(48))
+    secret = with_field(ciphertext=base64.b64encode(raw).decode(), nonce=b"\x00" * 12)
+
+    encoded = encode_secret(secret)
+    assert raw in encoded
+    field = decode_secret(encoded)["fields"]["value"]
+    assert field["ciphertext"] == raw
+    assert field["nonce"] == b"\x00" * 12
+
+@pytest.mark.parametrize("value", ["not base64!", "QQ", "QR==", "é"])
+def test_non_base64_values_are_kept_as_text(value):
+    secret = with_field(ciphertext=value, nonce="QUJD")
+
+    field = decode_secret(encode_secret(secret))["fields"]["value"]
+    assert field["ciphertext"] == value
+    assert Secret.from_dict(decode_secret(encode_secret(secret))).to_dict() == secret.to_dict()
+
+def test_none_values_stay_none():
+    secret = with_field(ciphertext="QUJD", nonce=None, tag=None, salt=None)
+
+    field = decode_secret(encode_secret(secret))["fields"]["value"]
+    assert (field["nonce"], field["tag"], field["salt"]) == (None, None, None)
+    assert field["ciphertext"] == b"ABC"
+
+def test_without_copy_values_are_views_into_the_buffer():
+    secret = with_field(ciphertext="QUJD", nonce="REVG", salt="not base64")
+    buffer = bytearray(encode_secret(secret))
+
+    field = decode_secret(buffer, copy=False)["fields"]["value"]
+    assert isinstance(field["ciphertext"], memoryview)
+    assert bytes(field["nonce"]) == b"DEF"
+    assert field["salt"] == "not base64"
+
+    # A view, not a copy: it sees changes to the buffer.
+    start = bytes(buffer).index(b"ABC")
+    buffer[start:start + 3] = b"XYZ"
+    assert bytes(field["ciphertext"]) == b"XYZ"
+
+def test_copy_detaches_values_from_a_view():
+    buffer = bytearray(encode_secret(with_field(ciphertext="QUJD")))
+
+    field = decode_secret(memoryview(buffer))["fields"]["value"]
+    assert type(field["ciphertext"]) is bytes
+
+def test_fields_share_params():
+    secret = make_secret("db", a="QQ==", b="Qg==")
+    for field in secret.fields.values():
+        field.params = {"kdf": "scrypt"}
+
+    fields = decode_secret(encode_secret(secret))["fields"]
+    assert fields["a"]["params"] is fields["b"]["params"]
+
+def test_decode_stored_accepts_both_encodings():
+    secret = make_secret("db")
+
+    assert decode_stored(encode_secret(secret))["name"] == "db"
+    assert decode_stored(b'{"name": "db"}')["name"] == "db"
+
+@pytest.mark.parametrize("cut", [1, 5, -1])
+def test_truncated_buffer_raises(cut):
+    encoded = encode_secret(make_secret("db"))
+
+    with pytest.raises(ValueError):
+        decode_secret(encoded[:cut])
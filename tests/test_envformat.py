@@ -0,0 +1,29 @@
+import io
+
+import pytest
+
+from rune.utils.envformat import format_secrets, to_env_vars
+from rune.utils.transfer import write_secrets
+
+
+def test_variables_are_named_after_secret_and_field():
+    assert to_env_vars({"db/prod": {"password": "p"}, "1st-key": {"v": "k"}}) == {
+        "DB_PROD_PASSWORD": "p",
+        "_1ST_KEY_V": "k",
+    }
+
+@pytest.mark.parametrize("output_format", ["dotenv", "export"])
+def test_colliding_names_fail_naming_both_fields(output_format):
+    secrets = {"db/prod": {"x_y": "1"}, "db/prod/x": {"y": "2"}}
+
+    with pytest.raises(ValueError, match="DB_PROD_X_Y") as err:
+        format_secrets(secrets, output_format)
+    assert "'x_y' of 'db/prod'" in str(err.value)
+    assert "'y' of 'db/prod/x'" in str(err.value)
+
+def test_json_keeps_colliding_names_apart():
+    assert '"db/prod/x"' in format_secrets({"db/prod": {"x_y": "1"}, "db/prod/x": {"y": "2"}}, "json")
+
+def test_dotenv_export_catches_collisions_across_secrets():
+    with pytest.raises(ValueError, match="DB_PROD_X_Y"):
+        write_secrets(io.StringIO(), [("db/prod", {"x_y": "1"}), ("db-prod/x", {"y": "2"})], "dotenv")
@@ -0,0 +1,110 @@
+import json
+import os
+
+import pytest
+
+from rune.encryption.aesgcm import AESGCMEncrypter
+from rune.internal.getmany import get_secrets
+from rune.internal.transfer import import_secrets
+from rune.utils import settings as Settings
+from tests.helpers import BACKENDS, make_storage
+
+KEY = "import key"
+
+
+@pytest.fixture
+def vault(backend, vault_path, tmp_path, monkeypatch):
+    """
+    Configures rune for a new vault of `backend`, and returns its storage manager.
+    """
+    mode, encoding = BACKENDS[backend]
+    storage = make_storage(backend, vault_path)
+    config_dir = str(tmp_path / "config")
+    os.makedirs(config_dir)
+    with open(os.path.join(config_dir, "settings.json"), "w") as f:
+        json.dump({
+            "encryption": "aesgcm",
+            "storage": {"mode": mode, "file": vault_path, "encoding": encoding},
+            "kdf": {"name": "pbkdf2-sha256", "params": {"iterations": 1000}},
+            "workers": 2,
+        }, f)
+    for name in (Settings.ENV_ENCRYPTION, Settings.ENV_STORAGE_MODE, Settings.ENV_SECRETS_FILE, Settings.ENV_STORAGE_ENCODING):
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setenv(Settings.ENV_CONFIG_DIR, config_dir)
+    monkeypatch.setenv("RUNE_NO_AGENT", "1")
+    Settings.invalidate_settings()
+    yield storage
+    Settings.invalidate_settings()
+
+def decrypted():
+    return get_secrets([], KEY, "").value()
+
+def test_import_stores_every_entry(vault):
+    result = import_secrets([("db/prod/mydb", {"user": "admin"}), ("/token/", {"value": "t"})], KEY)
+    assert result.value() == 2
+    assert decrypted() == {"db/prod/mydb": {"user": "admin"}, "token": {"value": "t"}}
+
+def test_entries_are_encrypted_as_they_are_read(vault, monkeypatch):
+    read = 0
+    read_before_first_encryption = []
+    encrypt_fields = AESGCMEncrypter.encrypt_fields
+
+    def entries():
+        nonlocal read
+        for i in range(200):
+            read += 1
+            yield f"s{i}", {"value": str(i)}
+
+    def recording(self, fields, key):
+        if not read_before_first_encryption:
+            read_before_first_encryption.append(read)
+        return encrypt_fields(self, fields, key)
+
+    monkeypatch.setattr(AESGCMEncrypter, "encrypt_fields", recording)
+    assert import_secrets(entries(), KEY).value() == 200
+    assert read_before_first_encryption[0] < 200
+    assert len(vault.list_names()) == 200
+
+def test_existing_secrets_fail_the_whole_import(vault):
+    import_secrets([("a", {"value": "old"}), ("b", {"value": "old"})], KEY)
+
+    result = import_secrets([("new", {"value": "1"}), ("b", {"value": "2"}), ("c", {"value": "3"}), ("a", {"value": "4"})], KEY)
+    assert result.is_failure()
+    assert "2 secret(s) already exist (a, b)" in result.failure_reason()
+    assert vault.list_names() == ["a", "b"]
+
+def test_overwrite_keeps_tags_and_metadata(vault):
+    import_secrets([("a", {"value": "old"})], KEY)
+    secret = vault.retreive_secret("a", "")
+    secret.tags = ["prod"]
+    secret.metadata = {"owner": "payments"}
+    vault.store_secret(secret)
+
+    assert import_secrets([("a", {"value": "new"}), ("b", {"value": "b"})], KEY, overwrite=True).value() == 2
+    assert decrypted() == {"a": {"value": "new"}, "b": {"value": "b"}}
+    stored = vault.retreive_secret("a", "")
+    assert (stored.tags, stored.metadata) == (["prod"], {"owner": "payments"})
+
+def test_last_duplicate_wins(vault):
+    assert import_secrets([("a", {"value": "1"}), ("b", {"value": "2"}), ("a", {"value": "3"})], KEY).value() == 2
+    assert decrypted() == {"a": {"value": "3"}, "b": {"value": "2"}}
+
+@pytest.mark.parametrize("entries, reason", [
+    ([], "no secrets to import"),
+    ([("a", {"value": "1"}), ("", {"value": "2"})], "needs a name"),
+    ([("a", {})], "needs a name and at least one field"),
+])
+def test_invalid_imports_store_nothing(vault, entries, reason):
+    result = import_secrets(entries, KEY)
+    assert result.is_failure()
+    assert reason in result.failure_reason()
+    assert vault.list_names() == []
+
+def test_unreadable_input_stores_nothing(vault):
+    def entries():
+        yield "a", {"value": "1"}
+        raise ValueError("line 2 is not valid JSON")
+
+    result = import_secrets(entries(), KEY)
+    assert "Could not read the secrets to import: line 2 is not valid JSON" in result.failure_reason()
+    assert vault.list_names() == []
@@ -0,0 +1,143 @@
+import os
+import stat
+
+from rune.storage.journal import MAGIC, JournalStorageManager
+from tests.helpers import make_secret, value_of
+
+
+def test_torn_tail_is_ignored_and_truncated_by_the_next_write(vault_path):
+    journal = JournalStorageManager(vault_path)
+    assert journal.store_secrets([make_secret("a", value="QQ=="), make_secret("b", value="Qg==")])
+
+    # An append interrupted halfway: a record header promising more than was written.
+    with open(vault_path, "ab") as f:
+        f.write(b"\x01\x00\x00\x00\x01\x00\x00\x00\x40\x00\x00")
+
+    recovered = JournalStorageManager(vault_path)
+    assert recovered.list_names() == ["a", "b"]
+    assert value_of(recovered.retreive_secret("b", "")) == "Qg=="
+
+    # Had the torn bytes been left in place, the scan would stop before "c".
+    assert recovered.store_secret(make_secret("c", value="Qw=="))
+    reopened = JournalStorageManager(vault_path)
+    assert reopened.list_names() == ["a", "b", "c"]
+    assert value_of(reopened.retreive_secret("c", "")) == "Qw=="
+
+def test_corrupt_record_ends_the_scan(vault_path):
+    journal = JournalStorageManager(vault_path)
+    journal.store_secret(make_secret("a"))
+    journal.store_secret(make_secret("b"))
+
+    with open(vault_path, "r+b") as f:
+        f.seek(-2, os.SEEK_END)
+        f.write(b"!!")
+
+    assert JournalStorageManager(vault_path).list_names() == ["a"]
+
+def test_compaction_drops_dead_records(vault_path):
+    journal = JournalStorageManager(vault_path, compaction_min_dead=4, compaction_ratio=1.0)
+    journal.store_secret(make_secret("kept", value="S0VQVA=="))
+    for i in range(4):
+        journal.store_secret(make_secret("churn", value=f"{i}AAA"))
+    journal.delete_secret("churn", "")
+
+    # Five dead records outnumber the single live one, so the journal was rewritten.
+    with open(vault_path, "rb") as f:
+        data = f.read()
+    assert data.startswith(MAGIC)
+    assert data.count(b"churn") == 0
+
+    reopened = JournalStorageManager(vault_path)
+    assert reopened.list_names() == ["kept"]
+    assert value_of(reopened.retreive_secret("kept", "")) == "S0VQVA=="
+
+def test_compact_keeps_latest_values(vault_path):
+    journal = JournalStorageManager(vault_path)
+    journal.store_secret(make_secret("a", value="MQ=="))
+    journal.store_secret(make_secret("a", value="Mg=="))
+    journal.store_secret(make_secret("b", "ns"))
+    size = os.path.getsize(vault_path)
+
+    assert journal.compact()
+    assert os.path.getsize(vault_path) < size
+    assert journal.list_names() == ["a", "ns/b"]
+    assert value_of(JournalStorageManager(vault_path).retreive_secret("a", "")) == "Mg=="
+
+def test_two_managers_share_a_journal(vault_path):
+    first = JournalStorageManager(vault_path)
+    second = JournalStorageManager(vault_path)
+    first.store_secret(make_secret("a"))
+    assert second.retreive_secret("a", "") is not None
+
+    second.store_secret(make_secret("b"))
+    first.store_secret(make_secret("c"))
+    assert first.list_names() == second.list_names() == ["a", "b", "c"]
+
+    assert second.delete_secret("a", "")
+    assert first.retreive_secret("a", "") is None
+    assert not first.delete_secret("a", "")
+
+    # The other manager swapping in a compacted journal must not leave this one reading stale offsets.
+    assert second.compact()
+    assert [s.name for s in first.get_all_secrets()] == ["b", "c"]
+    first.store_secret(make_secret("d"))
+    assert JournalStorageManager(vault_path).list_names() == ["b", "c", "d"]
+
+def test_rewrite_keeps_writes_of_other_managers(vault_path):
+    first = JournalStorageManager(vault_path)
+    second = JournalStorageManager(vault_path)
+    first.store_secret(make_secret("a"))
+    second.store_secret(make_secret("b"))
+
+    assert first.rewrite_secrets(lambda secrets: secrets)
+    assert JournalStorageManager(vault_path).list_names() == ["a", "b"]
+
+def tagged(name, *tags):
+    secret = make_secret(name)
+    secret.tags = list(tags)
+    return secret
+
+def test_tag_search_sees_writes_without_rebuilding(vault_path, monkeypatch):
+    journal = JournalStorageManager(vault_path)
+    journal.store_secret(tagged("old", "prod"))
+    assert journal.find_names(["prod"], {}) == ["old"]
+
+    def no_rebuild(self):
+        raise AssertionError("the tag index was rebuilt")
+    monkeypatch.setattr(JournalStorageManager, "rebuild_tag_index", no_rebuild)
+
+    journal.store_secret(tagged("new", "prod"))
+    assert journal.find_names(["prod"], {}) == ["new", "old"]
+
+    writer = JournalStorageManager(vault_path)
+    writer.store_secret(tagged("old", "dev"))
+    writer.delete_secret("new", "")
+    writer.store_secret(tagged("other", "prod", "dev"))
+    assert journal.find_names(["prod"], {}) == ["other"]
+    assert journal.find_names(["dev"], {}) == ["old", "other"]
+
+def test_tag_search_rebuilds_after_an_unlogged_write(vault_path):
+    journal = JournalStorageManager(vault_path)
+    journal.store_secret(tagged("a", "prod"))
+    assert journal.find_names(["prod"], {}) == ["a"]
+
+    # Rewriting changes the secrets without logging them, so the index must be rebuilt.
+    journal.rewrite_secrets(lambda secrets: [tagged("b", "prod")])
+    assert journal.find_names(["prod"], {}) == ["b"]
+
+def test_new_journal_is_private(vault_path):
+    old_umask = os.umask(0o022)
+    try:
+        JournalStorageManager(vault_path).store_secret(make_secret("a"))
+    finally:
+        os.umask(old_umask)
+    assert stat.S_IMODE(os.stat(vault_path).st_mode) == 0o600
+
+def test_empty_file_becomes_a_journal(vault_path):
+    open(vault_path, "wb").close()
+    journal = JournalStorageManager(vault_path)
+    assert journal.list_names() == []
+    assert journal.store_secret(make_secret("a"))
+    with open(vault_path, "rb") as f:
+        assert f.read(len(MAGIC)) == MAGIC
+    assert JournalStorageManager(vault_path).list_names() == ["a"]
@@ -0,0 +1,82 @@
+import json
+
+import pytest
+
+from rune.encryption.kdf import Argon2idKdf, Pbkdf2, ScryptKdf, kdf_from_params
+from rune.internal.add import add_secret
+from rune.internal.get import get_secret
+from rune.internal.update import update_secret
+from rune.storage import factory as StorageManagerFactory
+from rune.utils import settings as Settings
+
+
+@pytest.mark.parametrize("make", [
+    lambda: Pbkdf2(length=7),
+    lambda: Pbkdf2(iterations=0),
+    lambda: ScryptKdf(n=1000),
+    lambda: ScryptKdf(r=0),
+    lambda: Argon2idKdf(lanes=0),
+    lambda: Argon2idKdf(memory_cost=-1, length=64),
+])
+def test_invalid_costs_are_rejected(make):
+    with pytest.raises(ValueError):
+        make()
+
+@pytest.mark.parametrize("params", [
+    {"kdf": "bcrypt"},
+    {"kdf": "scrypt", "n": None},
+    {"kdf": "pbkdf2-sha256", "iterations": "many"},
+    {"kdf": "pbkdf2-sha256", "length": 20},
+])
+def test_invalid_params_raise_value_error(params):
+    with pytest.raises(ValueError):
+        kdf_from_params(params)
+
+def test_valid_params_round_trip():
+    for kdf in (Pbkdf2(1000, 16), ScryptKdf(2 ** 10, 8, 1, 24), Argon2idKdf(1, 1, 64, 32)):
+        assert kdf_from_params(kdf.params()).params() == kdf.params()
+
+
+@pytest.fixture
+def configure(tmp_path, monkeypatch):
+    """
+    Points rune at a settings.json in a temporary config dir; call it with the KDF settings to use.
+    """
+    for variable in (Settings.ENV_ENCRYPTION, Settings.ENV_STORAGE_MODE, Settings.ENV_SECRETS_FILE, Settings.ENV_STORAGE_ENCODING):
+        monkeypatch.delenv(variable, raising=False)
+    monkeypatch.setenv(Settings.ENV_CONFIG_DIR, str(tmp_path))
+    monkeypatch.setenv("RUNE_NO_AGENT", "1")
+
+    def write(kdf: dict) -> None:
+        settings = Settings.default_settings(str(tmp_path))
+        settings["storage"]["mode"] = "journal"
+        settings["kdf"] = kdf
+        with open(tmp_path / "settings.json", "w") as f:
+            json.dump(settings, f)
+        Settings.invalidate_settings()
+
+    yield write
+    Settings.invalidate_settings()
+
+def test_invalid_configured_kdf_fails_adding(configure):
+    configure({"name": "pbkdf2-sha256", "params": {"iterations": 1000, "length": 12}})
+
+    result = add_secret("db", {"password": "hunter2"}, "key")
+    assert result.is_failure()
+    assert "length" in result.failure_reason()
+    assert "settings.json" in result.failure_reason()
+
+def test_unknown_recorded_kdf_fails_reading_and_updating(configure):
+    configure({"name": "pbkdf2-sha256", "params": {"iterations": 1000}})
+    assert add_secret("db", {"password": "hunter2"}, "key").is_success()
+    assert get_secret("db", "key").value() == {"password": "hunter2"}
+
+    storage = StorageManagerFactory.get_configured_storage_manager()
+    secret = storage.retreive_secret("db", "")
+    for field in secret.fields.values():
+        field.params = {**field.params, "kdf": "bcrypt"}
+    storage.store_secret(secret)
+
+    for result in (get_secret("db", "key"), update_secret("db", {"password": "x"}, "key")):
+        assert result.is_failure()
+        assert "bcrypt" in result.failure_reason()
@@ -0,0 +1,105 @@
+import hashlib
+import hmac
+
+from rune.encryption.keycache import DerivedKeyCache
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def deriving(key: bytes, calls: list):
+    def derive() -> bytes:
+        calls.append(key)
+        return key
+    return derive
+
+def test_hit_skips_derivation():
+    cache = DerivedKeyCache()
+    calls = []
+    assert cache.get_or_derive("pw", b"salt", {"n": 1}, deriving(b"k" * 32, calls)) == b"k" * 32
+    assert cache.get_or_derive("pw", b"salt", {"n": 1}, deriving(b"x" * 32, calls)) == b"k" * 32
+    assert calls == [b"k" * 32]
+    stats = cache.stats()
+    assert (stats.hits, stats.misses) == (1, 1)
+
+def test_inputs_are_part_of_the_entry():
+    cache = DerivedKeyCache()
+    calls = []
+    for password, salt, params in [("pw", b"a", {"n": 1}), ("other", b"a", {"n": 1}),
+                                   ("pw", b"b", {"n": 1}), ("pw", b"a", {"n": 2})]:
+        cache.get_or_derive(password, salt, params, deriving(b"k", calls))
+    assert len(calls) == 4
+
+def test_least_recently_used_is_evicted():
+    cache = DerivedKeyCache(max_entries=2)
+    calls = []
+    cache.get_or_derive("a", b"", {}, deriving(b"a", calls))
+    cache.get_or_derive("b", b"", {}, deriving(b"b", calls))
+    cache.get_or_derive("a", b"", {}, deriving(b"a", calls))
+    cache.get_or_derive("c", b"", {}, deriving(b"c", calls))
+    assert len(cache) == 2
+
+    cache.get_or_derive("a", b"", {}, deriving(b"a", calls))
+    cache.get_or_derive("b", b"", {}, deriving(b"b", calls))
+    assert calls == [b"a", b"b", b"c", b"b"]
+    assert cache.stats().evictions == 2
+
+def test_entries_expire_after_the_ttl():
+    clock = FakeClock()
+    cache = DerivedKeyCache(ttl_seconds=10, clock=clock)
+    calls = []
+    cache.get_or_derive("pw", b"", {}, deriving(b"k", calls))
+    clock.now = 10.0
+    cache.get_or_derive("pw", b"", {}, deriving(b"k", calls))
+    assert len(calls) == 2
+
+def test_each_hit_extends_the_ttl():
+    clock = FakeClock()
+    cache = DerivedKeyCache(ttl_seconds=10, clock=clock)
+    calls = []
+    for now in (0.0, 8.0, 16.0, 24.0):
+        clock.now = now
+        cache.get_or_derive("pw", b"", {}, deriving(b"k", calls))
+    assert len(calls) == 1
+
+    clock.now = 34.0
+    cache.get_or_derive("pw", b"", {}, deriving(b"k", calls))
+    assert len(calls) == 2
+
+def test_evicted_keys_are_zeroed():
+    clock = FakeClock()
+    cache = DerivedKeyCache(max_entries=1, ttl_seconds=10, clock=clock)
+    cache.get_or_derive("a", b"", {}, lambda: b"\x01" * 32)
+    (first, _), = cache._entries.values()
+    cache.get_or_derive("b", b"", {}, lambda: b"\x02" * 32)
+    assert first == bytearray(32)
+
+    (second, _), = cache._entries.values()
+    clock.now = 10.0
+    cache.get_or_derive("c", b"", {}, lambda: b"\x03" * 32)
+    assert second == bytearray(32)
+
+    (third, _), = cache._entries.values()
+    cache.clear()
+    assert third == bytearray(32)
+    assert len(cache) == 0
+
+def hmac_entry(hash_key: bytes, password: str, salt: bytes, params: dict) -> bytes:
+    mac = hmac.new(hash_key, digestmod=hashlib.sha256)
+    for part in (password.encode(), salt, repr(sorted(params.items())).encode()):
+        mac.update(len(part).to_bytes(8, "big"))
+        mac.update(part)
+    return mac.digest()
+
+def test_entries_are_keyed_by_a_per_cache_secret():
+    first, second = DerivedKeyCache(), DerivedKeyCache()
+    first.get_or_derive("pw", b"salt", {"n": 1}, lambda: b"k")
+
+    assert list(first._entries) == [hmac_entry(first._hash_key, "pw", b"salt", {"n": 1})]
+    assert first._hash_key != second._hash_key
+    assert first._entry_key("pw", b"salt", {"n": 1}) != second._entry_key("pw", b"salt", {"n": 1})
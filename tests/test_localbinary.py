@@ -0,0 +1,48 @@
+import os
+
+import pytest
+
+from rune.exception.notfounderror import NotFoundError
+from rune.storage.localbinary import MAGIC, LocalBinaryStorageManager
+from tests.helpers import make_secret, value_of
+
+
+@pytest.fixture
+def vault(vault_path):
+    storage = LocalBinaryStorageManager(vault_path)
+    storage.store_secrets([make_secret(f"s{i}", "ns", value="QUJD" * 1000) for i in range(5)])
+    return storage
+
+def test_secrets_outlive_a_truncated_vault(vault, vault_path):
+    secret = vault.retreive_secret("s4", "ns")
+    os.truncate(vault_path, len(MAGIC))
+
+    # Values still pointing into the map would crash with SIGBUS here.
+    assert value_of(secret) == "QUJD" * 1000
+
+def test_truncated_record_is_reported_as_corrupted(vault, vault_path):
+    assert vault.retreive_secret("s0", "ns") is not None
+    os.truncate(vault_path, os.path.getsize(vault_path) - 5)
+
+    with pytest.raises(NotFoundError, match="corrupted"):
+        vault.retreive_secret("s0", "ns")
+    with pytest.raises(NotFoundError, match="corrupted"):
+        vault.list_names()
+    with pytest.raises(NotFoundError, match="corrupted"):
+        vault.store_secret(make_secret("new"))
+
+def test_vault_truncated_to_its_header_is_empty(vault, vault_path):
+    assert vault.list_names() != []
+    os.truncate(vault_path, len(MAGIC))
+
+    assert vault.retreive_secret("s0", "ns") is None
+    assert vault.list_names() == []
+    assert vault.store_secret(make_secret("new"))
+    assert LocalBinaryStorageManager(vault_path).list_names() == ["new"]
+
+def test_json_vault_is_rejected(vault_path):
+    with open(vault_path, "w") as f:
+        f.write("{}")
+
+    with pytest.raises(NotFoundError, match="not a rune binary vault"):
+        LocalBinaryStorageManager(vault_path).retreive_secret("s0", "")
@@ -0,0 +1,41 @@
+import os
+
+import pytest
+
+from tests.helpers import make_secret, make_storage, value_of
+
+
+def test_rewrite_replaces_every_secret(storage):
+    storage.store_secrets([make_secret("a", value="QQ=="), make_secret("b", "ns", value="Qg==")])
+
+    def transform(secrets):
+        for secret in secrets:
+            secret.fields["value"].ciphertext = "Wg=="
+            yield secret
+
+    assert storage.rewrite_secrets(transform)
+    assert storage.list_names() == ["a", "ns/b"]
+    assert value_of(storage.retreive_secret("b", "ns")) == "Wg=="
+
+def test_failed_rewrite_leaves_the_vault_unchanged(storage, backend, vault_path):
+    storage.store_secrets([make_secret("a", value="QQ=="), make_secret("b", "ns", value="Qg==")])
+    with open(vault_path, "rb") as f:
+        before = f.read()
+
+    def transform(secrets):
+        for secret in secrets:
+            secret.fields["value"].ciphertext = "Wg=="
+            yield secret
+            raise RuntimeError("wrong password")
+
+    with pytest.raises(RuntimeError):
+        storage.rewrite_secrets(transform)
+
+    with open(vault_path, "rb") as f:
+        assert f.read() == before
+    assert not [name for name in os.listdir(os.path.dirname(vault_path)) if name.endswith((".tmp", ".compact"))]
+    reopened = make_storage(backend, vault_path)
+    assert reopened.list_names() == ["a", "ns/b"]
+    assert value_of(reopened.retreive_secret("a", "")) == "QQ=="
+    # The lock was released.
+    assert storage.store_secret(make_secret("c"))
@@ -0,0 +1,69 @@
+import threading
+
+import pytest
+
+from tests.helpers import make_secret, make_storage, value_of
+
+
+@pytest.fixture
+def seeded(storage):
+    storage.store_secrets([make_secret("a", value="QQ=="), make_secret("b", "ns", value="Qg==")])
+    return storage
+
+def test_commit_applies_every_write(seeded):
+    with seeded.transaction() as tx:
+        tx.put(make_secret("c", value="Qw=="))
+        assert tx.delete("b", "ns")
+        assert tx.names() == ["a", "c"]
+        assert tx.commit()
+
+    assert seeded.list_names() == ["a", "c"]
+    assert value_of(seeded.retreive_secret("c", "")) == "Qw=="
+
+def test_exception_rolls_back(seeded):
+    with pytest.raises(RuntimeError):
+        with seeded.transaction() as tx:
+            tx.put(make_secret("a", value="WA=="))
+            tx.delete("b", "ns")
+            raise RuntimeError("interrupted")
+
+    assert seeded.list_names() == ["a", "ns/b"]
+    assert value_of(seeded.retreive_secret("a", "")) == "QQ=="
+
+def test_missing_commit_discards_writes(seeded):
+    with seeded.transaction() as tx:
+        tx.put(make_secret("c"))
+        tx.delete("a", "")
+        assert tx.get("a") is None
+
+    assert seeded.list_names() == ["a", "ns/b"]
+    # The lock was released: a later write goes through.
+    assert seeded.store_secret(make_secret("c"))
+    assert seeded.list_names() == ["a", "c", "ns/b"]
+
+def test_commit_twice_raises(seeded):
+    with seeded.transaction() as tx:
+        tx.commit()
+        with pytest.raises(RuntimeError):
+            tx.commit()
+
+def test_concurrent_writer_waits_for_commit(seeded, backend, vault_path):
+    other = make_storage(backend, vault_path)
+    stored = threading.Event()
+
+    def write() -> None:
+        other.store_secret(make_secret("a", value="T1RIRVI="))
+        stored.set()
+
+    with seeded.transaction() as tx:
+        assert value_of(tx.get("a")) == "QQ=="
+        writer = threading.Thread(target=write)
+        writer.start()
+        assert not stored.wait(0.3)
+        tx.put(make_secret("a", value="VFg="))
+        tx.commit()
+    writer.join(10)
+
+    assert stored.is_set()
+    # The writer went second, so its value wins.
+    assert value_of(make_storage(backend, vault_path).retreive_secret("a", "")) == "T1RIRVI="